@@ -1,3 +1,26 @@
-from .client import GraphClient
+from typing import TYPE_CHECKING
 
-__all__ = ["GraphClient"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .client import GraphClient
+    from .pool import GraphClientPool
+
+__all__ = ["GraphClient", "GraphClientPool"]
+
+_LAZY_EXPORTS = {
+    "GraphClient": ".client",
+    "GraphClientPool": ".pool",
+}
+
+
+def __getattr__(name: str):
+    # exports are imported on first use, so importing a utility module doesn't load the clients
+    if name in _LAZY_EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
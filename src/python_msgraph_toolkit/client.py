@@ -1,27 +1,122 @@
 # msgraph API documentation https://learn.microsoft.com/en-us/graph/api/overview?view=graph-rest-1.0&preserve-view=true
 
-from .services.teams.teams_service import TeamsService
-from .services.users.users_service import UsersService
-from .services.sharepoint.sharepoint_service import SharepointService
-from .services.outlook.outlook_service import OutlookService
-from .utils.auth import Auth
+from functools import cached_property
+from typing import TYPE_CHECKING
+from .utils.bulk import BulkExecutor
+
+if TYPE_CHECKING:
+    from .services.teams.teams_service import TeamsService
+    from .services.users.users_service import UsersService
+    from .services.sharepoint.sharepoint_service import SharepointService
+    from .services.outlook.outlook_service import OutlookService
 
 import logging
 logger = logging.getLogger('azure')
 logger.setLevel(logging.WARNING)
 
 class GraphClient:
-    def __init__(self, tenant_id: str, client_id: str, secret: str):
-        authorised_msgraph = Auth(tenant_id, client_id, secret)
+    def __init__(self, tenant_id: str, client_id: str, secret: str, **kwargs):
+        """
+        Entry point to the SharePoint, Outlook, Teams and Users services.
+
+        #### Args:
+            tenant_id (str): Azure AD tenant ID
+            client_id (str): App registration client ID
+            secret (str): App registration client secret
+            batching (bool | BatchingHandler, optional): Coalesce concurrent GET requests into
+                Graph $batch envelopes of up to 20 requests (default False)
+            throttling (bool | ThrottlingHandler, optional): Adaptive per tenant/resource rate limiting
+                with Retry-After aware retries (default True)
+            rate_limiter (AdaptiveRateLimiter, optional): Token bucket registry shared between clients
+            delta_store (DeltaStore, optional): Where delta sync cursors and chat watermarks are kept, eg a SqliteDeltaStore
+                so syncs resume across runs (default in memory)
+            mirror (DeltaMirror, optional): Local copy of delta synced users, groups and calendar views, eg a SqliteDeltaMirror
+                (default in memory)
+            cache (ResponseCache, optional): Cache for repeated lookups (get_site_by_id, get_user, get_item_by_path...),
+                disabled by default
+            etag_store (ETagStore, optional): Revalidates get_item_by_id and get_event with If-None-Match,
+                disabled by default
+            path_cache (DrivePathCache, optional): Drive path to item id cache used by resolve_path(s)
+                (default in memory, 10 minute TTL)
+            folder_tree_ttl (float, optional): Seconds a mailbox's folder tree is reused by folder lookups,
+                disabled by default so folders changed elsewhere are seen at once
+            transport (TransportConfig, optional): Connection pools to share between clients, with connection
+                limits, keep-alive, HTTP/2 and timeouts (default the SDK's own client)
+            token_refresh (bool, optional): Renew access tokens in the background before they expire (default True)
+            token_cache (EncryptedTokenCache, optional): Encrypted token file reused by later processes,
+                disabled by default
+
+        The Graph SDK is imported when the first client is built, and each service (with its SDK request
+        builders and models) when it is first used, so scripts only load what they touch.
+        """
+        from .utils.auth import Auth
+
+        authorised_msgraph = Auth(tenant_id, client_id, secret, **kwargs)
+        self._auth = authorised_msgraph
+        self._options = kwargs
+        self.authorised = bool(authorised_msgraph and authorised_msgraph.authorised)
+
+    # child services, initialised on first access
+    @cached_property
+    def sharepoint(self) -> "SharepointService":
+        from .services.sharepoint.sharepoint_service import SharepointService
+        return SharepointService(self._auth._msgraph_client, delta_store=self._options.get("delta_store"),
+                                 cache=self._options.get("cache"), etag_store=self._options.get("etag_store"),
+                                 path_cache=self._options.get("path_cache"), transport=self._options.get("transport"))
+
+    @cached_property
+    def outlook(self) -> "OutlookService":
+        from .services.outlook.outlook_service import OutlookService
+        return OutlookService(self._auth._msgraph_client, delta_store=self._options.get("delta_store"),
+                              mirror=self._options.get("mirror"), etag_store=self._options.get("etag_store"),
+                              transport=self._options.get("transport"), folder_tree_ttl=self._options.get("folder_tree_ttl"))
+
+    @cached_property
+    def teams(self) -> "TeamsService":
+        from .services.teams.teams_service import TeamsService
+        return TeamsService(self._auth._msgraph_client, delta_store=self._options.get("delta_store"))
+
+    @cached_property
+    def users(self) -> "UsersService":
+        from .services.users.users_service import UsersService
+        return UsersService(self._auth._msgraph_client, delta_store=self._options.get("delta_store"),
+                            mirror=self._options.get("mirror"), cache=self._options.get("cache"))
+
+    def bulk(self, operations, **kwargs):
+        """
+        Run many service calls concurrently and stream back a BulkResult per call.
+
+        #### Args:
+            operations: Iterable or async iterable of coroutine factories, (resource, factory)
+                tuples or BulkOperation objects
+            concurrency (int, optional): Maximum calls running at once (default 10)
+            limits (Dict[str, int], optional): Maximum calls running at once per resource type
+            ordered (bool, optional): Yield results in input order instead of completion order (default False)
+
+        #### Returns:
+            AsyncIterator[BulkResult]: One result per operation, failures are reported in `result.error`
+
+        #### Example:
+            >>> deletes = [
+            ...     ("drive", partial(client.sharepoint.files.delete_item, drive_id=drive_id, item_id=item_id))
+            ...     for item_id in item_ids
+            ... ]
+            >>> async for result in client.bulk(deletes, concurrency=20, limits={"drive": 4}):
+            ...     if not result.ok:
+            ...         print(f"Delete {result.index} failed: {result.error}")
+        """
+        return BulkExecutor(**kwargs).run(operations)
+
+    async def aclose(self) -> None:
+        """Releases the client's connections and credential, the client can't be used afterwards."""
         self.authorised = False
+        await self._auth.aclose()
+
+    async def __aenter__(self) -> "GraphClient":
+        return self
 
-        # initialise child services
-        if authorised_msgraph and authorised_msgraph.authorised:
-            self.authorised = True
-            self.sharepoint = SharepointService(authorised_msgraph._msgraph_client)
-            self.outlook = OutlookService(authorised_msgraph._msgraph_client)
-            self.teams = TeamsService(authorised_msgraph._msgraph_client)
-            self.users = UsersService(authorised_msgraph._msgraph_client)
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
         
 
 
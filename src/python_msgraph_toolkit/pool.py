@@ -0,0 +1,175 @@
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from time import monotonic
+from typing import AsyncIterator, Optional, Tuple
+from .client import GraphClient
+from .services.exceptions import ValidationError
+from .utils.transport import TransportConfig
+
+logger = logging.getLogger(__name__)
+
+# GraphClient options holding tenant data under keys that don't name the tenant, one per client
+TENANT_OPTIONS = ("cache", "delta_store", "mirror", "etag_store", "path_cache")
+
+
+@dataclass
+class _PooledClient:
+    client: GraphClient
+    secret: str
+    last_used: float
+    leases: int = 0
+    retired: bool = False
+
+
+class GraphClientPool:
+    def __init__(self, client_id: Optional[str] = None, secret: Optional[str] = None, **kwargs):
+        """
+        Lazily created GraphClients for many tenants, sharing one set of connection pools.
+
+        A client is built on the first request for a tenant and app, and reused until it is
+        the least recently used of more than `max_clients` or has been idle for `idle_timeout`
+        seconds. Evicted clients release their credential, the connections stay in the shared
+        pool for the other tenants. Every client draws from the same transport, so
+        `max_connections` caps the sockets of the whole pool however many tenants it serves.
+
+        Caches and sync state (cache, delta_store, mirror, etag_store, path_cache) are keyed by
+        resource, not tenant, so one instance can't serve every client. Pass a factory taking the
+        tenant ID instead, it is called for each client the pool builds.
+
+        #### Args:
+            client_id (str, optional): App registration client ID used when `get` isn't given one, eg a multi-tenant app
+            secret (str, optional): Secret of that app registration
+            max_clients (int, optional): Clients kept before the least recently used are evicted (default 50)
+            idle_timeout (float, optional): Seconds an unused client is kept, None to only evict on size (default 900)
+            max_connections (int, optional): Open connections for all tenants together, ignored when `transport`
+                is given (default 100)
+            transport (TransportConfig, optional): Connection pools shared by every client
+            **kwargs: Other GraphClient options (throttling, rate_limiter...) applied to every client, the
+                per-tenant ones (cache, delta_store...) as factories, eg
+                delta_store=lambda tenant_id: SqliteDeltaStore(f"sync-{tenant_id}.db")
+
+        #### Example:
+            >>> pool = GraphClientPool(client_id, secret, max_clients=100, max_connections=64)
+            >>> async with pool.client(tenant_id) as client:
+            ...     users = await client.users.users.list_users()
+            >>> await pool.aclose()
+        """
+        self.client_id = client_id
+        self.secret = secret
+        self.max_clients = kwargs.pop("max_clients", 50)
+        self.idle_timeout = kwargs.pop("idle_timeout", 900)
+        max_connections = kwargs.pop("max_connections", 100)
+        if self.max_clients < 1:
+            raise ValidationError("max_clients must be at least 1")
+        if self.idle_timeout is not None and self.idle_timeout <= 0:
+            raise ValidationError("idle_timeout must be positive")
+        transport = kwargs.pop("transport", None)
+        self._owns_transport = transport is None
+        self.transport: TransportConfig = transport or TransportConfig(max_connections=max_connections)
+        for name in TENANT_OPTIONS:
+            if name in kwargs and not callable(kwargs[name]):
+                raise ValidationError(f"{name} must be a factory taking the tenant ID, one instance would mix tenants")
+        self._client_options = kwargs
+        self._clients: "OrderedDict[Tuple[str, str], _PooledClient]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return any(key[0] == tenant_id for key in self._clients)
+
+    async def get(self, tenant_id: str, client_id: Optional[str] = None, secret: Optional[str] = None) -> GraphClient:
+        """
+        Returns the client of a tenant and app, creating it if needed.
+
+        The client may be evicted by later calls, use `client()` to hold on to it for a while.
+        """
+        key, entry = await self._entry(tenant_id, client_id, secret)
+        await self._evict(keep=key)
+        return entry.client
+
+    @asynccontextmanager
+    async def client(self, tenant_id: str, client_id: Optional[str] = None,
+                     secret: Optional[str] = None) -> AsyncIterator[GraphClient]:
+        """Lends the client of a tenant and app, it isn't closed until the block exits."""
+        key, entry = await self._entry(tenant_id, client_id, secret)
+        entry.leases += 1
+        try:
+            await self._evict(keep=key)
+            yield entry.client
+        finally:
+            entry.leases -= 1
+            entry.last_used = monotonic()
+            if entry.retired and not entry.leases:
+                await self._close(tenant_id, entry)
+
+    async def evict(self, tenant_id: str) -> None:
+        """Closes every client of a tenant, eg after its consent was revoked."""
+        for key in [key for key in self._clients if key[0] == tenant_id]:
+            await self._retire(key)
+
+    async def aclose(self) -> None:
+        """Closes every client, and the connection pools unless the transport was passed in."""
+        for key in list(self._clients):
+            await self._retire(key)
+        if self._owns_transport:
+            await self.transport.aclose()
+
+    async def __aenter__(self) -> "GraphClientPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _entry(self, tenant_id: str, client_id: Optional[str],
+                     secret: Optional[str]) -> Tuple[Tuple[str, str], _PooledClient]:
+        client_id = client_id or self.client_id
+        secret = secret or self.secret
+        if not tenant_id:
+            raise ValidationError("Tenant ID must be supplied")
+        if not client_id or not secret:
+            raise ValidationError("Client ID and secret must be supplied to the pool or to get()")
+
+        key = (tenant_id, client_id)
+        entry = self._clients.get(key)
+        if entry is not None and entry.secret != secret:
+            await self._retire(key) # rotated secret
+            entry = None
+        if entry is None:
+            options = {name: factory(tenant_id) if name in TENANT_OPTIONS else factory
+                       for name, factory in self._client_options.items()}
+            client = GraphClient(tenant_id, client_id, secret, transport=self.transport, **options)
+            entry = self._clients[key] = _PooledClient(client, secret, monotonic())
+        self._clients.move_to_end(key)
+        entry.last_used = monotonic()
+        return key, entry
+
+    async def _evict(self, keep: Tuple[str, str]) -> None:
+        """Closes idle clients, then the least recently used past max_clients. Lent clients and `keep` stay."""
+        evictable = [key for key, entry in self._clients.items() if not entry.leases and key != keep]
+        if self.idle_timeout is not None:
+            now = monotonic()
+            for key in [key for key in evictable if now - self._clients[key].last_used >= self.idle_timeout]:
+                await self._retire(key)
+        for key in [key for key in evictable if key in self._clients]:
+            if len(self._clients) <= self.max_clients:
+                break
+            await self._retire(key)
+
+    async def _retire(self, key: Tuple[str, str]) -> None:
+        """Removes a client from the pool, it is closed now or when the last borrower returns it."""
+        entry = self._clients.pop(key, None)
+        if entry is None:
+            return # retired by another task while this one was closing a client
+        entry.retired = True
+        if not entry.leases:
+            await self._close(key[0], entry)
+
+    @staticmethod
+    async def _close(tenant_id: str, entry: _PooledClient) -> None:
+        try:
+            await entry.client.aclose()
+        except Exception as e:
+            logger.warning(f"Closing the client for tenant {tenant_id} failed: {e}")
@@ -5,7 +5,6 @@ msgraph_wrapper.exceptions
 This module contains the set of MS Graph API wrapper exceptions.
 """
 from typing import Optional, Dict, Any
-from requests.exceptions import HTTPError
 class GraphAPIError(Exception):
     """Base class for all Graph API exceptions."""
     
@@ -37,6 +36,17 @@ class TimeoutError(GraphAPIError):
 class RateLimitError(GraphAPIError):
     """API rate limit exceeded."""
 
+    def __init__(self, message=None, status_code=None, response=None, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message, status_code, response)
+
+class ServiceUnavailableError(GraphAPIError):
+    """The service is temporarily unavailable (503)."""
+
+    def __init__(self, message=None, status_code=None, response=None, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message, status_code, response)
+
 def graph_exception_handler(exception: Exception, service_name: str = "Graph API"):
     """Centralized exception handler for Microsoft Graph API errors."""
     import logging
@@ -44,27 +54,36 @@ def graph_exception_handler(exception: Exception, service_name: str = "Graph API
     
     logger.error(f"{service_name} operation failed: {exception}", exc_info=True)
     error_str = str(exception).lower()
+    status_code = getattr(exception, "response_status_code", None)
     
+    # Throttling and outages, checked on the status code first so retry timing survives to the caller
+    if status_code in (429, 503):
+        from ..utils.throttling import parse_retry_after
+        retry_after = parse_retry_after(getattr(exception, "response_headers", None))
+        if status_code == 503:
+            raise ServiceUnavailableError(f"{service_name} is temporarily unavailable", status_code=status_code, retry_after=retry_after)
+        raise RateLimitError("API rate limit exceeded", status_code=status_code, retry_after=retry_after)
+
     # Authentication errors
-    if '900023' in error_str or 'aadsts90002' in error_str:
-        raise AuthenticationError("Invalid Tenant ID. Verify MSGRAPH_TENANT_ID and try again")
+    elif '900023' in error_str or 'aadsts90002' in error_str:
+        raise AuthenticationError("Invalid Tenant ID. Verify MSGRAPH_TENANT_ID and try again", status_code=status_code)
     elif '700016' in error_str or 'aadsts700016' in error_str:
-        raise AuthenticationError("Invalid Client ID. Verify MSGRAPH_CLIENT_ID and try again")
+        raise AuthenticationError("Invalid Client ID. Verify MSGRAPH_CLIENT_ID and try again", status_code=status_code)
     elif '7000215' in error_str or 'aadsts7000215' in error_str:
-        raise AuthenticationError("Invalid Client Secret. Verify MSGRAPH_API_KEY and try again")
+        raise AuthenticationError("Invalid Client Secret. Verify MSGRAPH_API_KEY and try again", status_code=status_code)
     elif 'ErrorAccessDenied' in error_str or '403' in error_str:
-        raise AuthenticationError("Access denied. Verify permissions for the application in Azure AD and ensure the user has access to the resource.")
+        raise AuthenticationError("Access denied. Verify permissions for the application in Azure AD and ensure the user has access to the resource.", status_code=status_code)
     
     # Resource errors
     elif 'not found' in error_str or '404' in error_str:
-        raise GraphAPIError(f"{service_name} resource not found")
+        raise GraphAPIError(f"{service_name} resource not found", status_code=status_code)
     elif 'forbidden' in error_str or '403' in error_str:
-        raise GraphAPIError(f"Access denied to {service_name} resource")
+        raise GraphAPIError(f"Access denied to {service_name} resource", status_code=status_code)
     elif 'rate limit' in error_str or '429' in error_str:
-        raise RateLimitError("API rate limit exceeded")
+        raise RateLimitError("API rate limit exceeded", status_code=status_code)
     
     # Default
     else:
-        raise GraphAPIError(f"{service_name} operation failed: {exception}")
+        raise GraphAPIError(f"{service_name} operation failed: {exception}", status_code=status_code)
 
 # error handling https://learn.microsoft.com/en-us/graph/errors
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+python_msgraph_toolkit.services.outlook.attachments
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+File attachments for outgoing mail, read from disk off the event loop.
+
+Graph accepts attachments of up to 3 MB inline in a message, base64 encoded. Those are
+encoded block by block in a worker thread and handed to the serializer already encoded.
+Larger attachments are sent as raw fragments to an attachment upload session, read a chunk
+at a time, so a file is never held in memory whole.
+
+https://learn.microsoft.com/en-us/graph/outlook-large-attachments
+"""
+import asyncio
+import base64
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Union
+from msgraph.generated.models.attachment_item import AttachmentItem
+from msgraph.generated.models.attachment_type import AttachmentType
+from msgraph.generated.models.file_attachment import FileAttachment
+from msgraph.generated.users.item.messages.item.attachments.create_upload_session.create_upload_session_post_request_body import CreateUploadSessionPostRequestBody
+from ..exceptions import ValidationError
+from ...utils.transfer import UPLOAD_FRAGMENT_MULTIPLE
+
+LARGE_ATTACHMENT_SIZE = 3 * 1024 * 1024 # larger attachments, or messages, go through upload sessions
+ATTACHMENT_CHUNK_SIZE = 12 * UPLOAD_FRAGMENT_MULTIPLE # 3.75 MiB, session fragments must stay under 4 MB
+ENCODE_BLOCK_SIZE = 768 * 1024 # a multiple of 3, so encoded blocks join without padding in between
+
+
+def encode_file(path: str, block_size: int = ENCODE_BLOCK_SIZE) -> str:
+    """Base64 encodes a file a block at a time. Blocks on disk, run it in a worker thread."""
+    encoded = []
+    with open(path, "rb") as attachment:
+        while block := attachment.read(block_size):
+            encoded.append(base64.b64encode(block).decode("ascii"))
+    return "".join(encoded)
+
+
+@dataclass
+class AttachmentFile:
+    """A file on disk to attach to a message."""
+    path: str
+    name: str
+    size: int
+    content_type: str
+
+    @classmethod
+    def from_path(cls, path: Union[str, os.PathLike]) -> "AttachmentFile":
+        path = os.fspath(path)
+        if not os.path.isfile(path):
+            raise ValidationError(f"Attachment not found: {path}")
+        return cls(
+            path=path,
+            name=os.path.basename(path),
+            size=os.path.getsize(path),
+            content_type=mimetypes.guess_type(path, strict=False)[0] or "application/octet-stream",
+        )
+
+    @property
+    def is_large(self) -> bool:
+        return self.size > LARGE_ATTACHMENT_SIZE
+
+    async def to_file_attachment(self) -> FileAttachment:
+        """Reads and encodes the file in a worker thread, for attachments sent inline."""
+        attachment = FileAttachment(
+            odata_type="#microsoft.graph.fileAttachment",
+            name=self.name,
+            content_type=self.content_type,
+        )
+        # written as is by the serializer, content_bytes would be encoded again on the event loop
+        attachment.additional_data["contentBytes"] = await asyncio.to_thread(encode_file, self.path)
+        return attachment
+
+    def upload_session_body(self) -> CreateUploadSessionPostRequestBody:
+        return CreateUploadSessionPostRequestBody(
+            attachment_item=AttachmentItem(
+                attachment_type=AttachmentType.File,
+                name=self.name,
+                size=self.size,
+                content_type=self.content_type,
+            )
+        )
@@ -1,5 +1,6 @@
 from msgraph.graph_service_client import GraphServiceClient
 from msgraph.generated.users.item.calendar.events.events_request_builder import EventsRequestBuilder
+from msgraph.generated.users.item.events.item.event_item_request_builder import EventItemRequestBuilder
 from kiota_abstractions.base_request_configuration import RequestConfiguration
 from msgraph.generated.models.event import Event
 from msgraph.generated.models.item_body import ItemBody
@@ -9,16 +10,70 @@ from msgraph.generated.models.location import Location
 from msgraph.generated.models.attendee import Attendee
 from msgraph.generated.models.email_address import EmailAddress
 from msgraph.generated.models.event import Event
+from msgraph.generated.users.item.calendar_view.delta.delta_request_builder import DeltaRequestBuilder as CalendarViewDeltaRequestBuilder
+from datetime import datetime
+from typing import List, Optional
+import json
 import logging
 from ..exceptions import ValidationError, graph_exception_handler
+from ...utils.pagination import PageIterator
+from ...utils.delta import DeltaMirror, DeltaResult, DeltaStore, MemoryDeltaMirror, MemoryDeltaStore, sync_mirror
+from ...utils.serialization import parse_model
+from ...utils.etag import ETagStore, conditional_get
+from ...utils.query import Filter, query_configuration
 
 class CalendarService:
     """Service for managing Email through Microsoft Graph API."""
-    def __init__(self, msgraph_client: GraphServiceClient) -> None:
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 mirror: Optional[DeltaMirror] = None, etag_store: Optional[ETagStore] = None) -> None:
         self._msgraph_client = msgraph_client
         self.logger = logging.getLogger(__name__)
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")       
+        # the event cache and its delta tokens may be configured apart, a delta token whose
+        # window has no cached events is ignored by sync_mirror and the window is synced in full
+        self._delta_store = delta_store or MemoryDeltaStore()
+        self._mirror = mirror or MemoryDeltaMirror()
+        self._etag_store = etag_store
+
+    def iter_events(self, **kwargs) -> PageIterator:
+        """Stream calendar events for a user, following every page of results.
+
+        Args:
+            user (str): The user ID or email address.
+            start_date (str, optional): The start date in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            end_date (str, optional): The end date in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options, a $filter is combined with the date range.
+
+        Returns:
+            PageIterator: Async iterator of Event objects, use `.pages()` to iterate page by page.
+        """
+        user = kwargs.get("user") # required
+        start_date = kwargs.get("start_date")
+        end_date = kwargs.get("end_date")
+        query = kwargs.get("query")
+
+        if not user:
+            raise ValidationError("User is required")
+
+        request_configuration = None
+        if start_date and end_date:
+            query_params = EventsRequestBuilder.EventsRequestBuilderGetQueryParameters(
+                filter = f"start/dateTime ge '{start_date}' and end/dateTime le '{end_date}'",
+                orderby=["start/dateTime ASC"]
+            )
+            request_configuration = RequestConfiguration(
+            query_parameters = query_params,
+            )
+        date_filter = request_configuration.query_parameters.filter if request_configuration else None
+        request_configuration = query_configuration(query, EventsRequestBuilder.EventsRequestBuilderGetQueryParameters, request_configuration)
+        if date_filter and query and query.filter:
+            request_configuration.query_parameters.filter = str(Filter(date_filter) & query.filter)
+        return PageIterator(
+            self._msgraph_client.users.by_user_id(user).calendar.events,
+            request_configuration,
+            service_name = "Outlook",
+        )
 
     async def get_events(self, **kwargs):
         """Get calendar events for a user within a specified date range.
@@ -27,38 +82,135 @@ class CalendarService:
             user (str): The user ID or email address.
             start_date (str, optional): The start date in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
             end_date (str, optional): The end date in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options, a $filter is combined with the date range.
             
         Returns:
             Optional[List[dict]]: A list of calendar events or None if an error occurs.
         """
+        try:
+            events = await self.iter_events(**kwargs).collect()
+            if events:
+                return events
+        except ValidationError as e:
+            graph_exception_handler(e, "Outlook")
+            return None
+        
+    async def get_event(self, **kwargs) -> Optional[Event]:
+        """Get a single calendar event.
+
+        With an ETag store the request is conditional and an unchanged event is served from the store.
+
+        Args:
+            user (str): The user ID or email address.
+            event_id (str): The ID of the event.
+            query (QueryOptions, optional): $select and $expand options.
+
+        Returns:
+            Optional[Event]: The event, or None if an error occurs.
+        """
         user = kwargs.get("user") # required
-        start_date = kwargs.get("start_date")
-        end_date = kwargs.get("end_date")
-        try:   
-            events = None
-            if not user:
-                raise ValidationError("User is required")
-            
-            if not start_date or not end_date:
-                events = await self._msgraph_client.users.by_user_id(user).calendar.events.get()
-                
-            else:       
-                query_params = EventsRequestBuilder.EventsRequestBuilderGetQueryParameters(
-                    filter = f"start/dateTime ge '{start_date}' and end/dateTime le '{end_date}'",
-                    orderby=["start/dateTime ASC"]
-                )
-
-                request_configuration = RequestConfiguration(
-                query_parameters = query_params,
-                )
-                events = await self._msgraph_client.users.by_user_id(user).calendar.events.get(request_configuration = request_configuration)
-            if events and events.value:
-                return events.value
-                    
+        event_id = kwargs.get("event_id") # required
+
+        if not user:
+            raise ValidationError("User is required")
+        if not event_id:
+            raise ValidationError("Event ID is required")
+        query = kwargs.get("query")
+        configuration = query_configuration(query, EventItemRequestBuilder.EventItemRequestBuilderGetQueryParameters)
+
+        try:
+            return await conditional_get(
+                self._msgraph_client.users.by_user_id(user).events.by_event_id(event_id),
+                self._etag_store,
+                f"event:{user}:{event_id}" + (f"?{query}" if query else ""), # selections are stored apart
+                configuration,
+            )
         except Exception as e:
             graph_exception_handler(e, "Outlook")
             return None
-        
+
+    async def sync_calendar_view(self, **kwargs) -> DeltaResult:
+        """Bring the cached calendar view of a user up to date with `calendarView/delta`.
+
+        The calendar view expands recurring series into their occurrences. The first sync of a
+        user and time window fetches every event in it, later syncs only fetch events created,
+        updated or deleted since. A window with no cached events (an empty window, or a cache lost
+        while its delta token was kept) is always fetched in full.
+
+        Args:
+            user (str): The user ID or email address.
+            start_date (str | datetime): Start of the window in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            end_date (str | datetime): End of the window in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            page_size (int, optional): Events per page, sent as `Prefer: odata.maxpagesize`.
+
+        Returns:
+            DeltaResult: Ids of the events added, changed and deleted in the window.
+        """
+        user, start_date, end_date = self._calendar_view_window(kwargs)
+        page_size = kwargs.get("page_size")
+
+        query_params = CalendarViewDeltaRequestBuilder.DeltaRequestBuilderGetQueryParameters(
+            start_date_time = start_date,
+            end_date_time = end_date,
+        )
+        request_configuration = RequestConfiguration(
+            query_parameters = query_params,
+        )
+        if page_size:
+            request_configuration.headers.add("Prefer", f"odata.maxpagesize={page_size}")
+        return await sync_mirror(
+            self._msgraph_client.users.by_user_id(user).calendar_view.delta,
+            self._delta_store,
+            self._mirror,
+            self._calendar_view_key(user, start_date, end_date),
+            service_name = "Outlook",
+            request_configuration = request_configuration,
+        )
+
+    async def calendar_view(self, **kwargs) -> List[Event]:
+        """Get the events of a user in a time window, recurring series expanded into occurrences.
+
+        Events are served from a local cache kept per user and window, which is brought up to
+        date with a delta query first, so repeated calls only transfer what changed.
+
+        Args:
+            user (str): The user ID or email address.
+            start_date (str | datetime): Start of the window in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            end_date (str | datetime): End of the window in ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ).
+            refresh (bool, optional): Sync with Graph before reading the cache (default True).
+            page_size (int, optional): Events per page when syncing.
+
+        Returns:
+            List[Event]: Events in the window ordered by start time.
+        """
+        user, start_date, end_date = self._calendar_view_window(kwargs)
+        if kwargs.get("refresh", True):
+            await self.sync_calendar_view(**kwargs)
+
+        records = [record async for record in self._mirror.records(self._calendar_view_key(user, start_date, end_date))]
+        records.sort(key=lambda record: (record.get("start") or {}).get("dateTime") or "")
+        return [parse_model(json.dumps(record).encode(), Event) for record in records]
+
+    @staticmethod
+    def _calendar_view_window(kwargs) -> tuple:
+        user = kwargs.get("user") # required
+        start_date = kwargs.get("start_date") # required
+        end_date = kwargs.get("end_date") # required
+
+        if not user:
+            raise ValidationError("User is required")
+        if not start_date or not end_date:
+            raise ValidationError("Start and end date are required")
+        if isinstance(start_date, datetime):
+            start_date = start_date.isoformat()
+        if isinstance(end_date, datetime):
+            end_date = end_date.isoformat()
+        return user, start_date, end_date
+
+    @staticmethod
+    def _calendar_view_key(user: str, start_date: str, end_date: str) -> str:
+        return f"calendar_view:{user}:{start_date}:{end_date}"
+
     async def create_event(self, **kwargs):
         """Create a new calendar event for a user.
 
@@ -1,62 +1,85 @@
-import base64
+import asyncio
+import contextlib
 from msgraph.graph_service_client import GraphServiceClient
-from functools import wraps
+from functools import partial, wraps
 import logging
 import os
-import mimetypes
-from typing import List, Optional
+from time import monotonic
+from typing import AsyncIterator, Dict, List, Optional
 from msgraph.generated.users.item.send_mail.send_mail_post_request_body import SendMailPostRequestBody
 from msgraph.generated.users.item.messages.item.reply.reply_post_request_body import ReplyPostRequestBody
 from msgraph.generated.users.item.messages.item.reply_all.reply_all_post_request_body import ReplyAllPostRequestBody
 from msgraph.generated.users.item.messages.item.forward.forward_post_request_body import ForwardPostRequestBody
 from msgraph.generated.models.message import Message
+from msgraph.generated.models.mail_folder import MailFolder
 from msgraph.generated.models.importance import Importance
 from msgraph.generated.models.item_body import ItemBody
 from msgraph.generated.models.body_type import BodyType
 from msgraph.generated.models.recipient import Recipient
 from msgraph.generated.models.email_address import EmailAddress
-from msgraph.generated.models.file_attachment import FileAttachment
-from ..exceptions import ValidationError, graph_exception_handler
+from msgraph.generated.users.item.mail_folders.item.messages.delta.delta_request_builder import DeltaRequestBuilder
+from msgraph.generated.users.item.mail_folders.item.messages.messages_request_builder import MessagesRequestBuilder
+from msgraph.generated.users.item.mail_folders.mail_folders_request_builder import MailFoldersRequestBuilder
+from msgraph.generated.users.item.mail_folders.item.child_folders.child_folders_request_builder import ChildFoldersRequestBuilder
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from ..exceptions import OutlookError, ValidationError, graph_exception_handler
+from ...utils.bulk import BulkExecutor
+from ...utils.pagination import PageIterator
+from ...utils.query import query_configuration
+from ...utils.delta import DeltaChanges, DeltaStore, MemoryDeltaStore
+from ...utils.tree import walk_tree
+from ...utils.transfer import FileUploadSource, transfer_client, upload_to_session
+from ...utils.transport import TransportConfig
+from .attachments import ATTACHMENT_CHUNK_SIZE, LARGE_ATTACHMENT_SIZE, AttachmentFile
+from .export import DEFAULT_EXPORT_CONCURRENCY, EXPORT_PAGE_SIZE, ExportReport, export_format, message_file_name, open_writer
+from .folder_tree import MailFolderTree
+from .mail_merge import MailMerge, MailMergeReport, MergeResult
+
+# properties fetched by message delta syncs unless others are selected
+DEFAULT_MESSAGE_FIELDS = [
+    "id", "subject", "from", "receivedDateTime", "createdDateTime", "lastModifiedDateTime",
+    "isRead", "hasAttachments", "conversationId", "parentFolderId", "bodyPreview",
+]
 
 class EmailsService:
     """Service for managing Email through Microsoft Graph API."""
-    def __init__(self, msgraph_client: GraphServiceClient) -> None:
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 folder_tree_ttl: Optional[float] = None,
+                 transport: Optional[TransportConfig] = None) -> None:
         self._msgraph_client = msgraph_client
         self.logger = logging.getLogger(__name__)
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")        
-        
-    async def _process_attachment(self, attachment: str, ) -> FileAttachment:
-        with open(attachment, "rb") as att:
-            attachment_bytes = att.read().decode("utf-8")
+        self._delta_store = delta_store or MemoryDeltaStore()
+        self.folder_tree_ttl = folder_tree_ttl
+        self._folder_trees: Dict[str, MailFolderTree] = {}
+        self._folder_tree_builds: Dict[str, asyncio.Future] = {}
+        self._transport = transport
 
-
-        file_attachment = FileAttachment(
-            odata_type = "#microsoft.graph.fileAttachment",
-            name = os.path.basename(attachment),
-            content_type = mimetypes.guess_type(attachment, strict =False)[0],
-            content_bytes = base64.urlsafe_b64decode(attachment_bytes),
-        )
-        return file_attachment
+    def _transfer_client(self):
+        """Client for attachment upload sessions, on the shared transfer pool when a transport is configured."""
+        if self._transport:
+            return self._transport.transfer_client()
+        return transfer_client()
     
 
-    async def list_root_mail_folders(self, **kwargs) -> Optional[List]:
+    def iter_root_mail_folders(self, **kwargs) -> PageIterator:
         user = kwargs.get("user") # required
 
         if not user:
             raise ValidationError("User is required")
+        configuration = query_configuration(kwargs.get("query"), MailFoldersRequestBuilder.MailFoldersRequestBuilderGetQueryParameters)
+        return PageIterator(self._msgraph_client.users.by_user_id(user).mail_folders, configuration, service_name = "Outlook")
 
-        try:
-            result = await self._msgraph_client.users.by_user_id(user).mail_folders.get()
-            if not result:
-                return
-            return result.value
-        except Exception as e:
-            graph_exception_handler(e, "Outlook")
-            return None
+
+    async def list_root_mail_folders(self, **kwargs) -> Optional[List]:
+        result = await self.iter_root_mail_folders(**kwargs).collect()
+        if not result:
+            return
+        return result
         
         
-    async def list_child_folders(self, **kwargs) -> Optional[List]:
+    def iter_child_folders(self, **kwargs) -> PageIterator:
         user = kwargs.get("user") # required
         folder_id = kwargs.get("folder_id") # required
 
@@ -64,21 +87,120 @@ class EmailsService:
             raise ValidationError("User is required")
         if not folder_id:
             raise ValidationError("Mail folder ID is required")
+        configuration = query_configuration(kwargs.get("query"), ChildFoldersRequestBuilder.ChildFoldersRequestBuilderGetQueryParameters)
+        return PageIterator(
+            self._msgraph_client.users.by_user_id(user).mail_folders.by_mail_folder_id(folder_id).child_folders,
+            configuration,
+            service_name = "Outlook",
+        )
+
+
+    async def list_child_folders(self, **kwargs) -> Optional[List]:
+        result = await self.iter_child_folders(**kwargs).collect()
+        if not result:
+            return
+        return result
+    
+        
+    async def get_folder_tree(self, **kwargs) -> MailFolderTree:
+        """
+        Return the folder hierarchy of a mailbox, listing it only when it isn't cached yet.
+
+        The tree is listed level by level with several folders expanded at once, folders
+        without child folders are never listed. Concurrent callers share one listing. With a
+        `folder_tree_ttl` the tree is also reused until that many seconds have passed or
+        `refresh` is set, without one (the default) every call lists the folders again.
+
+        #### Args:
+            user (str): User id or principal name of the mailbox
+            refresh (bool, optional): List the folders again even if the cached tree is fresh
+            max_concurrency (int, optional): Folders expanded at once (default 4)
+
+        #### Returns:
+            MailFolderTree: Folders indexed by id, name and path
+
+        #### Example:
+            >>> tree = await emails.get_folder_tree(user="support@domain.com")
+            >>> acme = tree.get_by_path("Inbox/Vendors/Acme")
+        """
+        user = kwargs.get("user") # required
+        refresh = kwargs.get("refresh", False)
+        max_concurrency = kwargs.get("max_concurrency", 4)
+
+        if not user:
+            raise ValidationError("User is required")
+
+        tree = self._folder_trees.get(user) if self.folder_tree_ttl is not None else None
+        expired = tree is not None and tree.age() >= self.folder_tree_ttl
+        if tree is not None and not refresh and not expired:
+            return tree
+        build = self._folder_tree_builds.get(user)
+        if build is None:
+            build = asyncio.ensure_future(self._build_folder_tree(user, max_concurrency))
+            self._folder_tree_builds[user] = build
+            build.add_done_callback(lambda _: self._folder_tree_builds.pop(user, None))
+        return await asyncio.shield(build)
+
+
+    async def _build_folder_tree(self, user: str, max_concurrency: int) -> MailFolderTree:
+        def list_children(folder_id: Optional[str]) -> PageIterator:
+            if folder_id is None:
+                return self.iter_root_mail_folders(user=user)
+            return self.iter_child_folders(user=user, folder_id=folder_id)
+
+        folders = walk_tree(
+            None,
+            list_children,
+            is_container=lambda folder: folder.child_folder_count != 0, # None (not returned) is expanded too
+            key=lambda folder: folder.id,
+            concurrency=max_concurrency,
+        )
+        tree = MailFolderTree([folder async for folder in folders])
+        if self.folder_tree_ttl is not None:
+            self._folder_trees[user] = tree
+        return tree
+
+
+    def invalidate_folder_tree(self, user: Optional[str] = None) -> None:
+        """Drops the cached folder tree of a mailbox, or of every mailbox."""
+        if user is None:
+            self._folder_trees.clear()
+        else:
+            self._folder_trees.pop(user, None)
+
+
+    async def get_folder_by_path(self, **kwargs) -> Optional[MailFolder]:
+        """
+        Return the mail folder at a path such as 'Inbox/Vendors/Acme', ignoring case.
+
+        #### Args:
+            user (str): User id or principal name of the mailbox
+            folder_path (str): Display names from a top level folder down, separated by '/'
+            refresh (bool, optional): List the folders again even if the cached tree is fresh
+
+        #### Returns:
+            Optional[MailFolder]: The folder, or None if there is no folder at that path
+        """
+        user = kwargs.get("user") # required
+        folder_path = kwargs.get("folder_path") # required
+
+        if not user:
+            raise ValidationError("User is required")
+        if not folder_path:
+            raise ValidationError("Folder path is required")
+
         try:
-            result = await self._msgraph_client.users.by_user_id(user).mail_folders.by_mail_folder_id(folder_id).child_folders.get()
-            if not result:
-                return
-            return result.value
+            tree = await self.get_folder_tree(user=user, refresh=kwargs.get("refresh", False))
+            return tree.get_by_path(folder_path)
         except Exception as e:
             graph_exception_handler(e, "Outlook")
             return None
-    
-        
+
+
     async def get_folder_by_name(self, **kwargs):
         user = kwargs.get("user") # required
         target_folder_name = kwargs.get("target_folder_name") # required
         parent_folder_id = kwargs.get("parent_folder_id")
-        returned_folder = None
 
         if not user:
             raise ValidationError("User is required")
@@ -86,45 +208,221 @@ class EmailsService:
             raise ValidationError("Folder name is required")
     
         try:
-            if parent_folder_id:
-                child_folders = await self.list_child_folders(user=user, folder_id=parent_folder_id)
-                if not child_folders:
-                    return None
-                for folder in child_folders:
-                    if folder.display_name == target_folder_name:
-                        returned_folder = folder                    
+            # a cached tree answers without a request, otherwise only the one level is listed
+            tree = await self.get_folder_tree(user=user) if self.folder_tree_ttl is not None else None
+            if tree is not None and (not parent_folder_id or parent_folder_id in tree):
+                child_folders = tree.children(parent_folder_id)
+            elif parent_folder_id:
+                # well-known names such as 'inbox' aren't ids in the tree, list that folder directly
+                child_folders = await self.list_child_folders(user=user, folder_id=parent_folder_id) or []
             else:
-                child_folders = await self.list_root_mail_folders(user=user)
-                if not child_folders:
-                    return None
-                for folder in child_folders:
-                    if folder.display_name == target_folder_name:
-                        returned_folder = folder
-
-            return returned_folder
+                child_folders = await self.list_root_mail_folders(user=user) or []
+            return next((folder for folder in child_folders if folder.display_name == target_folder_name), None)
         except Exception as e:
             graph_exception_handler(e, "Outlook")
             return None
     
             
         
-    async def get_messages_in_folder(self, **kwargs):
+    def iter_messages_in_folder(self, **kwargs) -> PageIterator:
         user = kwargs.get("user") # required
         parent_folder_id = kwargs.get("parent_folder_id") # required
+        select = kwargs.get("select")
+        page_size = kwargs.get("page_size")
 
         if not user:
             raise ValidationError("User is required")
         if not parent_folder_id:
             raise ValidationError("Mail folder ID is required")
+        if page_size is not None and page_size < 1:
+            raise ValidationError("Page size must be at least 1")
+
+        configuration = None
+        if select or page_size:
+            configuration = RequestConfiguration(
+                query_parameters = MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters(
+                    select = list(select) if select else None,
+                    top = page_size,
+                ),
+            )
+        # a query's options replace select and page_size
+        configuration = query_configuration(kwargs.get("query"), MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters, configuration)
+        return PageIterator(
+            self._msgraph_client.users.by_user_id(user).mail_folders.by_mail_folder_id(parent_folder_id).messages,
+            request_configuration = configuration,
+            service_name = "Outlook",
+        )
+
+
+    async def get_messages_in_folder(self, **kwargs):
+        result = await self.iter_messages_in_folder(**kwargs).collect()
+        if result:
+            return result
+
+
+    async def export_folder(self, **kwargs) -> ExportReport:
+        """
+        Back up every message of a mail folder as MIME, to .eml files or a tar or zip archive.
+
+        Pages through the folder and downloads each message's MIME content (`$value`)
+        concurrently, writing every message to the destination as soon as it arrives. At most
+        twice `max_concurrency` messages are held in memory whatever the size of the folder.
+        Saved messages are listed in a checkpoint file, exporting to the same destination again
+        skips them, so an interrupted backup resumes where it stopped. Messages that fail are
+        reported and retried by the next export.
+
+        #### Args:
+            user (str): User id or principal name of the mailbox
+            parent_folder_id (str): Mail folder id or well-known name, eg 'inbox'
+            destination (str | PathLike): Directory, or archive file
+            format (str, optional): 'eml' (a directory of .eml files), 'tar' or 'zip' (default from the destination's extension)
+            checkpoint (str | PathLike, optional): Checkpoint file (default the destination with '.checkpoint' appended)
+            max_concurrency (int, optional): Messages downloaded at once (default 8)
+            on_progress (Callable[[ExportReport], Any], optional): Called after every message with the running totals
+
+        #### Returns:
+            ExportReport: Messages exported, skipped as already exported and failed
+
+        #### Example:
+            >>> report = await emails.export_folder(user="ceo@domain.com", parent_folder_id="inbox",
+            ...                                     destination="/backups/ceo-inbox.tar")
+            >>> print(f"{report.exported} exported, {report.failed} failed")
+        """
+        user = kwargs.get("user") # required
+        parent_folder_id = kwargs.get("parent_folder_id") # required
+        destination = kwargs.get("destination") # required
+        max_concurrency = kwargs.get("max_concurrency", DEFAULT_EXPORT_CONCURRENCY)
+        on_progress = kwargs.get("on_progress")
+
+        if not destination:
+            raise ValidationError("Destination is required")
+        if max_concurrency < 1:
+            raise ValidationError("max_concurrency must be at least 1")
+        destination = os.path.normpath(os.fspath(destination))
+        file_format = export_format(destination, kwargs.get("format"))
+        messages = self.iter_messages_in_folder(user=user, parent_folder_id=parent_folder_id,
+                                                select=["id", "receivedDateTime"], page_size=EXPORT_PAGE_SIZE)
+
+        writer = await asyncio.to_thread(open_writer, file_format, destination,
+                                         os.fspath(kwargs.get("checkpoint") or f"{destination}.checkpoint"))
+        report = ExportReport()
+        pending: Dict[int, str] = {}
+
+        async def downloads():
+            index = 0
+            async for message in messages:
+                if message.id in writer.checkpoint:
+                    report.skipped += 1
+                    continue
+                pending[index] = message.id
+                yield partial(self._download_mime, user, message)
+                index += 1
+
         try:
-            result = await self._msgraph_client.users.by_user_id(user).mail_folders.by_mail_folder_id(parent_folder_id).messages.get()
-            if result:
-                return result.value
+            executor = BulkExecutor(concurrency=max_concurrency, window=max_concurrency * 2)
+            # closed on the way out so a failed save stops the downloads still in flight
+            async with contextlib.aclosing(executor.run(downloads())) as results:
+                async for result in results:
+                    message_id = pending.pop(result.index)
+                    if result.ok:
+                        message, content = result.value
+                        # one message at a time, so a single writer owns the destination
+                        await asyncio.to_thread(writer.save, message.id, message_file_name(message), content)
+                        report.exported += 1
+                        report.bytes += len(content)
+                    else:
+                        report.failures[message_id] = result.error
+                    if on_progress:
+                        on_progress(report)
+        finally:
+            await asyncio.to_thread(writer.close)
+        return report
+
+
+    async def _download_mime(self, user: str, message: Message):
+        try:
+            content = await self._msgraph_client.users.by_user_id(user).messages.by_message_id(message.id).content.get()
         except Exception as e:
             graph_exception_handler(e, "Outlook")
-            return None
+        if content is None:
+            raise OutlookError(f"Message {message.id} returned no MIME content") # failed, so a later export retries it
+        return message, content
+
+
+    def iter_message_changes(self, **kwargs) -> DeltaChanges:
+        """
+        Stream the messages added, updated or removed in a mail folder since the previous call.
+
+        Uses `messages/delta`, so a poll costs one request per page of changes however large the
+        folder is. The first call for a folder returns every message as added. The delta token is
+        saved once the changes have been fully consumed, stopping early replays them next time.
+
+        #### Args:
+            user (str): User id or principal name of the mailbox
+            parent_folder_id (str): Mail folder id or well-known name, eg 'inbox'
+            select (list[str], optional): Message properties to fetch (default DEFAULT_MESSAGE_FIELDS)
+            page_size (int, optional): Messages per page, sent as `Prefer: odata.maxpagesize`
+            store (DeltaStore, optional): Token store for this call, defaults to the service's store
+
+        #### Returns:
+            DeltaChanges: Async iterator of DeltaChange, `change.kind` is 'added', 'changed' or 'deleted'
+                and `change.item` the Message (only `id` is set on deleted messages)
+
+        #### Example:
+            >>> async for change in emails.iter_message_changes(user="support@domain.com", parent_folder_id="inbox"):
+            ...     if change.kind == "added":
+            ...         open_ticket(change.item)
+        """
+        user = kwargs.get("user") # required
+        parent_folder_id = kwargs.get("parent_folder_id") # required
+        select = list(kwargs.get("select") or DEFAULT_MESSAGE_FIELDS)
+        page_size = kwargs.get("page_size")
+
+        if not user:
+            raise ValidationError("User is required")
+        if not parent_folder_id:
+            raise ValidationError("Mail folder ID is required")
+        if page_size is not None and page_size < 1:
+            raise ValidationError("Page size must be at least 1")
+        if "createdDateTime" not in select:
+            select.append("createdDateTime") # tells new messages from updated ones
+
+        configuration = RequestConfiguration(
+            query_parameters = DeltaRequestBuilder.DeltaRequestBuilderGetQueryParameters(select = select),
+        )
+        if page_size:
+            configuration.headers.add("Prefer", f"odata.maxpagesize={page_size}")
+        return DeltaChanges(
+            self._msgraph_client.users.by_user_id(user).mail_folders.by_mail_folder_id(parent_folder_id).messages.delta,
+            kwargs.get("store") or self._delta_store,
+            f"messages:{user}:{parent_folder_id}",
+            service_name = "Outlook",
+            request_configuration = configuration,
+        )
         
     async def send(self, **kwargs):
+        """
+        Send a message, with any number of file attachments of any size.
+
+        Messages whose attachments add up to 3 MB or less are sent in one sendMail request, the
+        files read and base64 encoded in a worker thread. Larger ones are saved as a draft first,
+        attachments over 3 MB are streamed to an upload session in fragments, and the draft is
+        sent once every attachment is in place.
+
+        #### Args:
+            sender (str): Mailbox the message is sent from
+            to_recipients (List[str]): Recipient addresses
+            subject (str, optional): Subject line (default 'No Subject')
+            body (str, optional): Message body
+            cc_recipients, bcc_recipients, reply_to (List[str], optional): Further addresses
+            priority (Importance, optional): Importance of the message (default Normal)
+            body_format (BodyType, optional): Text or Html (default Text)
+            request_read_receipt (bool, optional): Ask for a read receipt (default False)
+            attachments (List[str | PathLike], optional): Files to attach
+
+        #### Returns:
+            bool: True once the message is sent
+        """
         subject = kwargs.get("subject", "No Subject")
         body = kwargs.get("body", "")
         sender = kwargs.get("sender") # required
@@ -167,41 +465,150 @@ class EmailsService:
             for recipient in reply_to:
                 reply_to_list.append(Recipient(email_address=EmailAddress(address=recipient)))
 
-        # build list of attachment objects
-        attachments_list = []
-        if attachments:
-            for attachment in attachments:
-                processed_attachment = await self._process_attachment(attachment)
-                attachments_list.append(processed_attachment)
-        
-        request_body = SendMailPostRequestBody(
-            message = Message(
-                subject = subject,
-                importance = priority,
-                body = ItemBody(
-                    content_type = body_format,
-                    content = body,
-                ),
-                from_ = Recipient(
-                    email_address = EmailAddress(
-                        address = sender,
-                    ),
+        # checked before anything is sent, the files are only read once the message goes out
+        attachment_files = [AttachmentFile.from_path(attachment) for attachment in attachments or []]
+
+        message = Message(
+            subject = subject,
+            importance = priority,
+            body = ItemBody(
+                content_type = body_format,
+                content = body,
+            ),
+            from_ = Recipient(
+                email_address = EmailAddress(
+                    address = sender,
                 ),
-                to_recipients = to_recipients_list if to_recipients else None,
-                cc_recipients = cc_recipients_list if cc_recipients else None,
-                bcc_recipients = bcc_recipients_list if bcc_recipients else None,
-                reply_to = reply_to_list if reply_to else None,
-                is_read_receipt_requested = request_read_receipt,
-            )
+            ),
+            to_recipients = to_recipients_list if to_recipients else None,
+            cc_recipients = cc_recipients_list if cc_recipients else None,
+            bcc_recipients = bcc_recipients_list if bcc_recipients else None,
+            reply_to = reply_to_list if reply_to else None,
+            is_read_receipt_requested = request_read_receipt,
         )
         try:
-            await self._msgraph_client.users.by_user_id(sender).send_mail.post(request_body)
+            if sum(attachment.size for attachment in attachment_files) <= LARGE_ATTACHMENT_SIZE:
+                if attachment_files:
+                    message.attachments = list(await asyncio.gather(
+                        *[attachment.to_file_attachment() for attachment in attachment_files]
+                    ))
+                request_body = SendMailPostRequestBody(message = message)
+                await self._msgraph_client.users.by_user_id(sender).send_mail.post(request_body)
+            else:
+                await self._send_through_draft(sender, message, attachment_files)
             return True
         except Exception as e:
             graph_exception_handler(e, "Outlook")
             return False
 
 
+    async def _send_through_draft(self, sender: str, message: Message, attachment_files: List[AttachmentFile]) -> None:
+        """Sends a message too large for sendMail, attaching its files to a draft one request at a time."""
+        messages = self._msgraph_client.users.by_user_id(sender).messages
+        draft = await messages.post(message)
+        if not draft or not draft.id:
+            raise OutlookError("Draft message was not created")
+        try:
+            for attachment in attachment_files:
+                if attachment.is_large:
+                    await self._upload_attachment(sender, draft.id, attachment)
+                else:
+                    await messages.by_message_id(draft.id).attachments.post(await attachment.to_file_attachment())
+            await messages.by_message_id(draft.id).send.post()
+        except Exception:
+            try:
+                await messages.by_message_id(draft.id).delete() # don't leave a half attached draft behind
+            except Exception as e:
+                self.logger.warning(f"Could not delete draft {draft.id}: {e}")
+            raise
+
+
+    async def _upload_attachment(self, sender: str, message_id: str, attachment: AttachmentFile) -> None:
+        """Streams a file to an attachment upload session, at most two fragments are in memory at once."""
+        attachments = self._msgraph_client.users.by_user_id(sender).messages.by_message_id(message_id).attachments
+        session = await attachments.create_upload_session.post(attachment.upload_session_body())
+        if not session or not session.upload_url:
+            raise OutlookError(f"Upload session for attachment {attachment.name} was not created")
+        content = FileUploadSource(attachment.path)
+        try:
+            async with self._transfer_client() as http:
+                await upload_to_session(http, session.upload_url, content, chunk_size=ATTACHMENT_CHUNK_SIZE)
+        finally:
+            await content.close()
+
+
+    async def iter_merge(self, **kwargs) -> AsyncIterator[MergeResult]:
+        """
+        Send a personalised copy of a template to every record of a stream, yielding a MergeResult per record.
+
+        Records are read lazily, so a stream of any length runs in constant memory. Shared
+        recipients and attachments are built once for the whole run. Each sending mailbox is paced
+        to Exchange Online's sending limits, pass several `senders` to spread the records over them.
+        A failed message is reported in its result, it doesn't stop the run.
+
+        #### Args:
+            template (MailTemplate): Subject, body, shared recipients and attachments, with `$field` placeholders
+            records (Iterable | AsyncIterable[Mapping]): One record per recipient, eg rows of a csv.DictReader
+            sender (str): Mailbox to send from, or
+            senders (List[str]): Mailboxes records are spread over in turn
+            address_field (str, optional): Record field holding the recipient address (default 'email')
+            name_field (str, optional): Record field holding the recipient display name (default 'name')
+            sender_field (str, optional): Record field naming the mailbox to send from, overriding `senders` (default 'sender')
+            messages_per_minute (float, optional): Send rate of each mailbox (default 30)
+            mailbox_concurrency (int, optional): Sends in flight per mailbox (default 4)
+            max_recipients (int, optional): Recipients each mailbox may reach in this run (default 10,000)
+            concurrency (int, optional): Sends in flight across all mailboxes (default 4 per sender)
+
+        #### Returns:
+            AsyncIterator[MergeResult]: One result per record, in completion order
+
+        #### Example:
+            >>> template = MailTemplate(subject="Invoice $number", body="Dear $name, ...", attachments=["terms.pdf"])
+            >>> async for result in emails.iter_merge(template=template, records=rows, senders=["billing@contoso.com"]):
+            ...     if not result.ok:
+            ...         print(f"{result.address}: {result.error}")
+        """
+        records = kwargs.pop("records", None)
+        if records is None:
+            raise ValidationError("Records are required")
+        merge = MailMerge(
+            self._msgraph_client,
+            kwargs.pop("template", None),
+            kwargs.pop("senders", None) or ([kwargs["sender"]] if kwargs.get("sender") else []),
+            **kwargs,
+        )
+        async for result in merge.run(records):
+            yield result
+
+
+    async def send_merge(self, **kwargs) -> MailMergeReport:
+        """
+        Run a mail merge to completion, see `iter_merge` for the arguments.
+
+        #### Args:
+            on_progress (Callable[[MailMergeReport], Any], optional): Called after every message with the running totals
+
+        #### Returns:
+            MailMergeReport: Messages sent, failures per recipient and throughput
+
+        #### Example:
+            >>> report = await emails.send_merge(
+            ...     template=template, records=rows, senders=["notices1@contoso.com", "notices2@contoso.com"],
+            ...     on_progress=lambda report: print(f"{report.sent} sent, {report.throughput:.1f}/s"),
+            ... )
+        """
+        on_progress = kwargs.pop("on_progress", None)
+        report = MailMergeReport()
+        try:
+            async for result in self.iter_merge(**kwargs):
+                report.add(result)
+                if on_progress:
+                    on_progress(report)
+        finally:
+            report.finished = monotonic()
+        return report
+
+
     async def reply(self, **kwargs):
         sender = kwargs.get("sender") # required
         message_id = kwargs.get("message_id") # required
@@ -0,0 +1,199 @@
+"""
+python_msgraph_toolkit.services.outlook.export
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Mail folder backups as MIME (.eml) files, in a directory or a tar or zip archive.
+
+Messages are written one at a time as their content arrives, by a single writer, and
+recorded in a checkpoint file once they are on disk. A later export to the same destination
+skips what the checkpoint lists, so an interrupted backup picks up where it stopped.
+
+https://learn.microsoft.com/en-us/graph/outlook-get-mime-message
+"""
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Union
+from msgraph.generated.models.message import Message
+from ..exceptions import OutlookError, ValidationError
+
+EXPORT_FORMATS = ("eml", "tar", "zip")
+DEFAULT_EXPORT_CONCURRENCY = 8
+EXPORT_PAGE_SIZE = 250
+
+
+def export_format(destination: str, export_format: Optional[str] = None) -> str:
+    """Returns the requested format, or the one implied by the destination's extension."""
+    if export_format is None:
+        extension = os.path.splitext(destination)[1].lower()
+        export_format = extension[1:] if extension in (".tar", ".zip") else "eml"
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError(f"Export format must be one of {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+
+def message_file_name(message: Message) -> str:
+    """'20250114T093000Z-3f2a9c0d5e6b7a81.eml', sorted by received time. Message ids aren't safe file names."""
+    digest = hashlib.sha1(message.id.encode()).hexdigest()[:16]
+    received = message.received_date_time
+    return f"{received.strftime('%Y%m%dT%H%M%SZ')}-{digest}.eml" if received else f"{digest}.eml"
+
+
+@dataclass
+class ExportReport:
+    """Totals of a folder export, passed to `on_progress` after every message."""
+    exported: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    failures: Dict[str, BaseException] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+
+class ExportCheckpoint:
+    """
+    Ids of the messages already exported, one JSON line per message appended as it is saved.
+
+    Archive exports also record where the archive ended after the message, a resumed export
+    cuts off anything written after the last checkpointed message.
+    """
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        self.exported: Set[str] = set()
+        self.offset: Optional[int] = None
+        try:
+            with open(self.path, encoding="utf-8") as checkpoint:
+                for line in checkpoint:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError: # a line cut short by a crash
+                        continue
+                    self.exported.add(entry["id"])
+                    self.offset = entry.get("offset", self.offset)
+        except FileNotFoundError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self.exported
+
+    def __len__(self) -> int:
+        return len(self.exported)
+
+    def add(self, message_id: str, offset: Optional[int] = None) -> None:
+        entry = {"id": message_id} if offset is None else {"id": message_id, "offset": offset}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.exported.add(message_id)
+        self.offset = offset
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ExportWriter(ABC):
+    """Saves messages to the destination and then to the checkpoint. Blocking, used from one thread at a time."""
+    def __init__(self, destination: str, checkpoint: ExportCheckpoint):
+        self.destination = destination
+        self.checkpoint = checkpoint
+
+    def save(self, message_id: str, name: str, content: bytes) -> None:
+        self.checkpoint.add(message_id, self._write(name, content))
+
+    @abstractmethod
+    def _write(self, name: str, content: bytes) -> Optional[int]:
+        """Writes one message, returns the archive offset to resume from when the format has one."""
+
+    def close(self) -> None:
+        self.checkpoint.close()
+
+
+class DirectoryWriter(ExportWriter):
+    """One .eml file per message, each written to a temporary name and then renamed into place."""
+    def __init__(self, destination: str, checkpoint: ExportCheckpoint):
+        super().__init__(destination, checkpoint)
+        os.makedirs(destination, exist_ok=True)
+
+    def _write(self, name: str, content: bytes) -> None:
+        path = os.path.join(self.destination, name)
+        with open(f"{path}.tmp", "wb") as eml:
+            eml.write(content)
+        os.replace(f"{path}.tmp", path)
+
+
+class TarWriter(ExportWriter):
+    """Appends to an uncompressed tar archive, resuming after the last checkpointed member."""
+    def __init__(self, destination: str, checkpoint: ExportCheckpoint):
+        super().__init__(destination, checkpoint)
+        offset = checkpoint.offset or 0
+        if os.path.exists(destination) and offset:
+            if os.path.getsize(destination) < offset:
+                raise OutlookError(f"{destination} is shorter than its checkpoint, it was replaced or truncated")
+            self._file = open(destination, "r+b")
+            self._file.truncate(offset) # drops a member cut short and the end of archive marker
+            self._file.seek(offset)
+        else:
+            self._file = open(destination, "wb")
+        self._tar = tarfile.open(fileobj=self._file, mode="w", format=tarfile.PAX_FORMAT)
+
+    def _write(self, name: str, content: bytes) -> int:
+        member = tarfile.TarInfo(name)
+        member.size = len(content)
+        member.mtime = int(time.time())
+        self._tar.addfile(member, io.BytesIO(content))
+        self._file.flush()
+        return self._tar.offset
+
+    def close(self) -> None:
+        try:
+            self._tar.close()
+            self._file.close()
+        finally:
+            super().close()
+
+
+class ZipWriter(ExportWriter):
+    """
+    Adds to a zip archive, only complete once closed.
+
+    A zip's index is written when it is closed, an export stopped by an exception or a
+    cancellation closes it and can be resumed. A killed process leaves an archive that
+    can't be appended to, tar exports don't have that limitation.
+    """
+    def __init__(self, destination: str, checkpoint: ExportCheckpoint):
+        super().__init__(destination, checkpoint)
+        try:
+            self._zip = zipfile.ZipFile(destination, "a", compression=zipfile.ZIP_DEFLATED)
+        except zipfile.BadZipFile:
+            raise OutlookError(f"{destination} was not closed properly and can't be resumed, "
+                               f"remove it and {checkpoint.path} to start over") from None
+
+    def _write(self, name: str, content: bytes) -> None:
+        entry = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        entry.compress_type = zipfile.ZIP_DEFLATED
+        self._zip.writestr(entry, content)
+
+    def close(self) -> None:
+        try:
+            self._zip.close()
+        finally:
+            super().close()
+
+
+def open_writer(export_format: str, destination: str, checkpoint_path: str) -> ExportWriter:
+    """Opens the checkpoint and the destination for writing. Blocking."""
+    checkpoint = ExportCheckpoint(checkpoint_path)
+    writer = {"eml": DirectoryWriter, "tar": TarWriter, "zip": ZipWriter}[export_format]
+    try:
+        return writer(destination, checkpoint)
+    except BaseException:
+        checkpoint.close()
+        raise
@@ -0,0 +1,72 @@
+from msgraph.generated.models.mail_folder import MailFolder
+from time import monotonic
+from typing import Dict, Iterable, List, Optional
+
+
+class MailFolderTree:
+    """
+    Snapshot of a mailbox's folder hierarchy, indexed by id, by name and by full path.
+
+    Names and paths are matched ignoring case, paths join display names with '/' from a top
+    level folder down, eg 'Inbox/Vendors/Acme'.
+
+    #### Args:
+        folders (Iterable[MailFolder]): Every folder of the mailbox, in any order
+    """
+    def __init__(self, folders: Iterable[MailFolder]) -> None:
+        self.built_at = monotonic()
+        self._by_id: Dict[str, MailFolder] = {folder.id: folder for folder in folders if folder.id}
+        self._children: Dict[Optional[str], List[MailFolder]] = {}
+        self._by_name: Dict[str, List[MailFolder]] = {}
+        self._by_path: Dict[str, MailFolder] = {}
+        self._paths: Dict[str, str] = {}
+        for folder in self._by_id.values():
+            # top level folders have the hidden root folder as parent, which is not listed
+            parent_id = folder.parent_folder_id if folder.parent_folder_id in self._by_id else None
+            self._children.setdefault(parent_id, []).append(folder)
+            if folder.display_name:
+                self._by_name.setdefault(folder.display_name.lower(), []).append(folder)
+        for folder in self._by_id.values():
+            path = self._build_path(folder)
+            if path:
+                self._paths[folder.id] = path
+                self._by_path.setdefault(path.lower(), folder)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, folder_id: str) -> bool:
+        return folder_id in self._by_id
+
+    def age(self) -> float:
+        """Seconds since the tree was listed."""
+        return monotonic() - self.built_at
+
+    def get(self, folder_id: str) -> Optional[MailFolder]:
+        return self._by_id.get(folder_id)
+
+    def get_by_path(self, folder_path: str) -> Optional[MailFolder]:
+        """Returns the folder at 'Inbox/Vendors/Acme', leading and trailing slashes are ignored."""
+        return self._by_path.get("/".join(segment for segment in folder_path.split("/") if segment).lower())
+
+    def find(self, name: str) -> List[MailFolder]:
+        """Returns every folder with this display name, wherever it is in the tree."""
+        return list(self._by_name.get(name.lower(), []))
+
+    def children(self, parent_folder_id: Optional[str] = None) -> List[MailFolder]:
+        """Returns the child folders of a folder, or the top level folders."""
+        return list(self._children.get(parent_folder_id, []))
+
+    def path_of(self, folder_id: str) -> Optional[str]:
+        return self._paths.get(folder_id)
+
+    def _build_path(self, folder: MailFolder) -> Optional[str]:
+        names = []
+        seen = set()
+        while folder is not None and folder.id not in seen:
+            if not folder.display_name:
+                return None
+            seen.add(folder.id)
+            names.append(folder.display_name)
+            folder = self._by_id.get(folder.parent_folder_id) if folder.parent_folder_id else None
+        return "/".join(reversed(names))
@@ -0,0 +1,259 @@
+"""
+python_msgraph_toolkit.services.outlook.mail_merge
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Personalised messages sent from one template to a stream of recipient records.
+
+What every message shares (cc, bcc and reply-to recipients, attachments) is built and
+encoded once per run, each record only adds its own subject, body and recipient. Exchange
+Online limits every mailbox to 30 messages a minute and 10,000 recipients a day, so sends
+are paced per sending mailbox, spreading the records over several mailboxes is what makes a
+run faster.
+
+https://learn.microsoft.com/en-us/office365/servicedescriptions/exchange-online-service-description/exchange-online-limits#sending-limits
+"""
+import asyncio
+from dataclasses import dataclass, field
+from functools import partial
+from string import Template
+from time import monotonic
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+from msgraph.graph_service_client import GraphServiceClient
+from msgraph.generated.models.body_type import BodyType
+from msgraph.generated.models.email_address import EmailAddress
+from msgraph.generated.models.file_attachment import FileAttachment
+from msgraph.generated.models.importance import Importance
+from msgraph.generated.models.item_body import ItemBody
+from msgraph.generated.models.message import Message
+from msgraph.generated.models.recipient import Recipient
+from msgraph.generated.users.item.send_mail.send_mail_post_request_body import SendMailPostRequestBody
+from ..exceptions import OutlookError, ValidationError, graph_exception_handler
+from ...utils.bulk import BulkExecutor
+from ...utils.throttling import TokenBucket
+from .attachments import LARGE_ATTACHMENT_SIZE, AttachmentFile
+
+DEFAULT_MESSAGES_PER_MINUTE = 30
+DEFAULT_MAILBOX_CONCURRENCY = 4 # Graph serves at most 4 concurrent requests per mailbox
+DEFAULT_MAX_RECIPIENTS = 10_000
+
+MergeRecords = Union[Iterable[Mapping[str, Any]], AsyncIterable[Mapping[str, Any]]]
+
+
+def _recipients(addresses: Iterable[str]) -> Optional[List[Recipient]]:
+    recipients = [Recipient(email_address=EmailAddress(address=address)) for address in addresses]
+    return recipients or None
+
+
+@dataclass
+class MailTemplate:
+    """
+    Message sent to every record of a mail merge.
+
+    `$field` and `${field}` placeholders in the subject and body are filled from each record,
+    a record missing a field fails on its own. `$$` is a literal dollar sign.
+
+    #### Args:
+        subject (str): Subject line, eg 'Your invoice $invoice_number'
+        body (str): Message body
+        body_format (BodyType): Text or Html (default Text)
+        priority (Importance): Importance of every message (default Normal)
+        cc_recipients, bcc_recipients, reply_to (List[str]): Addresses added to every message
+        attachments (List[str | PathLike]): Files attached to every message, 3 MB at most altogether
+        save_to_sent_items (bool): Keep a copy of every message in Sent Items (default True)
+    """
+    subject: str
+    body: str = ""
+    body_format: BodyType = BodyType.Text
+    priority: Importance = Importance.Normal
+    cc_recipients: List[str] = field(default_factory=list)
+    bcc_recipients: List[str] = field(default_factory=list)
+    reply_to: List[str] = field(default_factory=list)
+    attachments: List[str] = field(default_factory=list)
+    save_to_sent_items: bool = True
+
+    def __post_init__(self) -> None:
+        if not self.subject:
+            raise ValidationError("Template subject is required")
+        self._subject = Template(self.subject)
+        self._body = Template(self.body)
+
+    def render(self, record: Mapping[str, Any]) -> Tuple[str, str]:
+        """Returns the subject and body for a record."""
+        try:
+            return self._subject.substitute(record), self._body.substitute(record)
+        except KeyError as e:
+            raise ValidationError(f"Record has no value for placeholder {e}") from None
+        except ValueError as e:
+            raise ValidationError(f"Invalid template placeholder: {e}") from None
+
+
+@dataclass
+class MergeResult:
+    """Outcome of the message to one record, `index` is the position of the record in the input."""
+    index: int
+    address: Optional[str] = None
+    mailbox: Optional[str] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class MailMergeReport:
+    """Running totals of a mail merge, passed to `on_progress` after every message."""
+    sent: int = 0
+    failures: List[MergeResult] = field(default_factory=list)
+    started: float = field(default_factory=monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Messages sent per second."""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add(self, result: MergeResult) -> None:
+        if result.ok:
+            self.sent += 1
+        else:
+            self.failures.append(result)
+
+
+class _MailboxQuota:
+    """Send rate and recipient budget of one sending mailbox."""
+    def __init__(self, messages_per_minute: float, max_recipients: int):
+        rate = messages_per_minute / 60
+        self.bucket = TokenBucket(rate, min_rate=rate, max_rate=rate)
+        self.remaining = max_recipients
+
+
+class MailMerge:
+    """
+    Sends a MailTemplate to each record of a (possibly endless) stream, see `EmailsService.iter_merge`.
+
+    #### Args:
+        msgraph_client (GraphServiceClient): Authorised Graph client
+        template (MailTemplate): Message sent to every record
+        senders (List[str]): Mailboxes records are spread over in turn, unless a record names its own sender
+        address_field (str): Record field holding the recipient address (default 'email')
+        name_field (str): Record field holding the recipient display name (default 'name')
+        sender_field (str): Record field naming the mailbox to send from (default 'sender')
+        messages_per_minute (float): Send rate of each mailbox (default 30)
+        mailbox_concurrency (int): Sends in flight per mailbox (default 4)
+        max_recipients (int): Recipients each mailbox may reach in this run, cc and bcc included (default 10,000)
+        concurrency (int, optional): Sends in flight across all mailboxes (default mailbox_concurrency x senders)
+    """
+    def __init__(self, msgraph_client: GraphServiceClient, template: MailTemplate, senders: List[str], **kwargs):
+        if not template:
+            raise ValidationError("Template is required")
+        if not senders:
+            raise ValidationError("At least one sender is required")
+        self._msgraph_client = msgraph_client
+        self.template = template
+        self.senders = list(senders)
+        self.address_field = kwargs.get("address_field", "email")
+        self.name_field = kwargs.get("name_field", "name")
+        self.sender_field = kwargs.get("sender_field", "sender")
+        self.messages_per_minute = kwargs.get("messages_per_minute", DEFAULT_MESSAGES_PER_MINUTE)
+        self.mailbox_concurrency = kwargs.get("mailbox_concurrency", DEFAULT_MAILBOX_CONCURRENCY)
+        self.max_recipients = kwargs.get("max_recipients", DEFAULT_MAX_RECIPIENTS)
+        self.concurrency = kwargs.get("concurrency") or self.mailbox_concurrency * len(self.senders)
+        if self.messages_per_minute <= 0:
+            raise ValidationError("messages_per_minute must be positive")
+        if self.mailbox_concurrency < 1 or self.max_recipients < 1:
+            raise ValidationError("mailbox_concurrency and max_recipients must be at least 1")
+
+        # shared by every message
+        self._cc = _recipients(template.cc_recipients)
+        self._bcc = _recipients(template.bcc_recipients)
+        self._reply_to = _recipients(template.reply_to)
+        self._extra_recipients = len(template.cc_recipients) + len(template.bcc_recipients)
+        self._attachment_files = [AttachmentFile.from_path(attachment) for attachment in template.attachments]
+        if sum(attachment.size for attachment in self._attachment_files) > LARGE_ATTACHMENT_SIZE:
+            raise ValidationError("Mail merge attachments must add up to 3 MB or less, link to larger files instead")
+        self._attachments: Optional[List[FileAttachment]] = None
+        self._quotas: Dict[str, _MailboxQuota] = {}
+
+    async def run(self, records: MergeRecords) -> AsyncIterator[MergeResult]:
+        """Yields a MergeResult per record as its message is sent, in completion order."""
+        if self._attachments is None and self._attachment_files:
+            # encoded once, every message references the same payloads
+            self._attachments = list(await asyncio.gather(
+                *[attachment.to_file_attachment() for attachment in self._attachment_files]
+            ))
+        targets: Dict[int, Tuple[str, Optional[str]]] = {}
+
+        async def operations():
+            index = 0
+            async for record in self._records(records):
+                mailbox = record.get(self.sender_field) or self.senders[index % len(self.senders)]
+                targets[index] = (mailbox, record.get(self.address_field))
+                yield (mailbox, partial(self._send, mailbox, record))
+                index += 1
+
+        executor = BulkExecutor(concurrency=self.concurrency, resource_limit=self.mailbox_concurrency)
+        async for result in executor.run(operations()):
+            mailbox, address = targets.pop(result.index)
+            yield MergeResult(index=result.index, address=address, mailbox=mailbox, error=result.error)
+
+    @staticmethod
+    async def _records(records: MergeRecords) -> AsyncIterator[Mapping[str, Any]]:
+        if hasattr(records, "__aiter__"):
+            async for record in records: # type: ignore[union-attr]
+                yield record
+        else:
+            for record in records: # type: ignore[union-attr]
+                yield record
+
+    def _quota(self, mailbox: str) -> _MailboxQuota:
+        quota = self._quotas.get(mailbox.lower())
+        if quota is None:
+            quota = self._quotas[mailbox.lower()] = _MailboxQuota(self.messages_per_minute, self.max_recipients)
+        return quota
+
+    async def _send(self, mailbox: str, record: Mapping[str, Any]) -> None:
+        address = record.get(self.address_field)
+        if not address:
+            raise ValidationError(f"Record has no '{self.address_field}'")
+        subject, body = self.template.render(record)
+        quota = self._quota(mailbox)
+        recipients = 1 + self._extra_recipients
+        if quota.remaining < recipients:
+            raise OutlookError(f"Mailbox {mailbox} has reached its recipient limit for this run")
+        quota.remaining -= recipients # reserved before waiting so concurrent sends can't overshoot
+        try:
+            await quota.bucket.acquire()
+            await self._post(mailbox, address, record, subject, body)
+        except BaseException:
+            quota.remaining += recipients # a failed or cancelled send doesn't count against the mailbox
+            raise
+
+    async def _post(self, mailbox: str, address: str, record: Mapping[str, Any], subject: str, body: str) -> None:
+        message = Message(
+            subject=subject,
+            importance=self.template.priority,
+            body=ItemBody(content_type=self.template.body_format, content=body),
+            to_recipients=[Recipient(email_address=EmailAddress(address=address, name=record.get(self.name_field)))],
+            cc_recipients=self._cc,
+            bcc_recipients=self._bcc,
+            reply_to=self._reply_to,
+            attachments=self._attachments,
+        )
+        request_body = SendMailPostRequestBody(message=message, save_to_sent_items=self.template.save_to_sent_items)
+        try:
+            await self._msgraph_client.users.by_user_id(mailbox).send_mail.post(request_body)
+        except Exception as e:
+            graph_exception_handler(e, "Outlook")
@@ -1,16 +1,24 @@
+from typing import Optional
 from msgraph import GraphServiceClient
 from msgraph.generated.users.item.send_mail.send_mail_post_request_body import SendMailPostRequestBody
 from .emails import EmailsService
 from .calendar import CalendarService
 from ..exceptions import ValidationError
+from ...utils.delta import DeltaMirror, DeltaStore
+from ...utils.etag import ETagStore
+from ...utils.transport import TransportConfig
 
 
 class OutlookService():
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 mirror: Optional[DeltaMirror] = None, etag_store: Optional[ETagStore] = None,
+                 transport: Optional[TransportConfig] = None, folder_tree_ttl: Optional[float] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
         
         # Initialize sub-services
-        self.emails = EmailsService(self._msgraph_client)
-        self.calendar = CalendarService(self._msgraph_client)
+        self.emails = EmailsService(self._msgraph_client, delta_store=delta_store, folder_tree_ttl=folder_tree_ttl,
+                                    transport=transport)
+        self.calendar = CalendarService(self._msgraph_client, delta_store=delta_store, mirror=mirror,
+                                        etag_store=etag_store)
@@ -1,18 +1,30 @@
+from typing import Optional
 from msgraph import GraphServiceClient
+from msgraph.generated.drives.item.items.item.delta.delta_request_builder import DeltaRequestBuilder
+from msgraph.generated.drives.item.root.root_request_builder import RootRequestBuilder
+from kiota_abstractions.base_request_configuration import RequestConfiguration
 from ..exceptions import ValidationError, graph_exception_handler
+from ...utils.delta import DeltaResult, DeltaStore, MemoryDeltaStore, sync_delta
+from ...utils.cache import ResponseCache, cached
+from ...utils.query import query_configuration
 
 
 class DriveService:
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 cache: Optional[ResponseCache] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied") 
+        self._delta_store = delta_store or MemoryDeltaStore()
+        self._cache = cache
 
+    @cached(ttl = 3600)
     async def get_drive_root_folder(self, **kwargs):
         """
         Retrieve the root folder of a specific drive.
         #### Args:
             drive_id (str): The unique identifier for the SharePoint drive
+            query (QueryOptions, optional): $select and $expand options
         #### Returns:
             DriveItem: The root folder of the specified drive, or None if not found
         #### Usage example:
@@ -26,10 +38,49 @@ class DriveService:
         
         if not drive_id:
             raise ValidationError("Drive ID is required")
+        configuration = query_configuration(kwargs.get("query"), RootRequestBuilder.RootRequestBuilderGetQueryParameters)
         try:
-            return await self._msgraph_client.drives.by_drive_id(drive_id).root.get()
+            return await self._msgraph_client.drives.by_drive_id(drive_id).root.get(request_configuration = configuration)
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
             return None # This line will never be reached due to exception being raised, but is here to satisfy return type
 
 
+    async def sync_drive(self, **kwargs) -> DeltaResult:
+        """
+        Return the items added, changed and deleted in a drive since the previous sync.
+
+        Uses the `drive/root/delta` query. The first sync of a drive enumerates every item and
+        reports it as added; its delta link is saved to the delta store so later syncs only
+        transfer what changed. An expired delta link falls back to a full sync.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            store (DeltaStore, optional): Cursor store for this call, defaults to the service's store
+                (a JsonFileDeltaStore or SqliteDeltaStore keeps cursors across runs)
+            select (list[str], optional): DriveItem properties to return on a full sync, eg ["id", "name", "file"]
+
+        #### Returns:
+            DeltaResult: `added`, `changed` and `deleted` DriveItems, `full_sync` is True when every item was returned
+
+        #### Usage example:
+            >>> store = SqliteDeltaStore("sync-state.db")
+            >>> changes = await drive_service.sync_drive(drive_id="my_drive_id", store=store)
+            >>> for item in changes.deleted:
+            ...     remove_local_copy(item.id)
+        """
+        drive_id = kwargs.get("drive_id", "")
+        store = kwargs.get("store", None) or self._delta_store
+        select = kwargs.get("select", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+
+        request_configuration = None
+        if select:
+            request_configuration = RequestConfiguration(
+                query_parameters = DeltaRequestBuilder.DeltaRequestBuilderGetQueryParameters(select = select)
+            )
+        request_builder = self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id("root").delta
+        return await sync_delta(request_builder, store, f"drive:{drive_id}", service_name = "SharePoint",
+                                request_configuration = request_configuration)
@@ -5,21 +5,56 @@ from msgraph.generated.models.item_reference import ItemReference
 from msgraph.generated.models.drive_item import DriveItem
 from msgraph.generated.drives.item.items.items_request_builder import ItemsRequestBuilder 
 from msgraph.generated.drives.item.items.item.children.children_request_builder import ChildrenRequestBuilder
+from msgraph.generated.drives.item.items.item.drive_item_item_request_builder import DriveItemItemRequestBuilder
 from msgraph.generated.drives.item.search_with_q.search_with_q_request_builder import SearchWithQRequestBuilder
+from msgraph.generated.drives.item.items.item.create_upload_session.create_upload_session_post_request_body import CreateUploadSessionPostRequestBody
+from msgraph.generated.models.drive_item_uploadable_properties import DriveItemUploadableProperties
+from msgraph.generated.models.upload_session import UploadSession
 from kiota_abstractions.base_request_configuration import RequestConfiguration
+from typing import AsyncIterator, Dict, Iterable, Tuple
+from urllib.parse import quote
+import asyncio
 import logging
-from ..exceptions import ValidationError, graph_exception_handler
+from ..exceptions import SharePointError, ValidationError, graph_exception_handler
+from ...utils.pagination import PageIterator
+from ...utils.serialization import parse_model
+from ...utils.tree import walk_tree
+from ...utils.cache import ResponseCache, cached
+from ...utils.etag import ETagStore, conditional_get
+from ...utils.query import Filter, query_configuration
+from .path_cache import DrivePathCache, split_path
+from ...utils.transport import TransportConfig
+from ...utils.transfer import (
+    DEFAULT_DOWNLOAD_CONCURRENCY,
+    DEFAULT_SEGMENT_SIZE,
+    DEFAULT_UPLOAD_CHUNK_SIZE,
+    RangeDownloader,
+    download_to_file,
+    stream_segments,
+    transfer_client,
+    upload_source,
+    upload_session_status,
+    upload_to_session,
+    validate_chunk_size,
+)
 
 logger = logging.getLogger(__name__)
 
 class FileService:
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, cache: Optional[ResponseCache] = None,
+                 etag_store: Optional[ETagStore] = None, path_cache: Optional[DrivePathCache] = None,
+                 transport: Optional[TransportConfig] = None):
         self._msgraph_client = msgraph_client
+        self._cache = cache
+        self._etag_store = etag_store
+        self._path_cache = path_cache or DrivePathCache()
+        self._transport = transport
+        self._resolving: Dict[Tuple[str, Tuple[str, ...]], asyncio.Future] = {}
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
         
     def _exceed_drive_query(self) -> RequestConfiguration:
-        """For exceeding the return limit of the graph api without using pagenation"""
+        """Largest page size the drive endpoints accept, keeps the number of pages to follow low"""
         drive_query_size = 1000
         query_params = ItemsRequestBuilder.ItemsRequestBuilderGetQueryParameters(
 		    top = drive_query_size          
@@ -30,6 +65,45 @@ class FileService:
         return request_configuration
         
 
+    def iter_folder_contents(self, **kwargs) -> PageIterator:
+        """
+        Stream all items (files and folders) within a specified folder, page by page.
+
+        Follows `@odata.nextLink` so folders with more than 1,000 items are returned in full.
+        The next page is fetched while the current one is being processed.
+
+        #### Args:
+            drive_id (str): SharePoint drive identifier
+            parent_folder_id (str): Parent folder identifier ('root' for root directory)
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options, top replaces the default page size of 1,000
+
+        #### Returns:
+            PageIterator: Async iterator of DriveItem, use `.pages()` to iterate page by page
+
+        #### Raises:
+            ValidationError: If drive_id or parent_folder_id is missing/invalid
+
+        #### Example:
+            >>> async for item in file_service.iter_folder_contents(
+            ...     drive_id="drive123",
+            ...     parent_folder_id="folder456"
+            ... ):
+            ...     print(item.name)
+        """
+        drive_id = kwargs.get("drive_id", None)
+        parent_folder_id = kwargs.get("parent_folder_id", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required, Enter the correct drive ID and try again")
+        if not parent_folder_id:
+            raise ValidationError("Parent folder ID is required, Enter the correct parent folder & try again")
+
+        request_builder = self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(parent_folder_id).children
+        configuration = query_configuration(kwargs.get("query"), ChildrenRequestBuilder.ChildrenRequestBuilderGetQueryParameters,
+                                            self._exceed_drive_query())
+        return PageIterator(request_builder, configuration, service_name = "SharePoint")
+
+
     async def list_folder_contents(self, **kwargs) -> list[DriveItem]:
         """
         Retrieve all items (files and folders) within a specified folder.
@@ -37,9 +111,10 @@ class FileService:
         #### Args:
             drive_id (str): SharePoint drive identifier
             parent_folder_id (str): Parent folder identifier ('root' for root directory)
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options, top replaces the default page size of 1,000
             
         #### Returns:
-            List[DriveItem]: List of folder contents, empty list if none found
+            List[DriveItem]: List of folder contents across all pages, empty list if none found
             
         #### Raises:
             ValidationError: If drive_id or parent_folder_id is missing/invalid
@@ -54,22 +129,62 @@ class FileService:
             >>> for item in contents:
             ...     print(f"{item.name} ({item.size} bytes)")
         """
+        return await self.iter_folder_contents(**kwargs).collect()
+
+
+    def walk_drive(self, **kwargs) -> AsyncIterator[DriveItem]:
+        """
+        Stream every file and folder below a folder, level by level.
+
+        Several folders are listed concurrently. Only the ids of folders waiting to be listed
+        and a bounded buffer of items are held in memory, so drives with millions of items can
+        be walked; a slow consumer pauses the crawl.
+
+        #### Args:
+            drive_id (str): SharePoint drive identifier
+            folder_id (str, optional): Folder to start from (default 'root')
+            max_depth (int, optional): Levels to descend, 1 yields only the folder's own children (default unlimited)
+            max_concurrency (int, optional): Folders listed at once (default 4)
+            prune (Callable[[DriveItem], bool], optional): Folders it returns True for are skipped along with
+                their whole subtree, without being listed
+            filter (Callable[[DriveItem], bool], optional): Only items it returns True for are yielded,
+                the walk still descends into filtered out folders
+
+        #### Returns:
+            AsyncIterator[DriveItem]: Items in breadth-first order
+
+        #### Raises:
+            ValidationError: If drive_id is missing or the limits are invalid
+
+        #### Example:
+            >>> async for item in file_service.walk_drive(
+            ...     drive_id="drive123",
+            ...     prune=lambda folder: folder.name == "Archive",
+            ...     filter=lambda item: item.file is not None,
+            ... ):
+            ...     print(item.parent_reference.path, item.name)
+        """
         drive_id = kwargs.get("drive_id", None)
-        parent_folder_id = kwargs.get("parent_folder_id", None)
+        folder_id = kwargs.get("folder_id", "root")
 
         if not drive_id:
-            raise ValidationError("Drive ID is required, Enter the correct drive ID and try again")
-        if not parent_folder_id:
-            raise ValidationError("Parent folder ID is required, Enter the correct parent folder & try again")
-        
-        try:
-            response =  await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(parent_folder_id).children.get(request_configuration = self._exceed_drive_query()) 
-            return response.value if response and response.value else []             
-        except Exception as e:
-            graph_exception_handler(e, "SharePoint")
-            return [] # This line will never be reached due to exception being raised, but is here to satisfy return type
+            raise ValidationError("Drive ID is required")
+        if not folder_id:
+            raise ValidationError("Folder ID is required")
+
+        return walk_tree(
+            folder_id,
+            lambda parent_folder_id: self.iter_folder_contents(drive_id=drive_id, parent_folder_id=parent_folder_id),
+            is_container=lambda item: item.folder is not None,
+            key=lambda item: item.id,
+            max_depth=kwargs.get("max_depth", None),
+            concurrency=kwargs.get("max_concurrency", 4),
+            prune=kwargs.get("prune", None),
+            include=kwargs.get("filter", None),
+        )
 
 
+    @cached()
     async def get_item_by_name(self, **kwargs) -> Optional[DriveItem]:
         """
         Retrieve a specific file or folder by exact name within a parent folder.
@@ -78,6 +193,7 @@ class FileService:
             drive_id (str): SharePoint drive identifier
             parent_folder_id (str): Parent folder identifier to search within
             item_name (str): Exact name of the file or folder to find
+            query (QueryOptions, optional): $select and $expand options, a $filter is combined with the name match
 
         #### Returns:
             DriveItem | None: First matching item found, None if not found
@@ -107,12 +223,19 @@ class FileService:
         if not item_name:
             raise ValidationError("Item name is required")
             
+        query = kwargs.get("query", None)
         query_params = ChildrenRequestBuilder.ChildrenRequestBuilderGetQueryParameters(filter=f"name eq '{item_name}'")
         request_config = RequestConfiguration(query_parameters=query_params)                
+        request_config = query_configuration(query, ChildrenRequestBuilder.ChildrenRequestBuilderGetQueryParameters, request_config)
+        if query and query.filter:
+            query_params.filter = str(Filter(f"name eq '{item_name}'") & query.filter)
         try:
             response = await self._msgraph_client.drives.by_drive_id(drive_id)\
                 .items.by_drive_item_id(parent_folder_id).children.get(request_config) 
             if response and response.value and len(response.value) > 0:          
+                parent_path = () if parent_folder_id == "root" else self._path_cache.path_of(drive_id, parent_folder_id)
+                if parent_path is not None:
+                    self._path_cache.put(drive_id, parent_path + (item_name,), response.value[0].id)
                 return response.value[0]
             return None            
         except Exception as e:
@@ -120,6 +243,7 @@ class FileService:
             return None
 
 
+    @cached()
     async def get_item_by_path(self, **kwargs) -> Optional[DriveItem]:
         """
         Retrieve a file or folder by its full path within the drive.
@@ -130,6 +254,7 @@ class FileService:
         #### Args:
             drive_id (str): The unique identifier for the SharePoint drive
             item_path (str): The full path to the item (e.g., '/Documents/Projects/file.pdf')
+            query (QueryOptions, optional): $select and $expand options
 
         #### Returns:
             Optional[DriveItem]: Item object with full metadata, or None if not found
@@ -146,27 +271,37 @@ class FileService:
             raise ValidationError("Drive ID is required")
         if not item_path:
             raise ValidationError("Item path is required")
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{item_path}"
+        query = kwargs.get("query", None)
+        if query:
+            # kiota sends raw urls as is, the options go in the url
+            query_configuration(query, DriveItemItemRequestBuilder.DriveItemItemRequestBuilderGetQueryParameters)
+            url = f"{url}?{query.url_query()}"
         try:           
             # Direct path access
             item = await self._msgraph_client.drives.by_drive_id(drive_id).root \
-            .with_url(f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{item_path}") \
+            .with_url(url) \
             .get()
-            
+            if item:
+                self._remember_path(drive_id, split_path(item_path), item)
             return item            
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
             return None
         
+    @cached()
     async def get_item_by_id(self, **kwargs) -> Optional[DriveItem]:
         """
         Retrieve a specific file or folder by its unique identifier.
         
         Direct access to an item using its Microsoft Graph item ID. Most efficient method
-        when you have the item's unique identifier.
+        when you have the item's unique identifier. With an ETag store the request is
+        conditional and an unchanged item is served from the store.
 
         #### Args:
             drive_id (str): The unique identifier for the SharePoint drive
             item_id (str): The unique identifier for the specific item
+            query (QueryOptions, optional): $select and $expand options
 
         #### Returns:
             Optional[DriveItem]: Item object with complete metadata, or None if error occurs
@@ -183,11 +318,133 @@ class FileService:
             raise ValidationError("Drive ID is required")
         if not item_id:
             raise ValidationError("Item ID is required")
+        query = kwargs.get("query", None)
+        configuration = query_configuration(query, DriveItemItemRequestBuilder.DriveItemItemRequestBuilderGetQueryParameters)
+        try:
+            return await conditional_get(
+                self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(item_id),
+                self._etag_store,
+                f"drive:{drive_id}:item:{item_id}" + (f"?{query}" if query else ""), # selections are stored apart
+                configuration,
+            )
+        except Exception as e:
+            graph_exception_handler(e, "SharePoint")
+            return None
+
+
+    async def resolve_path(self, **kwargs) -> Optional[str]:
+        """
+        Resolve a path within the drive to an item id, through the path cache.
+
+        Only the part of the path below the deepest cached folder is looked up, a fully cached
+        path costs no request at all.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            item_path (str): The path to the item (e.g., '/Documents/Projects/file.pdf')
+
+        #### Returns:
+            Optional[str]: The item id, or None if nothing exists at the path
+
+        #### Example:
+        >>> folder_id = await file_service.resolve_path(drive_id=drive_id, item_path="/Documents/Projects")
+        """
+        drive_id = kwargs.get("drive_id", None)
+        item_path = kwargs.get("item_path", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if not item_path or not split_path(item_path):
+            raise ValidationError("Item path is required")
+        return await self._resolve(drive_id, split_path(item_path))
+
+
+    async def resolve_paths(self, **kwargs) -> Dict[str, Optional[str]]:
+        """
+        Resolve many paths within the drive to item ids at once.
+
+        Cached paths are answered locally. The others are looked up in parallel, each from its
+        deepest cached folder, and a path requested several times is looked up once.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            item_paths (Iterable[str]): Paths to resolve
+            max_concurrency (int, optional): Lookups in flight at once (default 8)
+
+        #### Returns:
+            Dict[str, Optional[str]]: Item id per requested path, None where nothing exists
+
+        #### Example:
+        >>> ids = await file_service.resolve_paths(drive_id=drive_id, item_paths=["/Reports/2024", "/Reports/2025"])
+        """
+        drive_id = kwargs.get("drive_id", None)
+        item_paths: Iterable[str] = kwargs.get("item_paths", None)
+        max_concurrency = kwargs.get("max_concurrency", 8)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if item_paths is None:
+            raise ValidationError("Item paths are required")
+        if max_concurrency < 1:
+            raise ValidationError("Concurrency must be at least 1")
+        item_paths = list(item_paths)
+        if not all(item_path and split_path(item_path) for item_path in item_paths):
+            raise ValidationError("Item paths must not be empty")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(segments: Tuple[str, ...]) -> Optional[str]:
+            async with semaphore:
+                return await self._resolve(drive_id, segments)
+
+        def folded(item_path: str) -> Tuple[str, ...]:
+            return tuple(segment.lower() for segment in split_path(item_path))
+
+        unique: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        for item_path in item_paths:
+            unique.setdefault(folded(item_path), split_path(item_path))
+        results = dict(zip(unique, await asyncio.gather(*[resolve(segments) for segments in unique.values()])))
+        return {item_path: results[folded(item_path)] for item_path in item_paths}
+
+
+    async def _resolve(self, drive_id: str, segments: Tuple[str, ...]) -> Optional[str]:
+        depth, base_id = self._path_cache.longest_prefix(drive_id, segments)
+        if depth == len(segments):
+            return base_id
+        key = (drive_id, tuple(segment.lower() for segment in segments))
+        task = self._resolving.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._lookup_path(drive_id, segments, depth, base_id))
+            self._resolving[key] = task
+            task.add_done_callback(lambda _: self._resolving.pop(key, None))
+        return await asyncio.shield(task)
+
+
+    async def _lookup_path(self, drive_id: str, segments: Tuple[str, ...], depth: int, base_id: Optional[str]) -> Optional[str]:
+        """Asks Graph for the segments below the deepest cached folder, relative to that folder."""
+        base = f"items/{base_id}" if base_id else "root"
+        relative = quote("/".join(segments[depth:]))
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/{base}:/{relative}?$select=id,name,parentReference"
         try:
-            return await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(item_id).get()
+            item = await self._msgraph_client.drives.by_drive_id(drive_id).items \
+                .by_drive_item_id(base_id or "root").with_url(url).get()
         except Exception as e:
+            if getattr(e, "response_status_code", None) == 404:
+                return None
             graph_exception_handler(e, "SharePoint")
             return None
+        if not item:
+            return None
+        self._remember_path(drive_id, segments, item)
+        return item.id
+
+
+    def _remember_path(self, drive_id: str, segments: Tuple[str, ...], item: DriveItem) -> None:
+        """Caches the id of an item and, from its parent reference, the id of its folder."""
+        self._path_cache.put(drive_id, segments, item.id)
+        parent = item.parent_reference
+        if parent and parent.id and len(segments) > 1:
+            self._path_cache.put(drive_id, segments[:-1], parent.id)
 
 
     async def create_folder(self, **kwargs) -> Optional[DriveItem]:
@@ -229,6 +486,12 @@ class FileService:
         )
         try:
             folder = await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(parent_folder_id).children.post(request_body)
+            await self._invalidate_cache()
+            parent_path = () if parent_folder_id == "root" else self._path_cache.path_of(drive_id, parent_folder_id)
+            if parent_path is not None:
+                self._path_cache.invalidate_path(drive_id, parent_path + (new_folder_name,))
+                if folder:
+                    self._path_cache.put(drive_id, parent_path + (new_folder_name,), folder.id)
             return folder
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
@@ -264,6 +527,8 @@ class FileService:
             raise ValidationError("Item ID is required")
         try:
             await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(item_id).delete()
+            await self._invalidate_cache()
+            self._path_cache.invalidate_item(drive_id, item_id)
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
 
@@ -307,11 +572,300 @@ class FileService:
             raise ValidationError("New location ID is required")
         try:
             await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(item_id).patch(request_body)
+            await self._invalidate_cache()
+            self._path_cache.invalidate_item(drive_id, item_id)
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
 
-        
 
+    async def create_upload_session(self, **kwargs) -> Optional[UploadSession]:
+        """
+        Create a resumable upload session for a file in a parent folder.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            parent_folder_id (str): The unique identifier for the destination folder ('root' for root directory)
+            file_name (str): Name of the file to create or replace
+            conflict_behavior (str, optional): 'replace', 'fail' or 'rename' (default 'replace')
+
+        #### Returns:
+            Optional[UploadSession]: Session with the pre-authenticated `upload_url` to send content to
+        """
+        drive_id = kwargs.get("drive_id", None)
+        parent_folder_id = kwargs.get("parent_folder_id", None)
+        file_name = kwargs.get("file_name", None)
+        conflict_behavior = kwargs.get("conflict_behavior", "replace")
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if not parent_folder_id:
+            raise ValidationError("Parent folder ID is required")
+        if not file_name:
+            raise ValidationError("File name is required")
+        if conflict_behavior not in ("replace", "fail", "rename"):
+            raise ValidationError("Conflict behavior must be 'replace', 'fail' or 'rename'")
+
+        request_body = CreateUploadSessionPostRequestBody(
+            item = DriveItemUploadableProperties(
+                additional_data = {
+                        "@microsoft.graph.conflictBehavior" : conflict_behavior,
+                }
+            )
+        )
+        try:
+            return await self._msgraph_client.drives.by_drive_id(drive_id)\
+                .items.by_drive_item_id(f"{parent_folder_id}:/{file_name}:").create_upload_session.post(request_body)
+        except Exception as e:
+            graph_exception_handler(e, "SharePoint")
+            return None
+
+
+    async def upload_file(self, **kwargs) -> Optional[DriveItem]:
+        """
+        Upload a file of any size through a resumable upload session.
+
+        Content is read in chunks from a file path, a memory-mapped file/buffer or an async byte
+        stream, the whole file is never held in memory. The next chunk is read while the current
+        one is uploading. Fragments the service rejects are resent from the session's
+        `nextExpectedRanges`, and `upload_url` can be kept to finish the upload with `resume_upload`
+        after the process is interrupted.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            parent_folder_id (str): The unique identifier for the destination folder ('root' for root directory)
+            source (str | PathLike | mmap | bytes | AsyncIterable[bytes]): Content to upload
+            file_name (str, optional): Name of the uploaded file, defaults to the source file's name
+            size (int, optional): Total size in bytes, required for async byte streams
+            chunk_size (int, optional): Bytes per fragment, a multiple of 320 KiB (default 10 MiB)
+            conflict_behavior (str, optional): 'replace', 'fail' or 'rename' (default 'replace')
+            on_session (Callable[[UploadSession], Any], optional): Called once the session exists, eg to persist `upload_url`
+            on_progress (Callable[[int, int], Any], optional): Called with (bytes uploaded, total bytes)
+
+        #### Returns:
+            Optional[DriveItem]: The uploaded item
+
+        #### Example:
+        >>> item = await file_service.upload_file(
+        ...     drive_id="drive123",
+        ...     parent_folder_id="root",
+        ...     source="/backups/site.zip",
+        ...     on_progress=lambda sent, total: print(f"{sent / total:.0%}"),
+        ... )
+        """
+        drive_id = kwargs.get("drive_id", None)
+        parent_folder_id = kwargs.get("parent_folder_id", None)
+        source = kwargs.get("source", None)
+        chunk_size = kwargs.get("chunk_size", DEFAULT_UPLOAD_CHUNK_SIZE)
+        on_session = kwargs.get("on_session", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if not parent_folder_id:
+            raise ValidationError("Parent folder ID is required")
+        if source is None:
+            raise ValidationError("Source is required")
+        validate_chunk_size(chunk_size)
+
+        content = upload_source(source, size=kwargs.get("size"), name=kwargs.get("file_name"))
+        file_name = kwargs.get("file_name") or content.name
+        try:
+            session = await self.create_upload_session(
+                drive_id=drive_id,
+                parent_folder_id=parent_folder_id,
+                file_name=file_name,
+                conflict_behavior=kwargs.get("conflict_behavior", "replace"),
+            )
+            if not session or not session.upload_url:
+                return None
+            if on_session:
+                on_session(session)
+            return await self._send_to_session(session.upload_url, content, chunk_size, 0, kwargs.get("on_progress"))
+        finally:
+            await content.close()
+
+
+    async def resume_upload(self, **kwargs) -> Optional[DriveItem]:
+        """
+        Finish an interrupted upload from the byte the session expects next.
+
+        #### Args:
+            upload_url (str): `upload_url` of the session returned by create_upload_session / on_session
+            source (str | PathLike | mmap | bytes | AsyncIterable[bytes]): The same content as the original upload
+            size (int, optional): Total size in bytes, required for async byte streams
+            chunk_size (int, optional): Bytes per fragment, a multiple of 320 KiB (default 10 MiB)
+            on_progress (Callable[[int, int], Any], optional): Called with (bytes uploaded, total bytes)
+
+        #### Returns:
+            Optional[DriveItem]: The uploaded item
+
+        #### Raises:
+            SharePointError: If the upload session has expired
+        """
+        upload_url = kwargs.get("upload_url", None)
+        source = kwargs.get("source", None)
+        chunk_size = kwargs.get("chunk_size", DEFAULT_UPLOAD_CHUNK_SIZE)
+
+        if not upload_url:
+            raise ValidationError("Upload URL is required")
+        if source is None:
+            raise ValidationError("Source is required")
+        validate_chunk_size(chunk_size)
+
+        content = upload_source(source, size=kwargs.get("size"))
+        try:
+            async with self._transfer_client() as http:
+                start = await upload_session_status(http, upload_url)
+            if start is None:
+                raise SharePointError("Upload session has expired, start a new upload")
+            return await self._send_to_session(upload_url, content, chunk_size, start, kwargs.get("on_progress"))
+        finally:
+            await content.close()
+
+
+    def _transfer_client(self):
+        """Client for pre-authenticated transfer urls, on the shared transfer pool when a transport is configured."""
+        if self._transport:
+            return self._transport.transfer_client()
+        return transfer_client()
+
+
+    async def _invalidate_cache(self) -> None:
+        """Cached item lookups may be stale after a write to the drive."""
+        if self._cache:
+            await self._cache.invalidate("FileService.")
+
+
+    async def _send_to_session(self, upload_url, content, chunk_size, start, on_progress) -> Optional[DriveItem]:
+        async with self._transfer_client() as http:
+            response = await upload_to_session(http, upload_url, content, chunk_size=chunk_size,
+                                               start=start, on_progress=on_progress)
+        await self._invalidate_cache()
+        return parse_model(response.content, DriveItem)
+
+
+    async def download_item(self, **kwargs) -> Optional[str]:
+        """
+        Download a file to disk in several parallel HTTP Range segments.
+
+        The destination is preallocated to the item's size and every block is written at its
+        offset as it arrives, so memory use does not grow with the file size. Failed segments
+        are retried on their own and an expired download url is refreshed from the item.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            item_id (str): The unique identifier for the file
+            destination (str | PathLike): Path to write the file to, overwritten if it exists
+            segment_size (int, optional): Bytes per range request (default 8 MiB)
+            max_concurrency (int, optional): Segments downloaded at once (default 4)
+            on_progress (Callable[[int, int], Any], optional): Called with (bytes downloaded, total bytes)
+
+        #### Returns:
+            Optional[str]: The destination path, or None if the item could not be retrieved
+
+        #### Example:
+        >>> path = await file_service.download_item(
+        ...     drive_id="drive123",
+        ...     item_id="01ABCDEF123456789",
+        ...     destination="/restore/site.zip",
+        ... )
+        """
+        drive_id = kwargs.get("drive_id", None)
+        item_id = kwargs.get("item_id", None)
+        destination = kwargs.get("destination", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if not item_id:
+            raise ValidationError("Item ID is required")
+        if not destination:
+            raise ValidationError("Destination is required")
+
+        target = await self._download_target(drive_id, item_id)
+        if not target:
+            return None
+        url, size = target
+        async with self._transfer_client() as http:
+            downloader = RangeDownloader(http, url, refresh_url=lambda: self._refresh_download_url(drive_id, item_id))
+            await download_to_file(
+                downloader,
+                destination,
+                size,
+                segment_size=kwargs.get("segment_size", DEFAULT_SEGMENT_SIZE),
+                concurrency=kwargs.get("max_concurrency", DEFAULT_DOWNLOAD_CONCURRENCY),
+                on_progress=kwargs.get("on_progress"),
+            )
+        return str(destination)
+
+
+    def stream_item(self, **kwargs) -> AsyncIterator[bytes]:
+        """
+        Stream a file's content in order as an async iterator of byte segments.
+
+        Segments are fetched ahead of the consumer with parallel HTTP Range requests, at most
+        `max_concurrency` segments are held in memory at once.
+
+        #### Args:
+            drive_id (str): The unique identifier for the SharePoint drive
+            item_id (str): The unique identifier for the file
+            segment_size (int, optional): Bytes per range request and per yielded chunk (default 8 MiB)
+            max_concurrency (int, optional): Segments downloaded ahead (default 4)
+
+        #### Returns:
+            AsyncIterator[bytes]: The file content, one segment at a time
+
+        #### Example:
+        >>> async for chunk in file_service.stream_item(drive_id="drive123", item_id="01ABCDEF123456789"):
+        ...     digest.update(chunk)
+        """
+        drive_id = kwargs.get("drive_id", None)
+        item_id = kwargs.get("item_id", None)
+
+        if not drive_id:
+            raise ValidationError("Drive ID is required")
+        if not item_id:
+            raise ValidationError("Item ID is required")
+        return self._stream_item(
+            drive_id,
+            item_id,
+            kwargs.get("segment_size", DEFAULT_SEGMENT_SIZE),
+            kwargs.get("max_concurrency", DEFAULT_DOWNLOAD_CONCURRENCY),
+        )
+
+
+    async def _stream_item(self, drive_id, item_id, segment_size, concurrency) -> AsyncIterator[bytes]:
+        target = await self._download_target(drive_id, item_id)
+        if not target:
+            return
+        url, size = target
+        async with self._transfer_client() as http:
+            downloader = RangeDownloader(http, url, refresh_url=lambda: self._refresh_download_url(drive_id, item_id))
+            async for chunk in stream_segments(downloader, size, segment_size=segment_size, concurrency=concurrency):
+                yield chunk
+
+
+    async def _download_target(self, drive_id, item_id) -> Optional[Tuple[str, int]]:
+        """
+        Returns the pre-authenticated download url and size of a file.
+
+        Always a live read, past the response cache and ETag store: the url expires without the
+        item's eTag changing, so a cached or revalidated item would hand back a dead url.
+        """
+        try:
+            item = await self._msgraph_client.drives.by_drive_id(drive_id).items.by_drive_item_id(item_id).get()
+        except Exception as e:
+            graph_exception_handler(e, "SharePoint")
+            return None
+        if not item:
+            return None
+        url = (item.additional_data or {}).get("@microsoft.graph.downloadUrl")
+        if not url or item.folder:
+            raise SharePointError(f"Item '{item.name}' has no downloadable content")
+        return url, item.size or 0
 
 
+    async def _refresh_download_url(self, drive_id, item_id) -> str:
+        target = await self._download_target(drive_id, item_id)
+        if not target:
+            raise SharePointError("Download url has expired and could not be refreshed")
+        return target[0]
 
@@ -0,0 +1,137 @@
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+from ..exceptions import ValidationError
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def split_path(item_path: str) -> Tuple[str, ...]:
+    """Splits a drive path into segments, '/Documents/Projects/' -> ('Documents', 'Projects')."""
+    return tuple(segment for segment in item_path.strip().split("/") if segment)
+
+
+class _PathNode:
+    __slots__ = ("item_id", "expires", "children")
+
+    def __init__(self, item_id: Optional[str] = None, expires: float = 0.0):
+        self.item_id = item_id
+        self.expires = expires
+        self.children: Dict[str, "_PathNode"] = {}
+
+
+class DrivePathCache:
+    """
+    Maps drive paths to item ids, as a trie per drive keyed by lower cased path segments.
+
+    Resolving a path also tells which of its prefixes are known, so a lookup only has to ask
+    Graph for the segments past the deepest cached folder. Mappings expire after `ttl` seconds
+    to bound how long renames made outside the toolkit go unnoticed, writes made through
+    FileService invalidate the affected subtree immediately.
+
+    #### Args:
+        ttl (float): Seconds a mapping is trusted (default 600)
+        max_entries (int): Mappings kept before the whole cache is dropped (default 100,000)
+    """
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if ttl <= 0:
+            raise ValidationError("TTL must be positive")
+        if max_entries < 1:
+            raise ValidationError("max_entries must be at least 1")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._roots: Dict[str, _PathNode] = {}
+        self._paths: Dict[Tuple[str, str], Tuple[str, ...]] = {} # (drive, item id) -> segments, for invalidation
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def get(self, drive_id: str, item_path: str) -> Optional[str]:
+        """Returns the cached item id of a path, or None."""
+        segments = split_path(item_path)
+        depth, item_id = self.longest_prefix(drive_id, segments)
+        return item_id if depth == len(segments) and segments else None
+
+    def longest_prefix(self, drive_id: str, segments: Tuple[str, ...]) -> Tuple[int, Optional[str]]:
+        """Returns how many leading segments are cached and the item id of the last one, (0, None) if none are."""
+        node = self._roots.get(drive_id)
+        now = monotonic()
+        depth, item_id = 0, None
+        for index, segment in enumerate(segments):
+            node = node.children.get(segment.lower()) if node else None
+            if node is None:
+                break
+            if node.item_id is not None:
+                if node.expires <= now:
+                    break
+                depth, item_id = index + 1, node.item_id
+        return depth, item_id
+
+    def path_of(self, drive_id: str, item_id: str) -> Optional[Tuple[str, ...]]:
+        """Returns the cached path segments of an item id, or None."""
+        return self._paths.get((drive_id, item_id))
+
+    def put(self, drive_id: str, segments: Tuple[str, ...], item_id: str) -> None:
+        """Records the item id of a path."""
+        if not segments or not item_id:
+            return
+        segments = tuple(segment.lower() for segment in segments)
+        previous = self._paths.get((drive_id, item_id))
+        if previous is not None and previous != segments:
+            self.invalidate_path(drive_id, previous) # the item has moved, its old subtree went with it
+        replaced = self._find(drive_id, segments)
+        if replaced is not None and replaced.item_id not in (None, item_id):
+            self.invalidate_path(drive_id, segments) # a different item now has this path
+        if len(self._paths) >= self.max_entries:
+            self.clear()
+        node = self._roots.setdefault(drive_id, _PathNode())
+        for segment in segments:
+            node = node.children.setdefault(segment, _PathNode())
+        node.item_id = item_id
+        node.expires = monotonic() + self.ttl
+        self._paths[(drive_id, item_id)] = segments
+
+    def _find(self, drive_id: str, segments: Tuple[str, ...]) -> Optional[_PathNode]:
+        node = self._roots.get(drive_id)
+        for segment in segments:
+            if node is None:
+                return None
+            node = node.children.get(segment)
+        return node
+
+    def invalidate_item(self, drive_id: str, item_id: str) -> None:
+        """Forgets an item and everything cached below it."""
+        segments = self._paths.get((drive_id, item_id))
+        if segments is not None:
+            self.invalidate_path(drive_id, segments)
+
+    def invalidate_path(self, drive_id: str, segments: Tuple[str, ...]) -> None:
+        """Forgets a path and everything cached below it."""
+        node = self._roots.get(drive_id)
+        if node is None or not segments:
+            return
+        parents: List[Tuple[_PathNode, str]] = []
+        for segment in segments:
+            child = node.children.get(segment.lower())
+            if child is None:
+                return
+            parents.append((node, segment.lower()))
+            node = child
+        parent, segment = parents[-1]
+        del parent.children[segment]
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.item_id is not None:
+                self._paths.pop((drive_id, current.item_id), None)
+            stack.extend(current.children.values())
+
+    def clear(self, drive_id: Optional[str] = None) -> None:
+        """Forgets every path of a drive, or of every drive."""
+        if drive_id is None:
+            self._roots.clear()
+            self._paths.clear()
+            return
+        self._roots.pop(drive_id, None)
+        for key in [key for key in self._paths if key[0] == drive_id]:
+            del self._paths[key]
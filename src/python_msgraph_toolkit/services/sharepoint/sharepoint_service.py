@@ -1,3 +1,4 @@
+from typing import Optional
 from msgraph import GraphServiceClient
 from msgraph.generated.models.drive_item import DriveItem
 from msgraph.generated.models.folder import Folder
@@ -5,18 +6,26 @@ from .sites import SitesService
 from .drives import DriveService
 from .files import FileService
 from ..exceptions import ValidationError
+from ...utils.delta import DeltaStore
+from ...utils.cache import ResponseCache
+from ...utils.etag import ETagStore
+from .path_cache import DrivePathCache
+from ...utils.transport import TransportConfig
 
 
 class SharepointService():
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 cache: Optional[ResponseCache] = None, etag_store: Optional[ETagStore] = None,
+                 path_cache: Optional[DrivePathCache] = None, transport: Optional[TransportConfig] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
         
         # Initialize sub-services
-        self.sites = SitesService(self._msgraph_client)
-        self.files = FileService(self._msgraph_client)
-        self.drives = DriveService(self._msgraph_client)
+        self.sites = SitesService(self._msgraph_client, cache=cache)
+        self.files = FileService(self._msgraph_client, cache=cache, etag_store=etag_store, path_cache=path_cache,
+                                 transport=transport)
+        self.drives = DriveService(self._msgraph_client, delta_store=delta_store, cache=cache)
 
 
 
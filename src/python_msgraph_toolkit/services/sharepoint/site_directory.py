@@ -0,0 +1,132 @@
+from msgraph import GraphServiceClient
+from msgraph.generated.models.site import Site
+from time import monotonic
+from typing import Dict, Optional
+import asyncio
+import logging
+from ..exceptions import ValidationError
+from ...utils.delta import DELETED, DeltaChanges, MemoryDeltaStore, is_removed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 900
+
+
+class SiteDirectory:
+    """
+    In-memory index of every SharePoint site in the tenant, keyed case-insensitively by id,
+    display name and URL.
+
+    The first lookup enumerates all sites through `sites/delta`. Lookups made after
+    `refresh_interval` seconds are answered from the current index while a background
+    refresh applies the sites added, changed or deleted since the previous one.
+
+    #### Args:
+        msgraph_client (GraphServiceClient): Authorised Graph client
+        refresh_interval (float, optional): Seconds before lookups trigger a background refresh, None to
+            only refresh through `refresh()` (default 900)
+
+    #### Example:
+        >>> site = await sites_service.directory.get_by_name("Project Alpha")
+        >>> site = await sites_service.directory.get_by_url("https://contoso.sharepoint.com/sites/alpha")
+    """
+    def __init__(self, msgraph_client: GraphServiceClient, refresh_interval: Optional[float] = DEFAULT_REFRESH_INTERVAL) -> None:
+        if not msgraph_client:
+            raise ValidationError("msgraph client must be supplied")
+        if refresh_interval is not None and refresh_interval <= 0:
+            raise ValidationError("Refresh interval must be positive")
+        self._msgraph_client = msgraph_client
+        self.refresh_interval = refresh_interval
+        # the index only lives in memory, so its delta token must not outlive it
+        self._delta_store = MemoryDeltaStore()
+        self._by_id: Dict[str, Site] = {}
+        self._by_name: Dict[str, Site] = {}
+        self._by_url: Dict[str, Site] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    async def get_by_id(self, site_id: str) -> Optional[Site]:
+        """Returns the site with this id, or None."""
+        await self._ensure_loaded()
+        return self._by_id.get(site_id.lower())
+
+    async def get_by_name(self, display_name: str) -> Optional[Site]:
+        """Returns the first site with this display name, ignoring case, or None."""
+        await self._ensure_loaded()
+        return self._by_name.get(display_name.lower())
+
+    async def get_by_url(self, web_url: str) -> Optional[Site]:
+        """Returns the site at this URL, ignoring case and a trailing slash, or None."""
+        await self._ensure_loaded()
+        return self._by_url.get(self._normalise_url(web_url))
+
+    async def refresh(self) -> None:
+        """Applies the changes since the previous refresh, the first one loads every site."""
+        async with self._lock:
+            await self._refresh()
+
+    def close(self) -> None:
+        """Cancels a background refresh in progress."""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    async def _ensure_loaded(self) -> None:
+        if self._refreshed_at is None:
+            async with self._lock:
+                if self._refreshed_at is None: # loaded by the caller we were waiting for
+                    await self._refresh()
+        elif self.refresh_interval is not None and monotonic() - self._refreshed_at >= self.refresh_interval:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.ensure_future(self.refresh())
+                self._refresh_task.add_done_callback(self._log_refresh_failure)
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Background refresh of the site directory failed: {task.exception()}")
+
+    async def _refresh(self) -> None:
+        started_at = monotonic()
+        changes = DeltaChanges(
+            self._msgraph_client.sites.delta,
+            self._delta_store,
+            "sites",
+            service_name = "SharePoint",
+            is_removed = self._is_deleted,
+        )
+        sites = dict(self._by_id)
+        seen: Dict[str, Site] = {}
+        async for change in changes:
+            if not change.item.id:
+                continue
+            site_id = change.item.id.lower()
+            if change.kind == DELETED:
+                sites.pop(site_id, None)
+            else:
+                sites[site_id] = seen[site_id] = change.item
+        if changes.full_sync:
+            sites = seen # a full sync lists every live site, anything else has gone
+
+        # build the indexes aside and swap them in, lookups never see a half built index
+        by_name: Dict[str, Site] = {}
+        by_url: Dict[str, Site] = {}
+        for site in sites.values():
+            if site.display_name:
+                by_name.setdefault(site.display_name.lower(), site)
+            if site.web_url:
+                by_url.setdefault(self._normalise_url(site.web_url), site)
+        self._by_id, self._by_name, self._by_url = sites, by_name, by_url
+        self._refreshed_at = started_at
+
+    @staticmethod
+    def _is_deleted(site: Site) -> bool:
+        # Site has no `deleted` property, the facet sites/delta reports lands in additional_data
+        return is_removed(site) or "deleted" in (site.additional_data or {})
+
+    @staticmethod
+    def _normalise_url(web_url: str) -> str:
+        return web_url.strip().rstrip("/").lower()
@@ -4,18 +4,46 @@ import logging
 from typing import List, NoReturn, Optional
 from msgraph.generated.models.site import Site
 from msgraph.generated.models.drive import Drive
+from msgraph.generated.sites.get_all_sites.get_all_sites_request_builder import GetAllSitesRequestBuilder
+from msgraph.generated.sites.item.site_item_request_builder import SiteItemRequestBuilder
+from msgraph.generated.sites.item.sites.sites_request_builder import SitesRequestBuilder
+from msgraph.generated.sites.item.drive.drive_request_builder import DriveRequestBuilder
 from ..exceptions import ValidationError, graph_exception_handler
+from ...utils.pagination import PageIterator
+from ...utils.query import query_configuration
+from ...utils.cache import ResponseCache, cached
+from .site_directory import SiteDirectory
 
 class SitesService:
     """Service for managing SharePoint sites through Microsoft Graph API."""
-    def __init__(self, msgraph_client: GraphServiceClient) -> None:
+    def __init__(self, msgraph_client: GraphServiceClient, cache: Optional[ResponseCache] = None) -> None:
         self._msgraph_client = msgraph_client
         self.logger = logging.getLogger(__name__)
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
+        self._cache = cache
+        self.directory = SiteDirectory(msgraph_client)
         
 
-    async def get_all_sites(self) -> List[Site]:
+    def iter_all_sites(self, **kwargs) -> PageIterator:
+        """
+        Stream all Sharepoint sites accessable to the authenticated user, following every page of results.
+
+        #### Args:
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options
+
+        #### Returns:
+            PageIterator: Async iterator of Site, use `.pages()` to iterate page by page
+
+        Useage example:
+        >>> async for site in sites_service.iter_all_sites():
+        ...     print(f"Site: {site.display_name}")
+        """
+        configuration = query_configuration(kwargs.get("query"), GetAllSitesRequestBuilder.GetAllSitesRequestBuilderGetQueryParameters)
+        return PageIterator(self._msgraph_client.sites.get_all_sites, configuration, service_name = "SharePoint")
+
+
+    async def get_all_sites(self, **kwargs) -> List[Site]:
         """
         Retreive all Sharepoint sites accessable to the authenticated user.
         
@@ -23,7 +51,7 @@ class SitesService:
         Requires read permissions.
 
         #### Args:
-            None
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options
 
         #### Returns:
              Dict[str, str] or empty list: Each object in the list contains attributes such as name, id, url etc.
@@ -36,21 +64,18 @@ class SitesService:
         ...         print(f"URL: {site.web_url}")
         ...         print(f"ID: {site.id}")
         """
-        try:
-            response = await self._msgraph_client.sites.get_all_sites.get()
-            return response.value if response.value else [] # type: ignore[attr-defined]
-        except Exception as e:
-            graph_exception_handler(e, "SharePoint")
-            return [] # This line will never be reached due to exception being raised, but is here to satisfy return type
+        return await self.iter_all_sites(**kwargs).collect()
     
 
 
+    @cached(ttl = 3600)
     async def get_site_by_id(self, **kwargs) -> Optional[Site]:
         """
         #### Retrieve a specific SharePoint site by its ID.
         
         ##### Args:
             site_id (str): The unique identifier for the SharePoint site
+            query (QueryOptions, optional): $select and $expand options
             
         ##### Returns:
             Dict[str, str] if found, contains attributes such as name, id, url etc or None if not found
@@ -63,8 +88,9 @@ class SitesService:
 
         if not site_id:
             raise ValidationError("Site ID is required")
+        configuration = query_configuration(kwargs.get("query"), SiteItemRequestBuilder.SiteItemRequestBuilderGetQueryParameters)
         try:
-            response = await self._msgraph_client.sites.by_site_id(site_id).get()
+            response = await self._msgraph_client.sites.by_site_id(site_id).get(request_configuration = configuration)
             return response if response else None
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
@@ -74,6 +100,9 @@ class SitesService:
     async def get_site_by_displayname(self, **kwargs) -> Optional[Site]:
         """
         #### Retrieve a SharePoint site by its display name.
+
+        Answered from the site directory, which lists every site once and then keeps itself
+        up to date with `sites/delta`.
         
         ##### Args:
             site_name (str): The display name of the SharePoint site
@@ -90,25 +119,55 @@ class SitesService:
 
         if not site_name:
             raise ValidationError("Site Name is required")
-        try:
-            all_sites = await self._msgraph_client.sites.get_all_sites.get()
-            if not all_sites.value: # type: ignore[attr-defined]
-                return None        
-            for site in all_sites.value: # type: ignore[attr-defined]
-                if site.display_name and site.display_name.lower() == site_name.lower():
-                    return site
-            return None  # Explicit return when no match found
-        except Exception as e:
-            graph_exception_handler(e, "SharePoint")
-            return None # This line will never be reached due to exception being raised, but is here to satisfy return type
+        return await self.directory.get_by_name(site_name)
+
+
+    async def get_site_by_url(self, **kwargs) -> Optional[Site]:
+        """
+        #### Retrieve a SharePoint site by its URL, answered from the site directory.
+        
+        ##### Args:
+            site_url (str): The web URL of the site, eg https://contoso.sharepoint.com/sites/alpha
+            
+        ##### Returns:
+            Site if found, or None if not found
+            
+        Example:
+            >>> site = await sites_service.get_site_by_url(site_url="https://contoso.sharepoint.com/sites/alpha")
+        """
+        site_url = kwargs.get("site_url", None)
+
+        if not site_url:
+            raise ValidationError("Site URL is required")
+        return await self.directory.get_by_url(site_url)
     
 
+    def iter_sub_sites(self, **kwargs) -> PageIterator:
+        """
+        #### Stream all subsites of a parent SharePoint site, following every page of results.
+
+        ##### Args:
+            parent_site_id (str): The unique identifier of the parent site
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options
+
+        ##### Returns:
+            PageIterator: Async iterator of Site
+        """
+        parent_site_id = kwargs.get("parent_site_id", None)
+
+        if not parent_site_id:
+            raise ValidationError("Parent site ID is required")
+        configuration = query_configuration(kwargs.get("query"), SitesRequestBuilder.SitesRequestBuilderGetQueryParameters)
+        return PageIterator(self._msgraph_client.sites.by_site_id(parent_site_id).sites, configuration, service_name = "SharePoint")
+
+
     async def get_sub_sites(self, **kwargs) -> List[Site]:
         """
         #### Retrieve all subsites of a parent SharePoint site.
         
         ##### Args:
             parent_site_id (str): The unique identifier of the parent site
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options
             
         ##### Returns:
             List of subsite Dict[str, str] or an empty list if none found
@@ -117,24 +176,17 @@ class SitesService:
             >>> subsites = await sites_service.get_sub_sites(parent_site_id)
             >>> print(f"Found {len(subsites)} subsites")
         """
-        parent_site_id = kwargs.get("parent_site_id", None)
-
-        if not parent_site_id:
-            raise ValidationError("Parent site ID is required")
-        try:
-            response =  await self._msgraph_client.sites.by_site_id(parent_site_id).sites.get()
-            return response.value if response.value else [] # type: ignore[attr-defined]
-        except Exception as e:
-            graph_exception_handler(e, "SharePoint")
-            return [] # This line will never be reached due to exception being raised, but is here to satisfy return type
+        return await self.iter_sub_sites(**kwargs).collect()
 
     
+    @cached(ttl = 3600)
     async def get_site_drive(self, **kwargs) -> Optional[Drive]:
         """
         #### Returns the drive object for the site
 
         ##### Args: 
             site_id (str): The unique identifier for the parent site.
+            query (QueryOptions, optional): $select and $expand options.
 
         ##### Returns: 
             Dict[str, str] or None if not found
@@ -143,8 +195,9 @@ class SitesService:
         
         if not site_id:
             raise ValidationError("Site ID is required")
+        configuration = query_configuration(kwargs.get("query"), DriveRequestBuilder.DriveRequestBuilderGetQueryParameters)
         try:
-            response = await self._msgraph_client.sites.by_site_id(site_id).drive.get()
+            response = await self._msgraph_client.sites.by_site_id(site_id).drive.get(request_configuration = configuration)
             return response if response else None
         except Exception as e:
             graph_exception_handler(e, "SharePoint")
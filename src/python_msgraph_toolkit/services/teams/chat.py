@@ -3,36 +3,54 @@ from msgraph.generated.models.chat import Chat
 from msgraph.generated.models.chat_type import ChatType
 from msgraph.generated.models.aad_user_conversation_member import AadUserConversationMember
 from msgraph.generated.chats.item.messages.messages_request_builder import MessagesRequestBuilder
+from msgraph.generated.users.item.chats.chats_request_builder import ChatsRequestBuilder
 from kiota_abstractions.base_request_configuration import RequestConfiguration
 from msgraph.generated.models.chat_message import ChatMessage
 from msgraph.generated.models.item_body import ItemBody
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 from ..exceptions import ValidationError, graph_exception_handler
+from ...utils.pagination import PageIterator
+from ...utils.query import query_configuration
+from ...utils.delta import DeltaStore, MemoryDeltaStore
+
+MAX_MESSAGES_PAGE_SIZE = 50 # largest $top the chat messages endpoint accepts
 
 class ChatService:
     """Service for managing Teams Chat through Microsoft Graph API."""
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
+        self._delta_store = delta_store or MemoryDeltaStore()
         
-    async def list_chats(self, **kwargs):
-        """List chats for the authenticated user.
+    def iter_chats(self, **kwargs) -> PageIterator:
+        """Stream chats for a user, following every page of results.
 
         Args:
-            user (str): The ID of the user whose chats to list."""
+            user (str): The ID of the user whose chats to list.
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options.
+
+        Returns:
+            PageIterator: Async iterator of Chat objects, use `.pages()` to iterate page by page.
+        """
         user = kwargs.get("user") # Required
         
         if not user:
             raise ValidationError("user is required to list chats")
+        configuration = query_configuration(kwargs.get("query"), ChatsRequestBuilder.ChatsRequestBuilderGetQueryParameters)
+        return PageIterator(self._msgraph_client.users.by_user_id(user).chats, configuration, service_name = "Teams")
 
-        try:
-            result = await self._msgraph_client.users.by_user_id(user).chats.get()
-            if result and result.value:
-                return result.value
-            return None
-        except Exception as e:
-            graph_exception_handler(e, "Teams")
-            return None
+    async def list_chats(self, **kwargs):
+        """List chats for the authenticated user.
+
+        Args:
+            user (str): The ID of the user whose chats to list.
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options."""
+        result = await self.iter_chats(**kwargs).collect()
+        if result:
+            return result
+        return None
     
         
     async def create_chat(self, **kwargs):
@@ -85,6 +103,7 @@ class ChatService:
         Args:
             chat_id (str): The ID of the chat to list messages from.
             top (int, optional): Maximum number of messages to return (default: 10).
+            query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options, its top replaces `top`.
             
         Returns:
             List[ChatMessage]: List of messages in the chat, or None if retrieval failed.
@@ -103,6 +122,7 @@ class ChatService:
         request_configuration = RequestConfiguration(
         query_parameters = query_params,
         )        
+        request_configuration = query_configuration(kwargs.get("query"), MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters, request_configuration)
         try:
             result = await self._msgraph_client.chats.by_chat_id(chat_id).messages.get(request_configuration = request_configuration)
             if result and result.value:
@@ -112,6 +132,64 @@ class ChatService:
             graph_exception_handler(e, "Teams")
             return None
         
+    def iter_new_messages(self, **kwargs) -> AsyncIterator[ChatMessage]:
+        """Stream every message created or edited in a chat since the previous call.
+
+        Each chat has a watermark, the newest `lastModifiedDateTime` returned so far, kept in the
+        delta store with `save_watermark`. Messages modified after it are
+        paged through newest first. The watermark only moves once the stream has been fully
+        consumed, so a reader that stops early or crashes gets the same messages again.
+
+        Args:
+            chat_id (str): The ID of the chat.
+            since (datetime, optional): Watermark to use when the chat has none yet, default reads the whole history.
+            page_size (int, optional): Messages per request, at most 50 (default 50).
+            store (DeltaStore, optional): Watermark store for this call, defaults to the service's store.
+
+        Returns:
+            AsyncIterator[ChatMessage]: New and edited messages, newest first.
+        """
+        chat_id = kwargs.get("chat_id", None) # Required
+        since = kwargs.get("since", None)
+        page_size = kwargs.get("page_size", MAX_MESSAGES_PAGE_SIZE)
+
+        if not chat_id:
+            raise ValidationError("chat_id is required to read messages in a chat")
+        if not 0 < page_size <= MAX_MESSAGES_PAGE_SIZE:
+            raise ValidationError(f"page_size must be between 1 and {MAX_MESSAGES_PAGE_SIZE}")
+        return self._iter_new_messages(chat_id, since, page_size, kwargs.get("store") or self._delta_store)
+
+    async def _iter_new_messages(self, chat_id: str, since: Optional[datetime], page_size: int,
+                                 store: DeltaStore) -> AsyncIterator[ChatMessage]:
+        key = f"chat:{chat_id}"
+        watermark = await store.load_watermark(key) or since
+        if watermark and watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo = timezone.utc)
+
+        query_params = MessagesRequestBuilder.MessagesRequestBuilderGetQueryParameters(
+            top = page_size,
+            orderby = ["lastModifiedDateTime desc"],
+        )
+        if watermark:
+            query_params.filter = f"lastModifiedDateTime gt {watermark.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}"
+        request_configuration = RequestConfiguration(
+        query_parameters = query_params,
+        )
+
+        newest = watermark
+        messages = PageIterator(self._msgraph_client.chats.by_chat_id(chat_id).messages, request_configuration, service_name = "Teams")
+        async for message in messages:
+            modified = message.last_modified_date_time
+            if isinstance(modified, datetime):
+                if modified.tzinfo is None:
+                    modified = modified.replace(tzinfo = timezone.utc)
+                if newest is None or modified > newest:
+                    newest = modified
+            yield message
+
+        if newest and newest != watermark:
+            await store.save_watermark(key, newest)
+
     async def send_message(self, **kwargs):
         """Send a message in a specified chat.
 
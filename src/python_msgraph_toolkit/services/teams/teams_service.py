@@ -1,15 +1,17 @@
+from typing import Optional
 from msgraph import GraphServiceClient
 from msgraph.generated.models.drive_item import DriveItem
 from msgraph.generated.models.folder import Folder
 from .chat import ChatService
 from ..exceptions import ValidationError
+from ...utils.delta import DeltaStore
 
 
 class TeamsService():
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
         
         # Initialize sub-services
-        self.chat = ChatService(self._msgraph_client)
\ No newline at end of file
+        self.chat = ChatService(self._msgraph_client, delta_store=delta_store)
\ No newline at end of file
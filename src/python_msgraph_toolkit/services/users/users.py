@@ -1,20 +1,43 @@
 import logging
+from typing import Optional
 from msgraph.graph_service_client import GraphServiceClient
+from msgraph.generated.users.delta.delta_request_builder import DeltaRequestBuilder as UsersDeltaRequestBuilder
+from msgraph.generated.groups.delta.delta_request_builder import DeltaRequestBuilder as GroupsDeltaRequestBuilder
+from msgraph.generated.users.users_request_builder import UsersRequestBuilder
+from msgraph.generated.users.item.user_item_request_builder import UserItemRequestBuilder
+from kiota_abstractions.base_request_configuration import RequestConfiguration
 from ..exceptions import ValidationError, graph_exception_handler
+from ...utils.pagination import PageIterator
+from ...utils.query import query_configuration
+from ...utils.cache import ResponseCache, cached
+from ...utils.delta import DeltaMirror, DeltaResult, DeltaStore, MemoryDeltaMirror, MemoryDeltaStore, sync_mirror
+
+# properties kept in the local mirror unless a sync asks for others
+DEFAULT_USER_FIELDS = [
+    "id", "displayName", "givenName", "surname", "userPrincipalName", "mail",
+    "accountEnabled", "jobTitle", "department", "officeLocation",
+]
+DEFAULT_GROUP_FIELDS = ["id", "displayName", "mail", "mailEnabled", "securityEnabled", "groupTypes"]
 
 class UserService:
     """Service for managing Users through Microsoft Graph API."""
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 mirror: Optional[DeltaMirror] = None, cache: Optional[ResponseCache] = None):
         self._msgraph_client = msgraph_client
         self.logger = logging.getLogger(__name__)
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
+        self._delta_store = delta_store or MemoryDeltaStore()
+        self._mirror = mirror or MemoryDeltaMirror()
+        self._cache = cache
         
+    @cached()
     async def get_user(self, **kwargs):
             """Retrieve a user by their ID.
 
             Args:
                 user_id (str): The ID of the user to retrieve.
+                query (QueryOptions, optional): $select and $expand options.
                 
             Returns:
                 User: The retrieved user object, or None if not found.
@@ -22,9 +45,10 @@ class UserService:
             user_id = kwargs.get("user_id") # required
             if not user_id:
                 raise ValidationError("user_id is required")
+            configuration = query_configuration(kwargs.get("query"), UserItemRequestBuilder.UserItemRequestBuilderGetQueryParameters)
 
             try:
-                user = await self._msgraph_client.users.by_user_id(user_id).get()
+                user = await self._msgraph_client.users.by_user_id(user_id).get(request_configuration = configuration)
                 if user:
                     return user
                 else:
@@ -34,27 +58,40 @@ class UserService:
                 return None
             
             
-    async def list_users(self):
+    def iter_users(self, **kwargs) -> PageIterator:
+            """Stream all users in the organization, following every page of results.
+
+            Args:
+                query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options.
+
+            Returns:
+                PageIterator: Async iterator of User objects, use `.pages()` to iterate page by page.
+            """
+            configuration = query_configuration(kwargs.get("query"), UsersRequestBuilder.UsersRequestBuilderGetQueryParameters)
+            return PageIterator(self._msgraph_client.users, configuration, service_name = "Users")
+
+    async def list_users(self, **kwargs):
             """List all users in the organization.
 
+            Args:
+                query (QueryOptions, optional): $select, $filter, $orderby, $top, $count and $expand options.
+
             Returns:
-                List[User]: A list of user objects.
+                List[User]: A list of user objects across all pages.
             """
-            try:
-                users_list = await self._msgraph_client.users.get()
-                if users_list and users_list.value:
-                    return users_list.value
-                else:
-                    return None
-            except Exception as e:
-                graph_exception_handler(e, "Users")
+            users_list = await self.iter_users(**kwargs).collect()
+            if users_list:
+                return users_list
+            else:
                 return None
             
+    @cached()
     async def get_user_by_email(self, **kwargs):
             """Retrieve a user by their email address.
 
             Args:
                 email (str): The email address of the user to retrieve.
+                query (QueryOptions, optional): $select and $expand options.
                 
             Returns:
                 User: The retrieved user object, or None if not found.
@@ -62,13 +99,93 @@ class UserService:
             email = kwargs.get("email") # required
             if not email:
                 raise ValidationError("email is required")
+            configuration = query_configuration(kwargs.get("query"), UserItemRequestBuilder.UserItemRequestBuilderGetQueryParameters)
 
             try:
-                user = await self._msgraph_client.users.by_user_id(email).get()
+                user = await self._msgraph_client.users.by_user_id(email).get(request_configuration = configuration)
                 if user:
                     return user
                 else:
                     return None
             except Exception as e:
                 graph_exception_handler(e, "Users")
-                return None
\ No newline at end of file
+                return None
+
+    async def sync_users(self, **kwargs) -> DeltaResult:
+            """Bring the local user mirror up to date with `users/delta`.
+
+            The first sync copies every user into the mirror, later syncs only transfer users
+            that were created, updated or deleted since. Each page is checkpointed, a sync that
+            is interrupted resumes from the last applied page on the next call.
+
+            Args:
+                select (list[str], optional): User properties to mirror (default DEFAULT_USER_FIELDS).
+                key (str, optional): Cursor and mirror scope, set per tenant when a store is shared (default "users").
+
+            Returns:
+                DeltaResult: Ids of the users added, changed and deleted.
+            """
+            configuration = RequestConfiguration(
+                query_parameters = UsersDeltaRequestBuilder.DeltaRequestBuilderGetQueryParameters(
+                    select = kwargs.get("select") or DEFAULT_USER_FIELDS,
+                )
+            )
+            return await sync_mirror(self._msgraph_client.users.delta, self._delta_store, self._mirror,
+                                     kwargs.get("key") or "users", service_name = "Users",
+                                     request_configuration = configuration)
+
+    async def sync_groups(self, **kwargs) -> DeltaResult:
+            """Bring the local group mirror up to date with `groups/delta`.
+
+            Args:
+                select (list[str], optional): Group properties to mirror (default DEFAULT_GROUP_FIELDS).
+                key (str, optional): Cursor and mirror scope, set per tenant when a store is shared (default "groups").
+
+            Returns:
+                DeltaResult: Ids of the groups added, changed and deleted.
+            """
+            configuration = RequestConfiguration(
+                query_parameters = GroupsDeltaRequestBuilder.DeltaRequestBuilderGetQueryParameters(
+                    select = kwargs.get("select") or DEFAULT_GROUP_FIELDS,
+                )
+            )
+            return await sync_mirror(self._msgraph_client.groups.delta, self._delta_store, self._mirror,
+                                     kwargs.get("key") or "groups", service_name = "Users",
+                                     request_configuration = configuration)
+
+    async def get_mirrored_user(self, **kwargs):
+            """Read a user from the local mirror without calling Graph.
+
+            Args:
+                user_id (str): The ID of the user.
+                key (str, optional): Mirror scope used by sync_users (default "users").
+
+            Returns:
+                dict: The mirrored properties of the user, or None if not mirrored.
+            """
+            user_id = kwargs.get("user_id") # required
+            if not user_id:
+                raise ValidationError("user_id is required")
+            return await self._mirror.get(kwargs.get("key") or "users", user_id)
+
+    def mirrored_users(self, **kwargs):
+            """Stream every user in the local mirror.
+
+            Args:
+                key (str, optional): Mirror scope used by sync_users (default "users").
+
+            Returns:
+                AsyncIterator[dict]: Mirrored user records.
+            """
+            return self._mirror.records(kwargs.get("key") or "users")
+
+    def mirrored_groups(self, **kwargs):
+            """Stream every group in the local mirror.
+
+            Args:
+                key (str, optional): Mirror scope used by sync_groups (default "groups").
+
+            Returns:
+                AsyncIterator[dict]: Mirrored group records.
+            """
+            return self._mirror.records(kwargs.get("key") or "groups")
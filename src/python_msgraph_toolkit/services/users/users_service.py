@@ -1,13 +1,17 @@
+from typing import Optional
 from msgraph import GraphServiceClient
 from .users import UserService
 from ..exceptions import ValidationError
+from ...utils.cache import ResponseCache
+from ...utils.delta import DeltaMirror, DeltaStore
 
 
 class UsersService():
-    def __init__(self, msgraph_client: GraphServiceClient):
+    def __init__(self, msgraph_client: GraphServiceClient, delta_store: Optional[DeltaStore] = None,
+                 mirror: Optional[DeltaMirror] = None, cache: Optional[ResponseCache] = None):
         self._msgraph_client = msgraph_client
         if not msgraph_client:
             raise ValidationError("msgraph client must be supplied")
         
         # Initialize sub-services
-        self.users = UserService(self._msgraph_client)
\ No newline at end of file
+        self.users = UserService(self._msgraph_client, delta_store=delta_store, mirror=mirror, cache=cache)
\ No newline at end of file
@@ -1,31 +1,111 @@
 from azure.identity.aio import ClientSecretCredential
+from kiota_authentication_azure.azure_identity_authentication_provider import AzureIdentityAuthenticationProvider
+from kiota_http.kiota_client_factory import KiotaClientFactory
+from kiota_http.middleware import RetryHandler
+from kiota_http.middleware.middleware import BaseMiddleware
+from msgraph.graph_request_adapter import GraphRequestAdapter, options as default_middleware_options
 from msgraph.graph_service_client import GraphServiceClient
+from msgraph_core import GraphClientFactory
+from msgraph_core.middleware import GraphTelemetryHandler
+from msgraph_core.middleware.options import GraphTelemetryHandlerOption
+from .batching import BatchingHandler
+from .throttling import ThrottlingHandler
+from .tokens import PreRefreshingCredential
 import logging
 
 logger = logging.getLogger('azure')
 logger.setLevel(logging.WARNING)
 
 class Auth:
-    def __init__(self, tenant_id: str, client_id: str, secret: str):
+    def __init__(self, tenant_id: str, client_id: str, secret: str, **kwargs):
+        """
+        Authenticates against Microsoft Graph and builds the HTTP pipeline used by every service.
+
+        #### Args:
+            tenant_id (str): Azure AD tenant ID
+            client_id (str): App registration client ID
+            secret (str): App registration client secret
+            batching (bool | BatchingHandler, optional): Pack concurrent GET requests into $batch envelopes.
+                Pass a BatchingHandler to tune max_batch_size / flush_interval (default False)
+            throttling (bool | ThrottlingHandler, optional): Adaptive per tenant/resource rate limiting with
+                Retry-After aware retries, replaces the SDK retry handler. False keeps the SDK handler (default True)
+            rate_limiter (AdaptiveRateLimiter, optional): Token bucket registry to share between clients
+            transport (TransportConfig, optional): Pooled transport to share between clients, tunes connection
+                limits, keep-alive, HTTP/2 and timeouts (default the SDK's own client)
+            token_refresh (bool, optional): Renew access tokens in the background before they expire (default True)
+            token_cache (EncryptedTokenCache, optional): Encrypted file the tokens are saved to and read back from
+                by the next process, disabled by default
+        """
         self.authorised = False
         self.scopes = ['https://graph.microsoft.com/.default']
         if not tenant_id:
             raise ValueError("Tenant ID must be supplied")
         self.tenant_id = tenant_id
-        
+
         if not client_id:
             raise ValueError("Client ID must be supplied")
         self.client_id = client_id
-        
+
         if not secret:
             raise ValueError("Secret must be supplied")
         self.secret = secret
 
-        ## Initialize the authenticated Graph client 
-        try: 
+        batching = kwargs.get("batching", False)
+        throttling = kwargs.get("throttling", True)
+        rate_limiter = kwargs.get("rate_limiter")
+        transport = kwargs.get("transport")
+        token_refresh = kwargs.get("token_refresh", True)
+        token_cache = kwargs.get("token_cache")
+
+        ## Initialize the authenticated Graph client
+        try:
             credendial = ClientSecretCredential(self.tenant_id, self.client_id, self.secret)
-            self._msgraph_client = GraphServiceClient(credentials=credendial, scopes=self.scopes)
+            if token_refresh or token_cache:
+                credendial = PreRefreshingCredential(
+                    credendial,
+                    token_cache=token_cache,
+                    cache_key=f"{self.tenant_id}:{self.client_id}",
+                )
+            auth_provider = AzureIdentityAuthenticationProvider(credendial, scopes=self.scopes)
+            http_client = GraphClientFactory.create_with_custom_middleware(self._build_middleware(
+                tenant_id=self.tenant_id,
+                batching=batching,
+                throttling=throttling,
+                rate_limiter=rate_limiter,
+            ), client=transport.graph_client() if transport else None)
+            request_adapter = GraphRequestAdapter(auth_provider, client=http_client)
+            self._msgraph_client = GraphServiceClient(request_adapter=request_adapter)
+            self._credential = credendial
+            self._http_client = http_client
             self.authorised = True
         except Exception as e:
             logger.error(f"Failed to initialise GraphAPI: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def aclose(self) -> None:
+        """Closes the HTTP client and the credential's token session. A shared transport's pools stay open."""
+        if not self.authorised:
+            return
+        self.authorised = False
+        await self._http_client.aclose()
+        await self._credential.close()
+
+    @staticmethod
+    def _build_middleware(**kwargs) -> list[BaseMiddleware]:
+        """SDK default middleware followed by the toolkit's own handlers, in the order requests pass through them."""
+        middleware = KiotaClientFactory.get_default_middleware(default_middleware_options)
+        middleware.append(GraphTelemetryHandler(
+            options=default_middleware_options[GraphTelemetryHandlerOption.get_key()]
+        ))
+
+        throttling = kwargs.get("throttling")
+        if throttling:
+            if not isinstance(throttling, ThrottlingHandler):
+                throttling = ThrottlingHandler(tenant_id=kwargs.get("tenant_id", ""), limiter=kwargs.get("rate_limiter"))
+            middleware = [throttling if isinstance(handler, RetryHandler) else handler for handler in middleware]
+
+        batching = kwargs.get("batching")
+        if batching:
+            # must be last so each request is retried/redirected individually before being batched
+            middleware.append(batching if isinstance(batching, BatchingHandler) else BatchingHandler())
+        return middleware
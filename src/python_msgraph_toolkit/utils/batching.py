@@ -0,0 +1,180 @@
+"""
+python_msgraph_toolkit.utils.batching
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Coalesces concurrent, independent GET requests into Graph JSON ``$batch`` envelopes.
+
+The handler sits at the bottom of the kiota middleware pipeline, so every individual request
+has already been through redirect/retry handling and carries its auth header. Requests that
+arrive within ``flush_interval`` of each other are packed into a single ``$batch`` POST and each
+sub-response is handed back to the awaiting caller as if it had been sent on its own.
+
+https://learn.microsoft.com/en-us/graph/json-batching
+"""
+import asyncio
+import base64
+import json
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+import httpx
+from kiota_http.middleware.middleware import BaseMiddleware
+from ..services.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 20 # hard limit of the $batch endpoint
+GRAPH_VERSIONS = ("v1.0", "beta")
+
+# headers that belong to the envelope rather than the individual sub-request
+_ENVELOPE_HEADERS = {
+    "authorization", "host", "content-length", "connection", "accept-encoding",
+    "user-agent", "sdkversion", "client-request-id", "transfer-encoding",
+}
+
+
+class BatchingHandler(BaseMiddleware):
+    """
+    Middleware that packs concurrent GET requests into ``$batch`` requests of up to 20.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` requests or ``flush_interval``
+    seconds after its first request arrived, whichever comes first. A lone request is sent
+    as-is so batching never adds more than ``flush_interval`` of latency.
+
+    #### Args:
+        max_batch_size (int): Requests per envelope, between 2 and 20 (default 20)
+        flush_interval (float): Seconds to wait for more requests before flushing (default 0.01)
+    """
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE, flush_interval: float = 0.01):
+        super().__init__()
+        if not 2 <= max_batch_size <= MAX_BATCH_SIZE:
+            raise ValidationError(f"max_batch_size must be between 2 and {MAX_BATCH_SIZE}")
+        if flush_interval < 0:
+            raise ValidationError("flush_interval must not be negative")
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str, str], List[Tuple[httpx.Request, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str, str], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _batch_key(request: httpx.Request) -> Optional[Tuple[str, str, str]]:
+        """Returns (origin, version, authorization) for batchable requests, None otherwise."""
+        if request.method != "GET":
+            return None
+        if "application/json" not in request.headers.get("Accept", ""):
+            return None # binary content can't be batched without base64 inflation
+        segments = request.url.path.lstrip("/").split("/", 1)
+        if len(segments) < 2 or segments[0] not in GRAPH_VERSIONS or segments[1] == "$batch":
+            return None
+        origin = f"{request.url.scheme}://{request.url.netloc.decode()}"
+        return origin, segments[0], request.headers.get("Authorization", "")
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        key = self._batch_key(request)
+        if key is None or self.next is not None:
+            return await super().send(request, transport)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._pending.setdefault(key, [])
+        queue.append((request, future))
+        if len(queue) >= self.max_batch_size:
+            self._flush(key, transport)
+        elif len(queue) == 1:
+            self._timers[key] = loop.call_later(self.flush_interval, self._flush, key, transport)
+        return await future
+
+    def _flush(self, key: Tuple[str, str, str], transport: httpx.AsyncBaseTransport) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        entries = self._pending.pop(key, [])
+        if not entries:
+            return
+        if len(entries) == 1:
+            coroutine = self._send_single(entries[0], transport)
+        else:
+            coroutine = self._send_batch(key, entries, transport)
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_single(self, entry: Tuple[httpx.Request, asyncio.Future], transport: httpx.AsyncBaseTransport) -> None:
+        request, future = entry
+        try:
+            response = await super().send(request, transport)
+            if not future.done():
+                future.set_result(response)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+    async def _send_batch(self, key: Tuple[str, str, str], entries: List[Tuple[httpx.Request, asyncio.Future]],
+                          transport: httpx.AsyncBaseTransport) -> None:
+        origin, version, authorization = key
+        body = {"requests": [self._sub_request(str(index), request, version) for index, (request, _) in enumerate(entries)]}
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if authorization:
+            headers["Authorization"] = authorization
+        # a fresh request, the callers' per-request options stay on their own requests
+        batch_request = httpx.Request("POST", f"{origin}/{version}/$batch", headers=headers, content=json.dumps(body).encode())
+        logger.debug(f"Sending $batch of {len(entries)} requests")
+        try:
+            response = await transport.handle_async_request(batch_request)
+            await response.aread()
+            if response.status_code != 200:
+                # whole envelope rejected (eg throttled), every caller sees the same status
+                headers = {name: value for name, value in response.headers.items()
+                           if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+                for request, future in entries:
+                    self._resolve(future, httpx.Response(response.status_code, headers=headers,
+                                                         content=response.content, request=request))
+                return
+            responses = {item.get("id"): item for item in response.json().get("responses", [])}
+            for index, (request, future) in enumerate(entries):
+                item = responses.get(str(index))
+                if item is None:
+                    self._fail(future, httpx.HTTPError(f"$batch response is missing sub-response {index}"))
+                else:
+                    self._resolve(future, self._sub_response(item, request))
+        except Exception as e:
+            for _, future in entries:
+                self._fail(future, e)
+
+    @staticmethod
+    def _sub_request(request_id: str, request: httpx.Request, version: str) -> dict:
+        url = request.url.raw_path.decode()
+        prefix = f"/{version}"
+        if url.startswith(prefix):
+            url = url[len(prefix):]
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _ENVELOPE_HEADERS}
+        sub_request = {"id": request_id, "method": request.method, "url": url}
+        if headers:
+            sub_request["headers"] = headers
+        return sub_request
+
+    @staticmethod
+    def _sub_response(item: dict, request: httpx.Request) -> httpx.Response:
+        headers = dict(item.get("headers") or {})
+        body = item.get("body")
+        if body is None:
+            content = b""
+        elif isinstance(body, (dict, list)):
+            content = json.dumps(body).encode()
+            headers.setdefault("Content-Type", "application/json")
+        elif "json" in headers.get("Content-Type", ""):
+            content = body.encode()
+        else:
+            # non-JSON bodies come back base64 encoded
+            content = base64.b64decode(body)
+        return httpx.Response(int(item.get("status", 500)), headers=headers, content=content, request=request)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, response: httpx.Response) -> None:
+        if not future.done():
+            future.set_result(response)
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: Exception) -> None:
+        if not future.done():
+            future.set_exception(error)
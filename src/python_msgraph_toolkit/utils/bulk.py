@@ -0,0 +1,184 @@
+"""
+python_msgraph_toolkit.utils.bulk
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Runs large numbers of service calls concurrently with bounded concurrency, per resource
+type limits and per item error collection.
+"""
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from ..services.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOURCE = "default"
+
+OperationFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class BulkOperation:
+    """A coroutine factory tagged with the resource type it counts against."""
+    factory: OperationFactory
+    resource: str = DEFAULT_RESOURCE
+
+
+@dataclass
+class BulkResult:
+    """Outcome of one bulk operation, `index` is the position of the operation in the input."""
+    index: int
+    resource: str = DEFAULT_RESOURCE
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+BulkInput = Union[OperationFactory, BulkOperation, Tuple[str, OperationFactory]]
+
+
+def _as_operation(item: BulkInput) -> BulkOperation:
+    if isinstance(item, BulkOperation):
+        return item
+    if isinstance(item, tuple) and len(item) == 2 and callable(item[1]):
+        return BulkOperation(factory=item[1], resource=item[0])
+    if callable(item):
+        return BulkOperation(factory=item)
+    raise ValidationError("Bulk operations must be coroutine factories, (resource, factory) tuples or BulkOperation")
+
+
+class BulkExecutor:
+    """
+    Runs coroutine factories concurrently and streams back a BulkResult for each one.
+
+    Operations are pulled from the input lazily, so iterables of millions of operations run
+    in constant memory. A failing operation produces a BulkResult with `error` set instead of
+    ending the run.
+
+    #### Args:
+        concurrency (int): Maximum operations running at once across all resource types (default 10)
+        limits (Dict[str, int], optional): Maximum operations running at once per resource type,
+            eg {"drive": 4, "mailbox": 2}. Resource types without a limit are only bound by `concurrency`
+        resource_limit (int, optional): Maximum operations running at once for each resource type not in `limits`,
+            for resources only known as operations arrive, eg one per mailbox
+        ordered (bool): Yield results in input order instead of as they complete (default False)
+        window (int, optional): Maximum operations scheduled but not yet yielded, bounds memory when
+            ordered results are held back by a slow operation (default 4 x concurrency)
+
+    #### Example:
+        >>> executor = BulkExecutor(concurrency=20, limits={"drive": 4})
+        >>> operations = (
+        ...     ("drive", partial(client.sharepoint.files.delete_item, drive_id=drive_id, item_id=item_id))
+        ...     for item_id in item_ids
+        ... )
+        >>> async for result in executor.run(operations):
+        ...     if not result.ok:
+        ...         print(f"{result.index} failed: {result.error}")
+    """
+    def __init__(self, concurrency: int = 10, limits: Optional[Dict[str, int]] = None,
+                 ordered: bool = False, window: Optional[int] = None, resource_limit: Optional[int] = None):
+        if concurrency < 1:
+            raise ValidationError("concurrency must be at least 1")
+        if limits and any(limit < 1 for limit in limits.values()):
+            raise ValidationError("Resource limits must be at least 1")
+        if resource_limit is not None and resource_limit < 1:
+            raise ValidationError("Resource limits must be at least 1")
+        self.concurrency = concurrency
+        self.limits = dict(limits or {})
+        self.resource_limit = resource_limit
+        self.ordered = ordered
+        self.window = window or concurrency * 4
+
+    async def _operations(self, operations: Union[Iterable[BulkInput], AsyncIterable[BulkInput]]) -> AsyncIterator[BulkOperation]:
+        if hasattr(operations, "__aiter__"):
+            async for item in operations: # type: ignore[union-attr]
+                yield _as_operation(item)
+        else:
+            for item in operations: # type: ignore[union-attr]
+                yield _as_operation(item)
+
+    async def run(self, operations: Union[Iterable[BulkInput], AsyncIterable[BulkInput]]) -> AsyncIterator[BulkResult]:
+        """Yields a BulkResult per operation, as they complete or in input order when `ordered`."""
+        running = asyncio.Semaphore(self.concurrency)
+        window = asyncio.Semaphore(self.window)
+        resource_limits = {resource: asyncio.Semaphore(limit) for resource, limit in self.limits.items()}
+        results: asyncio.Queue = asyncio.Queue()
+        tasks: set = set()
+        total: Dict[str, Optional[int]] = {"count": None}
+
+        async def execute(index: int, operation: BulkOperation) -> None:
+            result = BulkResult(index=index, resource=operation.resource)
+            resource_limit = resource_limits.get(operation.resource)
+            if resource_limit is None and self.resource_limit:
+                resource_limit = resource_limits[operation.resource] = asyncio.Semaphore(self.resource_limit)
+            try:
+                if resource_limit:
+                    await resource_limit.acquire()
+                try:
+                    async with running:
+                        outcome = operation.factory()
+                        result.value = await outcome if inspect.isawaitable(outcome) else outcome
+                finally:
+                    if resource_limit:
+                        resource_limit.release()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Bulk operation {index} failed: {e}")
+                result.error = e
+            await results.put(result)
+
+        async def produce() -> None:
+            count = 0
+            try:
+                async for operation in self._operations(operations):
+                    await window.acquire()
+                    task = asyncio.ensure_future(execute(count, operation))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    count += 1
+            finally:
+                total["count"] = count
+                await results.put(None) # wakes the consumer so it can notice the input is exhausted
+
+        producer = asyncio.ensure_future(produce())
+        yielded = 0
+        buffered: Dict[int, BulkResult] = {}
+        try:
+            while total["count"] is None or yielded < total["count"]:
+                result = await results.get()
+                if result is None:
+                    self._raise_source_error(producer)
+                    continue
+                if not self.ordered:
+                    window.release()
+                    yielded += 1
+                    yield result
+                    continue
+                buffered[result.index] = result
+                while yielded in buffered:
+                    window.release()
+                    ready = buffered.pop(yielded)
+                    yielded += 1
+                    yield ready
+            self._raise_source_error(producer)
+        finally:
+            producer.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    @staticmethod
+    def _raise_source_error(producer: asyncio.Future) -> None:
+        """Errors raised while reading the input end the run, unlike errors raised by operations."""
+        if producer.done() and not producer.cancelled() and producer.exception():
+            raise producer.exception() # type: ignore[misc]
+
+    async def collect(self, operations: Union[Iterable[BulkInput], AsyncIterable[BulkInput]]) -> List[BulkResult]:
+        """Runs every operation and returns all results in input order."""
+        results = [result async for result in self.run(operations)]
+        return sorted(results, key=lambda result: result.index)
@@ -0,0 +1,301 @@
+"""
+python_msgraph_toolkit.utils.cache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Response cache for read methods that are called repeatedly with the same arguments.
+
+Service methods opt in with the ``cached`` decorator and read through the ResponseCache
+passed to their service (``GraphClient(cache=ResponseCache())``). Entries expire after a per
+method TTL and the least recently used entries are evicted once the cache holds too many
+entries or too many bytes. Concurrent misses for the same key share one request.
+"""
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic, time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from kiota_abstractions.serialization import Parsable
+from ..services.exceptions import ValidationError
+from .serialization import dump_model, parse_model
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def encode_value(value: Any) -> bytes:
+    """Serializes an SDK model, a list of SDK models or plain JSON data for storage."""
+    if isinstance(value, Parsable):
+        return json.dumps({"model": _model_path(value), "data": json.loads(dump_model(value))}).encode()
+    if isinstance(value, list) and value and all(isinstance(item, Parsable) for item in value):
+        return json.dumps({
+            "model": _model_path(value[0]),
+            "items": [json.loads(dump_model(item)) for item in value],
+        }).encode()
+    return json.dumps({"json": value}).encode()
+
+
+def decode_value(content: bytes) -> Any:
+    """The inverse of encode_value."""
+    envelope = json.loads(content)
+    if "json" in envelope:
+        return envelope["json"]
+    module_name, _, class_name = envelope["model"].rpartition(".")
+    model = getattr(importlib.import_module(module_name), class_name)
+    if "items" in envelope:
+        return [parse_model(json.dumps(item).encode(), model) for item in envelope["items"]]
+    return parse_model(json.dumps(envelope["data"]).encode(), model)
+
+
+def _model_path(value: Parsable) -> str:
+    return f"{type(value).__module__}.{type(value).__qualname__}"
+
+
+class CacheBackend(ABC):
+    """Storage for cache entries, responsible for expiry and LRU eviction. Subclass to store them elsewhere."""
+    @abstractmethod
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns (True, value) for a live entry, (False, None) otherwise."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Stores `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def invalidate(self, prefix: str = "") -> None:
+        """Drops every entry whose key starts with `prefix`, all entries by default."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Keeps live objects in memory, their size is estimated from their serialized form on insert.
+
+    #### Args:
+        max_entries (int): Entries kept before the least recently used are evicted (default 4096)
+        max_bytes (int): Approximate bytes kept before the least recently used are evicted (default 64 MiB)
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValidationError("Cache limits must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value, _ = entry
+        if expires <= monotonic():
+            self._remove(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        size = len(encode_value(value))
+        if size > self.max_bytes:
+            return # would evict everything else and still not fit
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (monotonic() + ttl, value, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, prefix: str = "") -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self.size -= size
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Keeps serialized entries in a SQLite database so they survive restarts and can be shared
+    between processes.
+
+    #### Args:
+        path (str | PathLike): Database file, created if missing
+        max_entries (int): Entries kept before the least recently used are evicted (default 4096)
+        max_bytes (int): Bytes kept before the least recently used are evicted (default 64 MiB)
+    """
+    def __init__(self, path: Union[str, os.PathLike], max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValidationError("Cache limits must be positive")
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS cache_entries ("
+                               "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                               "expires REAL NOT NULL, accessed REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        connection = self._connect()
+        try:
+            with connection:
+                row = connection.execute("SELECT value, expires FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= time():
+                    connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    return None
+                connection.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (time(), key))
+                return row[0]
+        finally:
+            connection.close()
+
+    def _set(self, key: str, content: bytes, ttl: float) -> None:
+        now = time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO cache_entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                                   (key, content, len(content), now + ttl, now))
+                connection.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+                count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+                while count > self.max_entries or size > self.max_bytes:
+                    oldest = connection.execute("SELECT key, size FROM cache_entries ORDER BY accessed LIMIT 1").fetchone()
+                    if oldest is None:
+                        break
+                    connection.execute("DELETE FROM cache_entries WHERE key = ?", (oldest[0],))
+                    count, size = count - 1, size - oldest[1]
+        finally:
+            connection.close()
+
+    def _invalidate(self, prefix: str) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                connection.execute("DELETE FROM cache_entries WHERE key LIKE ? ESCAPE '\\'", (f"{escaped}%",))
+        finally:
+            connection.close()
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        content = await asyncio.to_thread(self._get, key)
+        if content is None:
+            return False, None
+        return True, decode_value(content)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        content = encode_value(value)
+        if len(content) > self.max_bytes:
+            return
+        await asyncio.to_thread(self._set, key, content, ttl)
+
+    async def invalidate(self, prefix: str = "") -> None:
+        await asyncio.to_thread(self._invalidate, prefix)
+
+
+class ResponseCache:
+    """
+    Read-through cache shared by the services of a GraphClient.
+
+    #### Args:
+        backend (CacheBackend, optional): Where entries are kept (default MemoryCacheBackend())
+        default_ttl (float): Seconds an entry lives when neither `ttls` nor the method set one (default 300)
+        ttls (Dict[str, float], optional): TTL per method, keyed by 'Service.method', eg {"SitesService.get_site_by_id": 3600}
+
+    #### Example:
+        >>> cache = ResponseCache(SqliteCacheBackend("graph-cache.db"), ttls={"UserService.get_user": 900})
+        >>> client = GraphClient(tenant_id, client_id, secret, cache=cache)
+    """
+    def __init__(self, backend: Optional[CacheBackend] = None, default_ttl: float = DEFAULT_TTL,
+                 ttls: Optional[Dict[str, float]] = None):
+        if default_ttl <= 0:
+            raise ValidationError("default_ttl must be positive")
+        self.backend = backend or MemoryCacheBackend()
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def ttl_for(self, name: str, ttl: Optional[float] = None) -> float:
+        return self.ttls.get(name) or ttl or self.default_ttl
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Returns the cached value for `key`, calling `loader` on a miss.
+
+        Callers that miss while a load for the same key is running wait for that load instead of
+        starting their own. None results and errors are not cached.
+        """
+        found, value = await self.backend.get(key)
+        if found:
+            self.hits += 1
+            return value
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shielded so one caller giving up doesn't cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        value = await loader()
+        if value is not None:
+            try:
+                await self.backend.set(key, value, ttl)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Could not cache {key}: {e}")
+        return value
+
+    async def invalidate(self, prefix: str = "") -> None:
+        """Drops cached entries whose key starts with `prefix`, eg 'FileService.', or everything."""
+        await self.backend.invalidate(prefix)
+
+
+def cache_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    arguments = json.dumps([list(args), kwargs], sort_keys=True, default=str, separators=(",", ":"))
+    return f"{name}:{arguments}"
+
+
+def cached(ttl: Optional[float] = None):
+    """
+    Caches the result of an async service method in the service's `_cache` (a ResponseCache).
+
+    Methods of services created without a cache are called as usual. Pass `use_cache=False`
+    to bypass the cache for one call.
+
+    #### Args:
+        ttl (float, optional): Default TTL of the method, ResponseCache(ttls=...) takes precedence
+    """
+    def decorator(method):
+        name = method.__qualname__
+
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache: Optional[ResponseCache] = getattr(self, "_cache", None)
+            if not kwargs.pop("use_cache", True) or cache is None:
+                return await method(self, *args, **kwargs)
+            return await cache.get_or_load(
+                cache_key(name, args, kwargs),
+                lambda: method(self, *args, **kwargs),
+                cache.ttl_for(name, ttl),
+            )
+        return wrapper
+    return decorator
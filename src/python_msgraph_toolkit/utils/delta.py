@@ -0,0 +1,601 @@
+"""
+python_msgraph_toolkit.utils.delta
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Incremental synchronisation with Graph delta queries.
+
+The first sync enumerates the whole collection and ends with an ``@odata.deltaLink``. That
+link is saved to a DeltaStore and the next sync requests it instead, receiving only what
+was added, changed or deleted in between.
+
+``sync_mirror`` additionally applies every page to a DeltaMirror, a local copy of the
+collection as compact JSON records, and checkpoints the ``@odata.nextLink`` after each page so
+an interrupted sync resumes where it stopped instead of starting over.
+
+https://learn.microsoft.com/en-us/graph/delta-query-overview
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Union
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from ..services.exceptions import GraphAPIError
+from .pagination import PageIterator
+from .serialization import dump_model
+
+logger = logging.getLogger(__name__)
+
+RESYNC_STATUS_CODE = 410 # delta link expired or invalidated, a full sync is required
+
+
+@dataclass
+class DeltaCursor:
+    """
+    Where the next sync of a collection starts from, and when the sync that produced it started.
+
+    A cursor saved part way through a sync is not `complete`, its link is the next page of
+    that sync and `full_sync` records whether the interrupted sync was a full one.
+    """
+    link: str
+    synced_at: datetime
+    complete: bool = True
+    full_sync: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"link": self.link, "synced_at": self.synced_at.isoformat(), "complete": self.complete, "full_sync": self.full_sync}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DeltaCursor":
+        return cls(
+            link=data["link"],
+            synced_at=datetime.fromisoformat(data["synced_at"]),
+            complete=data.get("complete", True),
+            full_sync=data.get("full_sync", False),
+        )
+
+
+WATERMARKS_KEY = "@watermarks" # JsonFileDeltaStore section holding watermarks, apart from cursors
+
+
+class DeltaStore(ABC):
+    """
+    Persists delta cursors by key, eg 'drive:{drive_id}'. Subclass to store them elsewhere.
+
+    Collections without a delta query are read incrementally from a watermark instead, the
+    newest modification time seen so far. Watermarks are kept apart from cursors, a key can
+    have one of each.
+    """
+    @abstractmethod
+    async def load(self, key: str) -> Optional[DeltaCursor]:
+        """Returns the cursor saved under `key`, None if there is none."""
+
+    @abstractmethod
+    async def save(self, key: str, cursor: DeltaCursor) -> None:
+        """Saves `cursor` under `key`, replacing the previous one."""
+
+    @abstractmethod
+    async def clear(self, key: str) -> None:
+        """Forgets the cursor saved under `key`, the next sync is a full sync."""
+
+    @abstractmethod
+    async def load_watermark(self, key: str) -> Optional[datetime]:
+        """Returns the watermark saved under `key`, None if there is none."""
+
+    @abstractmethod
+    async def save_watermark(self, key: str, watermark: datetime) -> None:
+        """Saves the watermark of `key`, replacing the previous one."""
+
+
+class MemoryDeltaStore(DeltaStore):
+    """Keeps cursors for the lifetime of the process."""
+    def __init__(self):
+        self._cursors: Dict[str, DeltaCursor] = {}
+        self._watermarks: Dict[str, datetime] = {}
+
+    async def load(self, key: str) -> Optional[DeltaCursor]:
+        return self._cursors.get(key)
+
+    async def save(self, key: str, cursor: DeltaCursor) -> None:
+        self._cursors[key] = cursor
+
+    async def clear(self, key: str) -> None:
+        self._cursors.pop(key, None)
+
+    async def load_watermark(self, key: str) -> Optional[datetime]:
+        return self._watermarks.get(key)
+
+    async def save_watermark(self, key: str, watermark: datetime) -> None:
+        self._watermarks[key] = watermark
+
+
+class JsonFileDeltaStore(DeltaStore):
+    """
+    Keeps cursors in a JSON file, rewritten atomically on every save.
+
+    #### Args:
+        path (str | PathLike): File to read and write, created on first save
+    """
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        self._lock = asyncio.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(temporary, self.path)
+
+    async def load(self, key: str) -> Optional[DeltaCursor]:
+        data = await asyncio.to_thread(self._read)
+        return DeltaCursor.from_dict(data[key]) if key in data else None
+
+    async def save(self, key: str, cursor: DeltaCursor) -> None:
+        async with self._lock:
+            data = await asyncio.to_thread(self._read)
+            data[key] = cursor.to_dict()
+            await asyncio.to_thread(self._write, data)
+
+    async def clear(self, key: str) -> None:
+        async with self._lock:
+            data = await asyncio.to_thread(self._read)
+            if data.pop(key, None) is not None:
+                await asyncio.to_thread(self._write, data)
+
+    async def load_watermark(self, key: str) -> Optional[datetime]:
+        watermark = (await asyncio.to_thread(self._read)).get(WATERMARKS_KEY, {}).get(key)
+        return datetime.fromisoformat(watermark) if watermark else None
+
+    async def save_watermark(self, key: str, watermark: datetime) -> None:
+        async with self._lock:
+            data = await asyncio.to_thread(self._read)
+            data.setdefault(WATERMARKS_KEY, {})[key] = watermark.isoformat()
+            await asyncio.to_thread(self._write, data)
+
+
+class SqliteDeltaStore(DeltaStore):
+    """
+    Keeps cursors in a SQLite database, suited to many collections or several processes.
+
+    #### Args:
+        path (str | PathLike): Database file, created if missing
+    """
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        _sqlite_execute(self.path, "CREATE TABLE IF NOT EXISTS delta_cursors ("
+                        "key TEXT PRIMARY KEY, link TEXT NOT NULL, synced_at TEXT NOT NULL, "
+                        "complete INTEGER NOT NULL DEFAULT 1, full_sync INTEGER NOT NULL DEFAULT 0)")
+        _sqlite_execute(self.path, "CREATE TABLE IF NOT EXISTS delta_watermarks (key TEXT PRIMARY KEY, watermark TEXT NOT NULL)")
+
+    async def load(self, key: str) -> Optional[DeltaCursor]:
+        rows = await asyncio.to_thread(_sqlite_execute, self.path,
+                                       "SELECT link, synced_at, complete, full_sync FROM delta_cursors WHERE key = ?", (key,))
+        if not rows:
+            return None
+        link, synced_at, complete, full_sync = rows[0]
+        return DeltaCursor(link=link, synced_at=datetime.fromisoformat(synced_at), complete=bool(complete), full_sync=bool(full_sync))
+
+    async def save(self, key: str, cursor: DeltaCursor) -> None:
+        await asyncio.to_thread(
+            _sqlite_execute,
+            self.path,
+            "INSERT INTO delta_cursors (key, link, synced_at, complete, full_sync) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET link = excluded.link, synced_at = excluded.synced_at, "
+            "complete = excluded.complete, full_sync = excluded.full_sync",
+            (key, cursor.link, cursor.synced_at.isoformat(), int(cursor.complete), int(cursor.full_sync)),
+        )
+
+    async def clear(self, key: str) -> None:
+        await asyncio.to_thread(_sqlite_execute, self.path, "DELETE FROM delta_cursors WHERE key = ?", (key,))
+
+    async def load_watermark(self, key: str) -> Optional[datetime]:
+        rows = await asyncio.to_thread(_sqlite_execute, self.path,
+                                       "SELECT watermark FROM delta_watermarks WHERE key = ?", (key,))
+        return datetime.fromisoformat(rows[0][0]) if rows else None
+
+    async def save_watermark(self, key: str, watermark: datetime) -> None:
+        await asyncio.to_thread(
+            _sqlite_execute,
+            self.path,
+            "INSERT INTO delta_watermarks (key, watermark) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET watermark = excluded.watermark",
+            (key, watermark.isoformat()),
+        )
+
+
+def _sqlite_execute(path: str, statement: str, parameters: tuple = ()) -> List[tuple]:
+    """Runs one statement on its own connection, sqlite3 connections can't be shared across the worker threads."""
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            return connection.execute(statement, parameters).fetchall()
+    finally:
+        connection.close()
+
+
+class DeltaMirror(ABC):
+    """
+    Local copy of delta synced collections as compact JSON records, keyed by scope ('users',
+    'groups'...) and object id. Subclass to keep records elsewhere.
+    """
+    @abstractmethod
+    async def get(self, scope: str, object_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the record of `object_id`, None if the mirror doesn't hold it."""
+
+    @abstractmethod
+    def records(self, scope: str) -> AsyncIterator[Dict[str, Any]]:
+        """Streams every record of a scope."""
+
+    @abstractmethod
+    async def existing(self, scope: str, object_ids: List[str]) -> Set[str]:
+        """Returns the subset of `object_ids` the mirror holds."""
+
+    @abstractmethod
+    async def apply(self, scope: str, upserts: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        """Merges `upserts` into the existing records (delta pages may only carry changed properties) and drops `removed`."""
+
+    @abstractmethod
+    async def clear(self, scope: str) -> None:
+        """Drops every record of a scope."""
+
+    async def has_records(self, scope: str) -> bool:
+        """True if the scope holds at least one record. Override with a cheaper check where there is one."""
+        records = self.records(scope)
+        try:
+            async for _ in records:
+                return True
+            return False
+        finally:
+            if hasattr(records, "aclose"):
+                await records.aclose()
+
+
+class MemoryDeltaMirror(DeltaMirror):
+    """Keeps records for the lifetime of the process."""
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    async def get(self, scope: str, object_id: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(scope, {}).get(object_id)
+
+    async def records(self, scope: str) -> AsyncIterator[Dict[str, Any]]:
+        for record in list(self._records.get(scope, {}).values()):
+            yield record
+
+    async def existing(self, scope: str, object_ids: List[str]) -> Set[str]:
+        records = self._records.get(scope, {})
+        return {object_id for object_id in object_ids if object_id in records}
+
+    async def has_records(self, scope: str) -> bool:
+        return bool(self._records.get(scope))
+
+    async def apply(self, scope: str, upserts: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        records = self._records.setdefault(scope, {})
+        for object_id, record in upserts.items():
+            records[object_id] = {**records.get(object_id, {}), **record}
+        for object_id in removed:
+            records.pop(object_id, None)
+
+    async def clear(self, scope: str) -> None:
+        self._records.pop(scope, None)
+
+
+class SqliteDeltaMirror(DeltaMirror):
+    """
+    Keeps records in a SQLite database, each page of a sync is applied in one transaction.
+
+    #### Args:
+        path (str | PathLike): Database file, created if missing. Can be the same file as a SqliteDeltaStore
+        page_size (int): Records read per query when iterating a scope (default 1000)
+    """
+    def __init__(self, path: Union[str, os.PathLike], page_size: int = 1000):
+        self.path = os.fspath(path)
+        self.page_size = page_size
+        _sqlite_execute(self.path, "CREATE TABLE IF NOT EXISTS delta_records ("
+                        "scope TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (scope, id))")
+
+    async def get(self, scope: str, object_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(_sqlite_execute, self.path,
+                                       "SELECT data FROM delta_records WHERE scope = ? AND id = ?", (scope, object_id))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def records(self, scope: str) -> AsyncIterator[Dict[str, Any]]:
+        last_id = ""
+        while True:
+            rows = await asyncio.to_thread(
+                _sqlite_execute, self.path,
+                "SELECT id, data FROM delta_records WHERE scope = ? AND id > ? ORDER BY id LIMIT ?",
+                (scope, last_id, self.page_size),
+            )
+            for object_id, data in rows:
+                last_id = object_id
+                yield json.loads(data)
+            if len(rows) < self.page_size:
+                return
+
+    async def existing(self, scope: str, object_ids: List[str]) -> Set[str]:
+        found: Set[str] = set()
+        for start in range(0, len(object_ids), 500): # stay under SQLite's bound parameter limit
+            chunk = object_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = await asyncio.to_thread(_sqlite_execute, self.path,
+                                           f"SELECT id FROM delta_records WHERE scope = ? AND id IN ({placeholders})",
+                                           (scope, *chunk))
+            found.update(row[0] for row in rows)
+        return found
+
+    async def has_records(self, scope: str) -> bool:
+        rows = await asyncio.to_thread(_sqlite_execute, self.path,
+                                       "SELECT 1 FROM delta_records WHERE scope = ? LIMIT 1", (scope,))
+        return bool(rows)
+
+    def _apply(self, scope: str, upserts: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        connection = sqlite3.connect(self.path)
+        try:
+            with connection:
+                for object_id, record in upserts.items():
+                    row = connection.execute("SELECT data FROM delta_records WHERE scope = ? AND id = ?", (scope, object_id)).fetchone()
+                    merged = {**json.loads(row[0]), **record} if row else record
+                    connection.execute("INSERT OR REPLACE INTO delta_records (scope, id, data) VALUES (?, ?, ?)",
+                                       (scope, object_id, json.dumps(merged, separators=(",", ":"))))
+                connection.executemany("DELETE FROM delta_records WHERE scope = ? AND id = ?",
+                                       [(scope, object_id) for object_id in removed])
+        finally:
+            connection.close()
+
+    async def apply(self, scope: str, upserts: Dict[str, Dict[str, Any]], removed: List[str]) -> None:
+        await asyncio.to_thread(self._apply, scope, upserts, removed)
+
+    async def clear(self, scope: str) -> None:
+        await asyncio.to_thread(_sqlite_execute, self.path, "DELETE FROM delta_records WHERE scope = ?", (scope,))
+
+
+@dataclass
+class DeltaResult:
+    """
+    Changes since the previous sync. On a full sync (no cursor yet, or the cursor expired)
+    every existing item is reported as added. `sync_mirror` reports object ids rather than items.
+    """
+    added: List[Any] = field(default_factory=list)
+    changed: List[Any] = field(default_factory=list)
+    deleted: List[Any] = field(default_factory=list)
+    full_sync: bool = False
+    delta_link: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.deleted)
+
+
+def is_removed(item: Any) -> bool:
+    """Deleted items carry a `deleted` facet (drive items) or an `@removed` annotation (directory objects, messages)."""
+    if getattr(item, "deleted", None) is not None:
+        return True
+    additional_data = getattr(item, "additional_data", None)
+    return isinstance(additional_data, dict) and "@removed" in additional_data
+
+
+ADDED = "added"
+CHANGED = "changed"
+DELETED = "deleted"
+
+
+@dataclass
+class DeltaChange:
+    """One change reported by a delta query, `kind` is ADDED, CHANGED or DELETED."""
+    kind: str
+    item: Any
+
+
+class DeltaChanges:
+    """
+    Async iterator over the changes to a collection since the previous sync, page by page.
+
+    The new cursor is saved once the last page has been consumed. A consumer that stops early
+    (or crashes) gets the same changes again on the next sync, so delivery is at least once and
+    an item may be reported more than once, its last report reflecting its current state.
+    `full_sync` and `delta_link` are set while iterating.
+
+    #### Args:
+        request_builder: kiota delta request builder (eg `drives.by_drive_id(id).items.by_drive_item_id("root").delta`)
+        store (DeltaStore): Where the cursor for `key` is loaded from and saved to
+        key (str): Identifies the collection in the store
+        service_name (str): Service name used when translating errors
+        request_configuration (RequestConfiguration, optional): Configuration for a full sync ($select etc),
+            later syncs reuse the query encoded in the delta link and only carry over its headers
+        is_removed (Callable, optional): Returns True for items that report a deletion, default `is_removed`
+    """
+    def __init__(self, request_builder, store: DeltaStore, key: str, service_name: str = "Graph API",
+                 request_configuration=None, is_removed: Callable[[Any], bool] = is_removed):
+        self._request_builder = request_builder
+        self._store = store
+        self._key = key
+        self._service_name = service_name
+        self._request_configuration = request_configuration
+        self._is_removed = is_removed
+        self.full_sync: bool = False
+        self.delta_link: Optional[str] = None
+
+    async def _first_page(self, cursor: Optional[DeltaCursor]):
+        pages = _delta_pages(self._request_builder, cursor, self._service_name, self._request_configuration)
+        page_iterator = pages.pages()
+        try:
+            return pages, page_iterator, await page_iterator.__anext__()
+        except StopAsyncIteration:
+            return pages, page_iterator, None
+
+    async def __aiter__(self) -> AsyncIterator[DeltaChange]:
+        cursor = await self._store.load(self._key)
+        if cursor and not cursor.complete:
+            cursor = None # left behind by sync_mirror, a plain sync has no mirror to resume into
+        started_at = datetime.now(timezone.utc)
+        try:
+            pages, page_iterator, page = await self._first_page(cursor)
+        except GraphAPIError as e:
+            if cursor is None or e.status_code != RESYNC_STATUS_CODE:
+                raise
+            logger.warning(f"Delta link for {self._key} has expired, running a full sync")
+            await self._store.clear(self._key)
+            cursor = None
+            pages, page_iterator, page = await self._first_page(None)
+        self.full_sync = cursor is None
+
+        try:
+            while page is not None:
+                for item in page:
+                    if self._is_removed(item):
+                        if cursor:
+                            yield DeltaChange(DELETED, item)
+                    elif cursor is None or _created_since(item, cursor.synced_at):
+                        yield DeltaChange(ADDED, item)
+                    else:
+                        yield DeltaChange(CHANGED, item)
+                page = await page_iterator.__anext__() if pages.next_link else None
+        finally:
+            await page_iterator.aclose() # cancels a prefetched page when the consumer stops early
+
+        self.delta_link = pages.delta_link
+        if pages.delta_link:
+            await self._store.save(self._key, DeltaCursor(link=pages.delta_link, synced_at=started_at))
+        else:
+            logger.warning(f"Delta query for {self._key} returned no delta link, the next sync will be a full sync")
+
+
+async def sync_delta(request_builder, store: DeltaStore, key: str, service_name: str = "Graph API",
+                     request_configuration=None, is_removed: Callable[[Any], bool] = is_removed) -> DeltaResult:
+    """
+    Runs one delta sync of a collection and saves the cursor for the next one.
+
+    Takes the same arguments as DeltaChanges and collects its changes, reporting each item
+    once in its final state.
+
+    #### Returns:
+        DeltaResult: Items added, changed and deleted since the previous sync
+    """
+    changes = DeltaChanges(request_builder, store, key, service_name, request_configuration, is_removed)
+    latest: Dict[Any, DeltaChange] = {}
+    async for change in changes:
+        object_id = getattr(change.item, "id", None) or id(change.item)
+        previous = latest.pop(object_id, None)
+        if change.kind == CHANGED and previous is not None and previous.kind == ADDED:
+            change = DeltaChange(ADDED, change.item) # still new to the caller
+        latest[object_id] = change
+
+    result = DeltaResult(full_sync=changes.full_sync, delta_link=changes.delta_link)
+    for change in latest.values():
+        getattr(result, change.kind).append(change.item)
+    return result
+
+
+def _delta_pages(request_builder, cursor: Optional[DeltaCursor], service_name: str, request_configuration) -> PageIterator:
+    if cursor:
+        headers_only = None
+        if request_configuration and (request_configuration.headers or request_configuration.options):
+            headers_only = RequestConfiguration(headers = request_configuration.headers, options = request_configuration.options)
+        return PageIterator(request_builder.with_url(cursor.link), headers_only, service_name=service_name)
+    return PageIterator(request_builder, request_configuration, service_name=service_name)
+
+
+def _created_since(item: Any, since: datetime) -> bool:
+    created = getattr(item, "created_date_time", None)
+    if not isinstance(created, datetime):
+        return False
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created >= since
+
+
+def compact_record(item: Any) -> Dict[str, Any]:
+    """Returns the properties Graph sent for an SDK model as a JSON dict, without @odata / @removed annotations."""
+    record = json.loads(dump_model(item))
+    return {name: value for name, value in record.items() if not name.startswith("@")}
+
+
+async def sync_mirror(request_builder, store: DeltaStore, mirror: DeltaMirror, key: str, service_name: str = "Graph API",
+                      request_configuration=None, is_removed: Callable[[Any], bool] = is_removed) -> DeltaResult:
+    """
+    Runs one delta sync of a collection into a DeltaMirror.
+
+    Every page is applied to the mirror as it arrives and the next page link is checkpointed,
+    so memory stays at one page and a sync interrupted by a crash resumes from the last applied
+    page. A full sync clears the mirror's scope first so records deleted while no delta link
+    was held don't linger. A cursor whose mirror scope is empty (a persistent store paired with
+    a mirror that was lost, eg a MemoryDeltaMirror after a restart) is ignored and a full sync
+    runs instead, so the mirror is never left holding only the latest changes.
+
+    #### Args:
+        request_builder: kiota delta request builder (eg `users.delta`)
+        store (DeltaStore): Where the cursor and checkpoints for `key` are kept
+        mirror (DeltaMirror): Where records are kept, `key` is used as the mirror scope
+        key (str): Identifies the collection in the store and the mirror
+        service_name (str): Service name used when translating errors
+        request_configuration (RequestConfiguration, optional): Configuration for a full sync, use $select
+            to keep records compact
+        is_removed (Callable, optional): Returns True for items that report a deletion, default `is_removed`
+
+    #### Returns:
+        DeltaResult: ids of the records added, changed and deleted by this sync
+    """
+    cursor = await store.load(key)
+    if cursor is not None and not await mirror.has_records(key):
+        logger.warning(f"Mirror of {key} is empty but the store has a cursor for it, running a full sync")
+        cursor = None
+    try:
+        return await _run_mirror(request_builder, store, mirror, key, cursor, service_name, request_configuration, is_removed)
+    except GraphAPIError as e:
+        if cursor is None or e.status_code != RESYNC_STATUS_CODE:
+            raise
+        logger.warning(f"Delta link for {key} has expired, running a full sync")
+        await store.clear(key)
+        return await _run_mirror(request_builder, store, mirror, key, None, service_name, request_configuration, is_removed)
+
+
+async def _run_mirror(request_builder, store, mirror, key, cursor, service_name, request_configuration, is_removed) -> DeltaResult:
+    if cursor is None:
+        full_sync, started_at = True, datetime.now(timezone.utc)
+        await mirror.clear(key)
+    elif cursor.complete:
+        full_sync, started_at = False, datetime.now(timezone.utc)
+    else:
+        logger.info(f"Resuming interrupted delta sync of {key}")
+        full_sync, started_at = cursor.full_sync, cursor.synced_at
+
+    result = DeltaResult(full_sync=full_sync)
+    pages = _delta_pages(request_builder, cursor, service_name, request_configuration)
+    async for page in pages.pages():
+        upserts: Dict[str, Dict[str, Any]] = {}
+        removed: List[str] = []
+        for item in page:
+            object_id = getattr(item, "id", None)
+            if not object_id:
+                continue
+            if is_removed(item):
+                upserts.pop(object_id, None)
+                removed.append(object_id)
+            else:
+                upserts[object_id] = compact_record(item)
+        known = await mirror.existing(key, list(upserts))
+        await mirror.apply(key, upserts, removed)
+        result.added.extend(object_id for object_id in upserts if object_id not in known)
+        result.changed.extend(object_id for object_id in upserts if object_id in known)
+        result.deleted.extend(removed)
+        if pages.next_link:
+            await store.save(key, DeltaCursor(link=pages.next_link, synced_at=started_at, complete=False, full_sync=full_sync))
+
+    result.delta_link = pages.delta_link
+    if pages.delta_link:
+        await store.save(key, DeltaCursor(link=pages.delta_link, synced_at=started_at))
+    else:
+        logger.warning(f"Delta query for {key} returned no delta link, the next sync will be a full sync")
+        await store.clear(key)
+    return result
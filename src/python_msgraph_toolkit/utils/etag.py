@@ -0,0 +1,166 @@
+"""
+python_msgraph_toolkit.utils.etag
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Conditional GETs for single resources (drive items, events, messages).
+
+The ETag and the model of every fetched resource are kept in an ETagStore. Later reads of
+the same resource send ``If-None-Match``; when Graph answers ``304 Not Modified`` (which the
+SDK surfaces as a None result) the stored model is returned, saving the body transfer and
+its deserialization.
+"""
+import asyncio
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import time
+from typing import Any, Optional, Union
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from ..services.exceptions import ValidationError
+from .cache import decode_value, encode_value
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+@dataclass
+class ETagEntry:
+    etag: str
+    value: Any
+
+
+def etag_of(value: Any) -> Optional[str]:
+    """Returns the ETag of an SDK model, from `eTag` (drive items) or the `@odata.etag` annotation."""
+    etag = getattr(value, "e_tag", None)
+    if isinstance(etag, str) and etag:
+        return etag
+    additional_data = getattr(value, "additional_data", None)
+    if isinstance(additional_data, dict):
+        etag = additional_data.get("@odata.etag")
+        if isinstance(etag, str) and etag:
+            return etag
+    return None
+
+
+class ETagStore(ABC):
+    """Keeps the latest ETag and model per resource key. Subclass to store them elsewhere."""
+    @abstractmethod
+    async def get(self, key: str) -> Optional[ETagEntry]:
+        """Returns the entry saved under `key`, None if there is none."""
+
+    @abstractmethod
+    async def set(self, key: str, etag: str, value: Any) -> None:
+        """Saves the ETag and model of `key`, replacing the previous entry."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Forgets the entry saved under `key`."""
+
+
+class MemoryETagStore(ETagStore):
+    """
+    Keeps live models in memory, a 304 costs no deserialization at all.
+
+    #### Args:
+        max_entries (int): Resources kept before the least recently used are dropped (default 10,000)
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValidationError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ETagEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[ETagEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, etag: str, value: Any) -> None:
+        self._entries[key] = ETagEntry(etag, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SqliteETagStore(ETagStore):
+    """
+    Keeps ETags and serialized models in a SQLite database so revalidation survives restarts.
+
+    #### Args:
+        path (str | PathLike): Database file, created if missing
+        max_entries (int): Resources kept before the least recently used are dropped (default 10,000)
+    """
+    def __init__(self, path: Union[str, os.PathLike], max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValidationError("max_entries must be at least 1")
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self._execute("CREATE TABLE IF NOT EXISTS etags (key TEXT PRIMARY KEY, etag TEXT NOT NULL, "
+                      "body BLOB NOT NULL, accessed REAL NOT NULL)")
+
+    def _execute(self, statement: str, parameters: tuple = ()) -> list:
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                return connection.execute(statement, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def _set(self, key: str, etag: str, body: bytes) -> None:
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO etags (key, etag, body, accessed) VALUES (?, ?, ?, ?)",
+                                   (key, etag, body, time()))
+                connection.execute("DELETE FROM etags WHERE key IN (SELECT key FROM etags ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                                   (self.max_entries,))
+        finally:
+            connection.close()
+
+    async def get(self, key: str) -> Optional[ETagEntry]:
+        rows = await asyncio.to_thread(self._execute, "UPDATE etags SET accessed = ? WHERE key = ? RETURNING etag, body",
+                                       (time(), key))
+        if not rows:
+            return None
+        return ETagEntry(rows[0][0], decode_value(rows[0][1]))
+
+    async def set(self, key: str, etag: str, value: Any) -> None:
+        await asyncio.to_thread(self._set, key, etag, encode_value(value))
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM etags WHERE key = ?", (key,))
+
+
+async def conditional_get(request_builder, store: Optional[ETagStore], key: str,
+                          request_configuration: Optional[RequestConfiguration] = None) -> Any:
+    """
+    GETs a single resource, revalidating the stored copy with `If-None-Match` when there is one.
+
+    Without a store this is a plain `request_builder.get()`. Errors are left to the caller.
+    """
+    if store is None:
+        if request_configuration:
+            return await request_builder.get(request_configuration = request_configuration)
+        return await request_builder.get()
+
+    entry = await store.get(key)
+    configuration = request_configuration or RequestConfiguration()
+    if entry:
+        configuration.headers.try_add("If-None-Match", entry.etag)
+    result = await request_builder.get(request_configuration = configuration)
+    if result is None:
+        return entry.value if entry else None # 304 Not Modified
+    etag = etag_of(result)
+    if etag:
+        await store.set(key, etag, result)
+    elif entry:
+        await store.delete(key)
+    return result
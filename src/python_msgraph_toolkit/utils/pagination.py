@@ -0,0 +1,115 @@
+"""
+python_msgraph_toolkit.utils.pagination
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Follows ``@odata.nextLink`` across Graph collection responses so list methods
+return every page instead of silently stopping after the first one.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, List, Optional
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from ..services.exceptions import graph_exception_handler
+
+logger = logging.getLogger(__name__)
+
+
+def _link(page: Any, attribute: str) -> Optional[str]:
+    """Returns the paging link on a response, ignoring anything that is not a url string."""
+    link = getattr(page, attribute, None)
+    return link if isinstance(link, str) and link else None
+
+
+class PageIterator:
+    """
+    Async iterator over every item of a paged Graph collection.
+
+    The first page is requested with the supplied request configuration, following pages
+    are requested from ``@odata.nextLink``. While the caller handles one page the next one
+    is already being fetched, so a full listing costs roughly one round trip per page
+    rather than one round trip plus the caller's processing time.
+
+    #### Args:
+        request_builder: kiota request builder for the collection (must expose ``get`` and ``with_url``)
+        request_configuration (RequestConfiguration, optional): configuration for the first request
+        service_name (str): service name used when translating errors
+        prefetch (bool): request the next page while the current one is being consumed (default True)
+
+    #### Example:
+        >>> async for user in PageIterator(client.users, service_name="Users"):
+        ...     print(user.display_name)
+        >>> async for page in PageIterator(client.users).pages():
+        ...     print(f"{len(page)} users")
+    """
+    def __init__(self, request_builder, request_configuration: Optional[RequestConfiguration] = None,
+                 service_name: str = "Graph API", prefetch: bool = True):
+        self._request_builder = request_builder
+        self._request_configuration = request_configuration
+        self._service_name = service_name
+        self._prefetch = prefetch
+        self.delta_link: Optional[str] = None
+        self.next_link: Optional[str] = None
+
+    def _follow_up_configuration(self) -> Optional[RequestConfiguration]:
+        """Headers and options carry over to next pages, query parameters are already in the link."""
+        if not self._request_configuration:
+            return None
+        return RequestConfiguration(
+            headers = self._request_configuration.headers,
+            options = self._request_configuration.options,
+        )
+
+    async def _get_first(self):
+        try:
+            if self._request_configuration:
+                return await self._request_builder.get(request_configuration = self._request_configuration)
+            return await self._request_builder.get()
+        except Exception as e:
+            graph_exception_handler(e, self._service_name)
+
+    async def _get_next(self, next_link: str):
+        try:
+            builder = self._request_builder.with_url(next_link)
+            configuration = self._follow_up_configuration()
+            if configuration:
+                return await builder.get(request_configuration = configuration)
+            return await builder.get()
+        except Exception as e:
+            graph_exception_handler(e, self._service_name)
+
+    async def pages(self) -> AsyncIterator[List[Any]]:
+        """Yields each page of results as a list, following ``@odata.nextLink`` until exhausted."""
+        page = await self._get_first()
+        pending: Optional[asyncio.Future] = None
+        try:
+            while page is not None:
+                self.next_link = _link(page, "odata_next_link")
+                self.delta_link = _link(page, "odata_delta_link") or self.delta_link
+                if self.next_link and self._prefetch:
+                    pending = asyncio.ensure_future(self._get_next(self.next_link))
+                yield list(page.value) if getattr(page, "value", None) else []
+                if not self.next_link:
+                    break
+                if pending is not None:
+                    page, pending = await pending, None
+                else:
+                    page = await self._get_next(self.next_link)
+        finally:
+            # caller stopped early, don't leave the prefetched page running
+            if pending is not None:
+                if not pending.done():
+                    pending.cancel()
+                elif not pending.cancelled():
+                    pending.exception()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async for page in self.pages():
+            for item in page:
+                yield item
+
+    async def collect(self) -> List[Any]:
+        """Returns every item across all pages as a single list."""
+        items: List[Any] = []
+        async for page in self.pages():
+            items.extend(page)
+        return items
@@ -0,0 +1,254 @@
+"""
+python_msgraph_toolkit.utils.query
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+OData query options ($select, $filter, $orderby, $top, $count, $expand) shared by every
+list and get method.
+
+Graph returns every default property of an object unless told otherwise, selecting the
+two or three fields a job needs shrinks both the response and the time spent deserializing
+it. Fields can be named as Graph spells them or through `F`, which turns Python attribute
+names into Graph paths and comparisons into filter expressions.
+
+https://learn.microsoft.com/en-us/graph/query-parameters
+"""
+import dataclasses
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Dict, Optional, Sequence, Union
+from urllib.parse import quote, urlencode
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from ..services.exceptions import ValidationError
+
+
+def _graph_name(attribute: str) -> str:
+    """display_name -> displayName, from_ -> from."""
+    head, *rest = attribute.rstrip("_").split("_")
+    return head + "".join(part[:1].upper() + part[1:] for part in rest)
+
+
+def format_value(value: Any) -> str:
+    """Formats a Python value as an OData literal."""
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(timespec="seconds") + "Z"
+    if isinstance(value, date):
+        return value.isoformat()
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+@dataclasses.dataclass(frozen=True)
+class Filter:
+    """An OData filter expression, combined with `&`, `|` and `~` (and, or, not)."""
+    expression: str
+
+    def __and__(self, other: "FilterLike") -> "Filter":
+        return Filter(f"({self}) and ({other})")
+
+    def __or__(self, other: "FilterLike") -> "Filter":
+        return Filter(f"({self}) or ({other})")
+
+    def __invert__(self) -> "Filter":
+        return Filter(f"not ({self})")
+
+    def __str__(self) -> str:
+        return self.expression
+
+
+FilterLike = Union[Filter, str]
+
+
+class Field:
+    """
+    A property path, `F.from_.email_address.address` is 'from/emailAddress/address'.
+
+    Comparisons build filters, `F.department == "Sales"` is "department eq 'Sales'".
+    """
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __getattr__(self, attribute: str) -> "Field":
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        return Field(f"{self.path}/{_graph_name(attribute)}")
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"Field({self.path!r})"
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def _compare(self, operator: str, value: Any) -> Filter:
+        return Filter(f"{self.path} {operator} {format_value(value)}")
+
+    def __eq__(self, value: Any) -> Filter: # type: ignore[override]
+        return self._compare("eq", value)
+
+    def __ne__(self, value: Any) -> Filter: # type: ignore[override]
+        return self._compare("ne", value)
+
+    def __gt__(self, value: Any) -> Filter:
+        return self._compare("gt", value)
+
+    def __ge__(self, value: Any) -> Filter:
+        return self._compare("ge", value)
+
+    def __lt__(self, value: Any) -> Filter:
+        return self._compare("lt", value)
+
+    def __le__(self, value: Any) -> Filter:
+        return self._compare("le", value)
+
+    def startswith(self, value: str) -> Filter:
+        return Filter(f"startswith({self.path}, {format_value(value)})")
+
+    def endswith(self, value: str) -> Filter:
+        return Filter(f"endswith({self.path}, {format_value(value)})")
+
+    def in_(self, values: Sequence[Any]) -> Filter:
+        return Filter(f"{self.path} in ({', '.join(format_value(value) for value in values)})")
+
+    def any(self, value: Any) -> Filter:
+        """Matches collections containing `value`, eg `F.proxy_addresses.any("smtp:ann@contoso.com")`."""
+        return Filter(f"{self.path}/any(item: item eq {format_value(value)})")
+
+    def asc(self) -> str:
+        return f"{self.path} asc"
+
+    def desc(self) -> str:
+        return f"{self.path} desc"
+
+
+class _Fields:
+    """Root of field paths, see `F`."""
+    def __getattr__(self, attribute: str) -> Field:
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        return Field(_graph_name(attribute))
+
+
+F = _Fields()
+
+FieldLike = Union[Field, str]
+
+
+@dataclasses.dataclass
+class QueryOptions:
+    """
+    OData query options for a list or get method, passed as `query=`.
+
+    Only the options the request supports may be set, eg single object reads take `select`
+    and `expand` only. `top` sets the page size, list methods still follow every page.
+    `count` also sends `ConsistencyLevel: eventual`, which Graph needs for counts and
+    advanced filters on directory objects.
+
+    #### Args:
+        select (Sequence[str | Field], optional): Properties to return
+        filter (str | Filter, optional): Filter expression
+        orderby (Sequence[str], optional): Sort order, eg ["displayName", F.created_date_time.desc()]
+        top (int, optional): Items per page
+        count (bool): Ask for the total count of matching items (default False)
+        expand (Sequence[str | Field], optional): Relationships to include
+
+    #### Example:
+        >>> query = QueryOptions(
+        ...     select=[F.id, F.display_name, F.mail],
+        ...     filter=(F.department == "Sales") & F.mail.endswith("@contoso.com"),
+        ...     orderby=[F.display_name.asc()],
+        ...     count=True,
+        ... )
+        >>> users = await client.users.users.list_users(query=query)
+    """
+    select: Optional[Sequence[FieldLike]] = None
+    filter: Optional[FilterLike] = None
+    orderby: Optional[Sequence[FieldLike]] = None
+    top: Optional[int] = None
+    count: bool = False
+    expand: Optional[Sequence[FieldLike]] = None
+
+    def __post_init__(self) -> None:
+        if self.top is not None and self.top < 1:
+            raise ValidationError("top must be at least 1")
+
+    def parameters(self) -> dict:
+        """The options that are set, as kiota query parameter values."""
+        values = {
+            "select": [str(field) for field in self.select] if self.select else None,
+            "filter": str(self.filter) if self.filter else None,
+            "orderby": [str(field) for field in self.orderby] if self.orderby else None,
+            "top": self.top,
+            "count": True if self.count else None,
+            "expand": [str(field) for field in self.expand] if self.expand else None,
+        }
+        return {name: value for name, value in values.items() if value is not None}
+
+    def check(self, parameters_class: type) -> dict:
+        """Returns `parameters()`, raises ValidationError if the request doesn't support one of them."""
+        supported = {field.name for field in dataclasses.fields(parameters_class)}
+        parameters = self.parameters()
+        unsupported = [f"${name}" for name in parameters if name not in supported]
+        if unsupported:
+            raise ValidationError(f"{', '.join(unsupported)} not supported by this request")
+        return parameters
+
+    def apply(self, parameters_class: type, configuration: Optional[RequestConfiguration] = None) -> RequestConfiguration:
+        """
+        Sets the options on a request configuration, creating it and its query parameters if needed.
+
+        #### Args:
+            parameters_class (type): The request builder's query parameters class, eg
+                UsersRequestBuilder.UsersRequestBuilderGetQueryParameters
+            configuration (RequestConfiguration, optional): Configuration to add the options to, options
+                already set on it are replaced
+        """
+        parameters = self.check(parameters_class)
+        configuration = configuration or RequestConfiguration()
+        if configuration.query_parameters is None:
+            configuration.query_parameters = parameters_class()
+        for name, value in parameters.items():
+            setattr(configuration.query_parameters, name, value)
+        if self.count:
+            configuration.headers.try_add("ConsistencyLevel", "eventual")
+        return configuration
+
+    def _strings(self) -> Dict[str, str]:
+        strings = {}
+        for name, value in self.parameters().items():
+            if isinstance(value, list):
+                value = ",".join(value)
+            elif isinstance(value, bool):
+                value = "true" if value else "false"
+            strings[f"${name}"] = str(value)
+        return strings
+
+    def url_query(self) -> str:
+        """The options url encoded, for requests sent to a raw url (kiota leaves query parameters off those)."""
+        return urlencode(self._strings(), quote_via = quote, safe = "$,/'()")
+
+    def __str__(self) -> str:
+        """The options as a query string, eg '$select=id,mail&$top=50'. Also keys cached responses."""
+        return "&".join(f"{name}={value}" for name, value in self._strings().items())
+
+
+def query_configuration(query: Optional[QueryOptions], parameters_class: type,
+                        configuration: Optional[RequestConfiguration] = None) -> Optional[RequestConfiguration]:
+    """Applies `query` to a request configuration, returns `configuration` untouched when there is no query."""
+    if query is None:
+        return configuration
+    if not isinstance(query, QueryOptions):
+        raise ValidationError("query must be a QueryOptions")
+    return query.apply(parameters_class, configuration)
@@ -0,0 +1,30 @@
+"""
+python_msgraph_toolkit.utils.serialization
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Converts Graph SDK (kiota) models to and from JSON bytes, for responses received outside
+the SDK request adapter and for storing models locally.
+"""
+from typing import Optional, Type, TypeVar
+from kiota_abstractions.serialization import Parsable
+from kiota_serialization_json.json_parse_node_factory import JsonParseNodeFactory
+from kiota_serialization_json.json_serialization_writer_factory import JsonSerializationWriterFactory
+
+JSON_CONTENT_TYPE = "application/json"
+
+ModelType = TypeVar("ModelType", bound=Parsable)
+
+
+def parse_model(content: Optional[bytes], model: Type[ModelType]) -> Optional[ModelType]:
+    """Parses a JSON body into an SDK model, None for an empty body."""
+    if not content:
+        return None
+    root = JsonParseNodeFactory().get_root_parse_node(JSON_CONTENT_TYPE, content)
+    return root.get_object_value(model) # type: ignore[arg-type]
+
+
+def dump_model(value: Parsable) -> bytes:
+    """Serializes an SDK model to JSON bytes, the inverse of parse_model."""
+    writer = JsonSerializationWriterFactory().get_serialization_writer(JSON_CONTENT_TYPE)
+    writer.write_object_value(None, value)
+    return writer.get_serialized_content()
@@ -0,0 +1,270 @@
+"""
+python_msgraph_toolkit.utils.throttling
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Client side throttling and Retry-After aware retries for every Graph request.
+
+Each tenant and each throttled resource (a user's mailbox, a drive, a site...) gets its own
+token bucket. Buckets shrink multiplicatively when Graph answers 429/503 and grow back
+additively after a run of successful requests (AIMD), so bulk jobs settle just under the
+limit Graph is actually enforcing instead of crashing or hammering the API.
+
+https://learn.microsoft.com/en-us/graph/throttling
+"""
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from time import monotonic
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+import httpx
+from kiota_http.middleware.middleware import BaseMiddleware, REQUEST_OPTIONS_KEY
+from kiota_http.middleware.options import RetryHandlerOption
+from ..services.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 503, 504)
+REPLAYABLE_METHODS = ("GET", "HEAD", "DELETE", "OPTIONS")
+THROTTLE_STATUS_CODES = (429, 503)
+GRAPH_VERSIONS = ("v1.0", "beta")
+
+# url segments whose id identifies an independently throttled resource
+RESOURCE_SEGMENTS = ("users", "drives", "sites", "groups", "teams", "chats")
+TENANT_RESOURCE = "tenant"
+DEFAULT_MAX_BUCKETS = 10_000
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Returns the Retry-After header in seconds (delta-seconds or HTTP-date form), None if absent."""
+    if not headers:
+        return None
+    value = None
+    for name, header in headers.items():
+        if name.lower() == "retry-after":
+            value = header
+            break
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def resource_key(url: httpx.URL) -> str:
+    """
+    Returns the throttling scope of a request url.
+
+    `/v1.0/users/{id}/messages` -> `users/{id}`, `/v1.0/drives/{id}/items/...` -> `drives/{id}`,
+    anything without a narrower scope -> `tenant`.
+
+    Ids are taken as they appear in the url, lower cased. A mailbox addressed by both its user
+    principal name and its object id gets two buckets, address each resource one way in a job
+    to keep it under one bucket.
+    """
+    segments = [segment for segment in url.path.split("/") if segment]
+    if segments and segments[0] in GRAPH_VERSIONS:
+        segments = segments[1:]
+    if len(segments) >= 2 and segments[0] in RESOURCE_SEGMENTS:
+        return f"{segments[0]}/{segments[1].lower()}"
+    if segments and segments[0] == "me":
+        return "users/me"
+    return TENANT_RESOURCE
+
+
+class TokenBucket:
+    """
+    Async token bucket whose refill rate adapts to throttling responses.
+
+    #### Args:
+        rate (float): Initial requests per second
+        min_rate (float): Floor the rate never drops below
+        max_rate (float): Ceiling the rate never grows above
+        decrease_factor (float): Multiplier applied to the rate on each throttling response
+        increase_step (float): Requests per second added after `increase_after` successes
+        increase_after (int): Consecutive successes needed before the rate grows
+    """
+    def __init__(self, rate: float, min_rate: float = 0.2, max_rate: Optional[float] = None,
+                 decrease_factor: float = 0.5, increase_step: float = 1.0, increase_after: int = 20):
+        if rate <= 0 or min_rate <= 0:
+            raise ValidationError("Token bucket rates must be positive")
+        if not 0 < decrease_factor < 1:
+            raise ValidationError("decrease_factor must be between 0 and 1")
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 4
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.increase_after = increase_after
+        self.tokens = self.capacity
+        self._successes = 0
+        self._blocked_until = 0.0
+        self._updated = monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def capacity(self) -> float:
+        """Burst size, one second worth of requests at the current rate."""
+        return max(1.0, self.rate)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Waits until a request may be sent under the current rate."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock: # waiters are served in arrival order
+            while True:
+                now = monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_after:
+            self._successes = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        self._successes = 0
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, monotonic() + retry_after)
+
+
+class AdaptiveRateLimiter:
+    """
+    Registry of token buckets keyed by tenant and resource.
+
+    One limiter can be shared by several GraphClient instances so clients for the same
+    tenant draw from the same buckets. Past `max_buckets` the least recently used bucket is
+    dropped, a resource seen again later starts over at the initial rate.
+
+    #### Args:
+        tenant_rate (float): Initial requests per second for a whole tenant (default 100)
+        resource_rate (float): Initial requests per second for a single user, drive, site etc (default 16)
+        max_buckets (int): Buckets kept before the least recently used are dropped (default 10,000)
+        **bucket_options: Passed through to every TokenBucket (min_rate, decrease_factor, ...)
+    """
+    def __init__(self, tenant_rate: float = 100.0, resource_rate: float = 16.0,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS, **bucket_options):
+        if max_buckets < 1:
+            raise ValidationError("max_buckets must be at least 1")
+        self.tenant_rate = tenant_rate
+        self.resource_rate = resource_rate
+        self.max_buckets = max_buckets
+        self._bucket_options = bucket_options
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def bucket(self, tenant_id: str, resource: str = TENANT_RESOURCE) -> TokenBucket:
+        key = (tenant_id, resource)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.tenant_rate if resource == TENANT_RESOURCE else self.resource_rate
+            bucket = self._buckets[key] = TokenBucket(rate, **self._bucket_options)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class ThrottlingHandler(BaseMiddleware):
+    """
+    Middleware that rate limits requests per tenant and resource and retries throttled requests.
+
+    Replaces the SDK RetryHandler. Retries 429, 503 and 504 responses, waiting for the
+    `Retry-After` header when Graph sends one and for jittered exponential backoff otherwise.
+    Like the SDK handler it honours a per-request RetryHandlerOption (`should_retry`,
+    `max_retries`) and never resends a forward-only streamed body.
+
+    #### Args:
+        tenant_id (str): Tenant the requests belong to, used to key the token buckets
+        limiter (AdaptiveRateLimiter, optional): Shared bucket registry, a private one is created if omitted
+        max_retries (int): Retries per request before the throttled response is returned (default 5)
+        base_delay (float): First backoff delay in seconds (default 1)
+        max_delay (float): Upper bound for any single wait in seconds (default 60)
+    """
+    def __init__(self, tenant_id: str = "", limiter: Optional[AdaptiveRateLimiter] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        super().__init__()
+        if max_retries < 0:
+            raise ValidationError("max_retries must not be negative")
+        self.tenant_id = tenant_id
+        self.limiter = limiter if limiter is not None else AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _max_retries(self, request: httpx.Request) -> int:
+        """Retries allowed for this request, from its RetryHandlerOption when it has one."""
+        options = request.extensions.get(REQUEST_OPTIONS_KEY) or {}
+        option = options.get(RetryHandlerOption.get_key())
+        if option is not None:
+            return option.max_retry if option.should_retry else 0
+        return self.max_retries
+
+    @staticmethod
+    def _is_replayable(request: httpx.Request) -> bool:
+        """False for bodies that can only be read once, same rule as the SDK RetryHandler."""
+        if request.method.upper() in REPLAYABLE_METHODS:
+            return True
+        if request.headers.get("Content-Type") == "application/octet-stream":
+            return False
+        return isinstance(request.stream, httpx.ByteStream)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (zero based) retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        resource = resource_key(request.url)
+        tenant_bucket = self.limiter.bucket(self.tenant_id)
+        resource_bucket = self.limiter.bucket(self.tenant_id, resource) if resource != TENANT_RESOURCE else None
+        max_retries = self._max_retries(request) if self._is_replayable(request) else 0
+
+        attempt = 0
+        while True:
+            await tenant_bucket.acquire()
+            if resource_bucket:
+                await resource_bucket.acquire()
+            response = await super().send(request, transport)
+            scope = resource_bucket or tenant_bucket
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                scope.on_success()
+                return response
+
+            retry_after = parse_retry_after(response.headers)
+            if response.status_code in THROTTLE_STATUS_CODES:
+                scope.on_throttled(retry_after)
+            if attempt >= max_retries:
+                logger.warning(f"Giving up on {request.method} {request.url.path} after {attempt} retries ({response.status_code})")
+                return response
+
+            delay = min(retry_after if retry_after is not None else self.backoff(attempt), self.max_delay)
+            logger.info(f"{response.status_code} from {resource}, retrying in {delay:.2f}s (attempt {attempt + 1})")
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+            request.headers["Retry-Attempt"] = str(attempt)
@@ -0,0 +1,209 @@
+"""
+python_msgraph_toolkit.utils.tokens
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Access tokens refreshed ahead of expiry, optionally persisted to an encrypted file.
+
+The SDK asks the credential for a token on every request and azure-identity only renews it
+once it is about to expire, on the request path, so every hour one request of a burst waits
+for a token round trip. PreRefreshingCredential renews tokens in the background
+`refresh_margin` seconds before they expire while they are in use, and serves tokens saved by
+a previous process from an EncryptedTokenCache so short-lived jobs skip the cold fetch.
+"""
+import asyncio
+import json
+import logging
+import os
+from time import time
+from typing import Any, Dict, Optional, Tuple, Union
+from azure.core.credentials import AccessToken
+from ..services.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_MARGIN = 300
+MIN_TOKEN_LIFETIME = 30 # tokens closer to expiry than this aren't handed out while a renewal runs
+
+TokenKey = Tuple[Tuple[str, ...], Optional[str], bool]
+
+
+class EncryptedTokenCache:
+    """
+    Access tokens kept in a Fernet encrypted file, readable only by the current user.
+
+    Secrets are never written, only access tokens and their expiry. Several credentials can
+    share one file, entries are keyed by tenant, client and scopes.
+
+    #### Args:
+        path (str | PathLike): Cache file, created on the first save
+        key (bytes | str): Fernet key, see `EncryptedTokenCache.generate_key()`. Keep it out of the cache's directory,
+            eg in an environment variable or a secret store
+
+    #### Example:
+        >>> cache = EncryptedTokenCache("/tmp/graph-tokens.bin", os.environ["TOKEN_CACHE_KEY"])
+        >>> client = GraphClient(tenant_id, client_id, secret, token_cache=cache)
+    """
+    def __init__(self, path: Union[str, os.PathLike], key: Union[bytes, str]):
+        from cryptography.fernet import Fernet # installed with azure-identity (through msal)
+        if not key:
+            raise ValidationError("Token cache key is required")
+        self.path = os.fspath(path)
+        self._fernet = Fernet(key)
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def generate_key() -> str:
+        from cryptography.fernet import Fernet
+        return Fernet.generate_key().decode()
+
+    def _read(self) -> Dict[str, Any]:
+        from cryptography.fernet import InvalidToken
+        try:
+            with open(self.path, "rb") as cache_file:
+                return json.loads(self._fernet.decrypt(cache_file.read()))
+        except FileNotFoundError:
+            return {}
+        except (InvalidToken, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token cache {self.path}: {e!r}")
+            return {}
+
+    def _write(self, entries: Dict[str, Any]) -> None:
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "wb") as cache_file:
+            cache_file.write(self._fernet.encrypt(json.dumps(entries).encode()))
+        os.replace(temporary, self.path)
+
+    async def load(self, key: str) -> Optional[AccessToken]:
+        entry = (await asyncio.to_thread(self._read)).get(key)
+        return AccessToken(entry["token"], entry["expires_on"]) if entry else None
+
+    async def save(self, key: str, token: AccessToken) -> None:
+        async with self._lock:
+            def update() -> None:
+                now = time()
+                entries = {name: entry for name, entry in self._read().items() if entry["expires_on"] > now}
+                entries[key] = {"token": token.token, "expires_on": token.expires_on}
+                self._write(entries)
+            await asyncio.to_thread(update)
+
+
+class PreRefreshingCredential:
+    """
+    Wraps an async azure-identity credential and renews its tokens before they expire.
+
+    A token is served from memory until `refresh_margin` seconds before its expiry. From then
+    on callers still get the current token while one background request fetches the next, and
+    tokens that were used since their last renewal are renewed on a timer so a burst never
+    starts on an expired token. Requests carrying claims (continuous access evaluation
+    challenges) always go to the wrapped credential.
+
+    #### Args:
+        credential: Async credential to wrap, eg ClientSecretCredential
+        refresh_margin (float): Seconds before expiry a token is renewed (default 300)
+        token_cache (EncryptedTokenCache, optional): Persists tokens for the next process
+        cache_key (str, optional): Identifies the credential in a shared token cache, eg 'tenant:client'
+    """
+    def __init__(self, credential, refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+                 token_cache: Optional[EncryptedTokenCache] = None, cache_key: str = ""):
+        if refresh_margin < 0:
+            raise ValidationError("refresh_margin must not be negative")
+        self._credential = credential
+        self.refresh_margin = refresh_margin
+        self._token_cache = token_cache
+        self._cache_key = cache_key
+        self._tokens: Dict[TokenKey, AccessToken] = {}
+        self._used: Dict[TokenKey, bool] = {}
+        self._refreshing: Dict[TokenKey, asyncio.Task] = {}
+        self._timers: Dict[TokenKey, asyncio.Task] = {}
+
+    async def get_token(self, *scopes: str, claims: Optional[str] = None, tenant_id: Optional[str] = None,
+                        enable_cae: bool = False, **kwargs) -> AccessToken:
+        if claims:
+            return await self._credential.get_token(*scopes, claims=claims, tenant_id=tenant_id,
+                                                    enable_cae=enable_cae, **kwargs)
+        key: TokenKey = (tuple(sorted(scopes)), tenant_id, enable_cae)
+        self._used[key] = True
+        token = self._tokens.get(key)
+        if token is None and self._token_cache:
+            token = await self._load_cached(key)
+            if token:
+                self._schedule(key, token, kwargs)
+        remaining = token.expires_on - time() if token else 0
+        if remaining > self.refresh_margin:
+            return token
+        if remaining > MIN_TOKEN_LIFETIME: # still good for a request, renew without making the caller wait
+            self._refresh(key, kwargs)
+            return token
+        return await asyncio.shield(self._refresh(key, kwargs))
+
+    def _refresh(self, key: TokenKey, options: Dict[str, Any]) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, options))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            task.add_done_callback(self._log_failure)
+        return task
+
+    async def _fetch(self, key: TokenKey, options: Dict[str, Any]) -> AccessToken:
+        scopes, tenant_id, enable_cae = key
+        token = await self._credential.get_token(*scopes, tenant_id=tenant_id, enable_cae=enable_cae, **options)
+        self._tokens[key] = token
+        self._used[key] = False
+        self._schedule(key, token, options)
+        if self._token_cache:
+            try:
+                await self._token_cache.save(self._persisted_key(key), token)
+            except OSError as e:
+                logger.warning(f"Could not save the token cache: {e}")
+        return token
+
+    def _schedule(self, key: TokenKey, token: AccessToken, options: Dict[str, Any]) -> None:
+        """Renews a token `refresh_margin` seconds before it expires, if it was used in the meantime."""
+        timer = self._timers.get(key)
+        if timer and not timer.done():
+            timer.cancel()
+
+        async def renew() -> None:
+            await asyncio.sleep(max(token.expires_on - time() - self.refresh_margin, 0))
+            if self._used.get(key):
+                # shielded, the renewal replaces this timer and must not cancel itself with it
+                await asyncio.shield(self._refresh(key, options))
+            else:
+                self._timers.pop(key, None) # idle, the next get_token renews on demand
+
+        self._timers[key] = asyncio.ensure_future(renew())
+        self._timers[key].add_done_callback(self._log_failure)
+
+    async def _load_cached(self, key: TokenKey) -> Optional[AccessToken]:
+        try:
+            token = await self._token_cache.load(self._persisted_key(key))
+        except OSError as e:
+            logger.warning(f"Could not read the token cache: {e}")
+            return None
+        if token is not None and token.expires_on > time():
+            self._tokens[key] = token
+            return token
+        return None
+
+    def _persisted_key(self, key: TokenKey) -> str:
+        scopes, tenant_id, enable_cae = key
+        return json.dumps([self._cache_key, list(scopes), tenant_id, enable_cae])
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Background token refresh failed: {task.exception()}")
+
+    async def close(self) -> None:
+        for task in [*self._timers.values(), *self._refreshing.values()]:
+            task.cancel()
+        self._timers.clear()
+        await self._credential.close()
+
+    async def __aenter__(self) -> "PreRefreshingCredential":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
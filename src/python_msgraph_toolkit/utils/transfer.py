@@ -0,0 +1,453 @@
+"""
+python_msgraph_toolkit.utils.transfer
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Chunked content transfer against pre-authenticated Graph urls (upload sessions and
+`@microsoft.graph.downloadUrl`).
+
+Those urls already carry their authorisation, sending the Graph bearer token to them is
+rejected, so these requests go through a plain httpx client rather than the SDK.
+
+https://learn.microsoft.com/en-us/graph/api/driveitem-createuploadsession
+https://learn.microsoft.com/en-us/graph/api/driveitem-get-content
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import mmap
+import os
+import threading
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+import httpx
+from ..services.exceptions import SharePointError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FRAGMENT_MULTIPLE = 320 * 1024 # fragments must be a multiple of 320 KiB
+DEFAULT_UPLOAD_CHUNK_SIZE = 32 * UPLOAD_FRAGMENT_MULTIPLE # 10 MiB
+MAX_UPLOAD_CHUNK_SIZE = 60 * 1024 * 1024
+DEFAULT_TRANSFER_TIMEOUT = 300
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+
+ProgressCallback = Callable[[int, int], Any]
+UrlRefresher = Callable[[], Awaitable[str]]
+
+
+def transfer_client() -> httpx.AsyncClient:
+    """HTTP client for pre-authenticated transfer urls."""
+    return httpx.AsyncClient(timeout=httpx.Timeout(DEFAULT_TRANSFER_TIMEOUT, connect=30))
+
+
+def validate_chunk_size(chunk_size: int) -> int:
+    if chunk_size <= 0 or chunk_size % UPLOAD_FRAGMENT_MULTIPLE:
+        raise ValidationError("Chunk size must be a positive multiple of 320 KiB (327,680 bytes)")
+    if chunk_size > MAX_UPLOAD_CHUNK_SIZE:
+        raise ValidationError("Chunk size must not exceed 60 MiB")
+    return chunk_size
+
+
+class UploadSource(ABC):
+    """Random access reader over upload content, only the requested range is ever in memory."""
+    size: int = 0
+    name: Optional[str] = None
+
+    @abstractmethod
+    async def read(self, offset: int, length: int) -> bytes:
+        """Returns `length` bytes from `offset`, fewer only at the end of the content."""
+
+    async def close(self) -> None:
+        pass
+
+
+class FileUploadSource(UploadSource):
+    """Reads a file on disk with positional reads in a worker thread, the event loop never blocks on disk."""
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = os.fspath(path)
+        self.name = os.path.basename(self.path)
+        self.size = os.path.getsize(self.path)
+        self._fd: Optional[int] = None
+
+    def _pread(self, offset: int, length: int) -> bytes:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        if hasattr(os, "pread"):
+            return os.pread(self._fd, length, offset)
+        os.lseek(self._fd, offset, os.SEEK_SET) # Windows has no pread, reads are serialised by the uploader
+        return os.read(self._fd, length)
+
+    async def read(self, offset: int, length: int) -> bytes:
+        return await asyncio.to_thread(self._pread, offset, length)
+
+    async def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class BufferUploadSource(UploadSource):
+    """Reads from a memory-mapped file or any other buffer, slicing only the requested range."""
+    def __init__(self, buffer: Union[mmap.mmap, bytes, bytearray, memoryview], name: Optional[str] = None):
+        self._view = memoryview(buffer)
+        self.size = self._view.nbytes
+        self.name = name
+
+    async def read(self, offset: int, length: int) -> bytes:
+        return bytes(self._view[offset:offset + length])
+
+    async def close(self) -> None:
+        self._view.release()
+
+
+class StreamUploadSource(UploadSource):
+    """
+    Reads from an async byte stream, which can only move forward.
+
+    The most recent chunks are kept so a rejected fragment can be sent again, earlier
+    offsets are skipped over when resuming a session part way through.
+    """
+    RETAINED_CHUNKS = 2
+
+    def __init__(self, stream: AsyncIterable[bytes], size: int, name: Optional[str] = None):
+        if not size or size <= 0:
+            raise ValidationError("Size is required when uploading from a stream")
+        self._iterator = stream.__aiter__()
+        self.size = size
+        self.name = name
+        self._position = 0
+        self._pending = b""
+        self._recent: Dict[int, bytes] = {}
+
+    async def _take(self, length: int) -> bytes:
+        parts: List[bytes] = []
+        remaining = length
+        while remaining > 0:
+            if not self._pending:
+                try:
+                    self._pending = bytes(await self._iterator.__anext__())
+                except StopAsyncIteration:
+                    break
+            part, self._pending = self._pending[:remaining], self._pending[remaining:]
+            parts.append(part)
+            remaining -= len(part)
+        self._position += length - remaining
+        return b"".join(parts)
+
+    async def read(self, offset: int, length: int) -> bytes:
+        if offset in self._recent and len(self._recent[offset]) >= min(length, self.size - offset):
+            return self._recent[offset][:length]
+        if offset < self._position:
+            raise SharePointError(f"Stream has already moved past byte {offset}, restart the upload with a new stream")
+        while self._position < offset: # resuming, discard what the session already holds
+            if not await self._take(min(offset - self._position, DEFAULT_UPLOAD_CHUNK_SIZE)):
+                break
+        chunk = await self._take(length)
+        self._recent[offset] = chunk
+        for stale in sorted(self._recent)[:-self.RETAINED_CHUNKS]:
+            del self._recent[stale]
+        return chunk
+
+
+def upload_source(source: Any, size: Optional[int] = None, name: Optional[str] = None) -> UploadSource:
+    """Wraps a file path, mmap/buffer or async byte stream in the matching UploadSource."""
+    if isinstance(source, UploadSource):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.isfile(source):
+            raise ValidationError(f"File not found: {source}")
+        return FileUploadSource(source)
+    if isinstance(source, (mmap.mmap, bytes, bytearray, memoryview)):
+        return BufferUploadSource(source, name=name)
+    if hasattr(source, "__aiter__"):
+        return StreamUploadSource(source, size=size or 0, name=name)
+    raise ValidationError("Source must be a file path, a memory-mapped file/buffer or an async byte stream")
+
+
+def next_expected_offset(ranges: Optional[List[str]]) -> Optional[int]:
+    """Start of the first range in an upload session's nextExpectedRanges (eg ["26214400-"])."""
+    if not ranges:
+        return None
+    return int(str(ranges[0]).split("-", 1)[0])
+
+
+def pending_ranges(response: httpx.Response) -> Optional[List[str]]:
+    """nextExpectedRanges of a fragment response, None once the upload is complete."""
+    try:
+        body = response.json()
+    except ValueError: # the final response of an attachment session has no body
+        return None
+    if not isinstance(body, dict):
+        return None
+    return body.get("nextExpectedRanges") or None
+
+
+async def upload_session_status(http: httpx.AsyncClient, upload_url: str) -> Optional[int]:
+    """Asks the session which byte it expects next, None if the session no longer exists."""
+    response = await http.get(upload_url)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return next_expected_offset(response.json().get("nextExpectedRanges"))
+
+
+async def upload_to_session(http: httpx.AsyncClient, upload_url: str, source: UploadSource,
+                            chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE, start: int = 0,
+                            max_retries: int = 5, on_progress: Optional[ProgressCallback] = None) -> httpx.Response:
+    """
+    Sends `source` to an upload session from byte `start` and returns the final response.
+
+    Fragments have to be accepted in order, so while one fragment is in flight the next one
+    is read from the source, keeping at most two chunks in memory. Failed fragments are
+    retried from the offset the session reports in `nextExpectedRanges`. Drive sessions
+    acknowledge fragments with 202, Outlook attachment sessions with 200 and the ranges still
+    expected, either way the upload is complete once no ranges are left.
+    """
+    validate_chunk_size(chunk_size)
+    total = source.size
+    if total <= 0:
+        raise ValidationError("Upload sessions need content, empty files can't be uploaded in fragments")
+    offset = start
+    retries = 0
+
+    def read_ahead(position: int) -> Optional[asyncio.Future]:
+        if position >= total:
+            return None
+        return asyncio.ensure_future(source.read(position, min(chunk_size, total - position)))
+
+    pending = read_ahead(offset)
+    pending_offset = offset
+    try:
+        while True:
+            if offset >= total:
+                raise SharePointError(f"Upload session expects byte {offset} but the source only has {total}")
+            if pending is None or pending_offset != offset:
+                if pending is not None:
+                    # let the read finish rather than cancel it, streams can't recover from a half read
+                    await asyncio.wait([pending])
+                pending, pending_offset = read_ahead(offset), offset
+            chunk = await pending # type: ignore[misc]
+            end = offset + len(chunk)
+            pending, pending_offset = read_ahead(end), end
+
+            headers = {"Content-Length": str(len(chunk)), "Content-Range": f"bytes {offset}-{end - 1}/{total}"}
+            try:
+                response = await http.put(upload_url, content=chunk, headers=headers)
+            except httpx.TransportError as e:
+                response = None
+                logger.warning(f"Upload fragment at byte {offset} failed: {e}")
+
+            expected = pending_ranges(response) if response is not None and response.status_code in (200, 201, 202) else None
+            if response is not None and response.status_code in (200, 201) and not expected:
+                if on_progress:
+                    on_progress(total, total)
+                return response
+            if response is not None and response.status_code in (200, 201, 202):
+                retries = 0
+                expected_offset = next_expected_offset(expected)
+                offset = end if expected_offset is None else expected_offset # "0-" is a valid answer
+                if on_progress:
+                    on_progress(offset, total)
+                continue
+            if response is not None and response.status_code in (404, 410):
+                raise SharePointError("Upload session has expired, start a new upload", status_code=response.status_code)
+
+            retries += 1
+            if retries > max_retries:
+                status = response.status_code if response is not None else None
+                raise SharePointError(f"Upload failed at byte {offset} after {max_retries} retries", status_code=status)
+            await asyncio.sleep(min(2 ** retries, 30))
+            resumed = await upload_session_status(http, upload_url)
+            if resumed is None:
+                raise SharePointError("Upload session has expired, start a new upload")
+            offset = resumed
+    finally:
+        if pending is not None:
+            if not pending.done():
+                pending.cancel()
+            elif not pending.cancelled():
+                pending.exception()
+
+
+def plan_segments(size: int, segment_size: int) -> List[Tuple[int, int]]:
+    """Splits `size` bytes into inclusive (start, end) ranges of at most `segment_size`."""
+    if segment_size <= 0:
+        raise ValidationError("Segment size must be positive")
+    return [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+
+class RangeDownloader:
+    """
+    Fetches byte ranges of a pre-authenticated download url, retrying failed segments.
+
+    Download urls expire after a short time. When one is rejected, `refresh_url` (if given) is
+    awaited for a fresh url and the segment is retried.
+
+    #### Args:
+        http (httpx.AsyncClient): Client without Graph credentials
+        url (str): `@microsoft.graph.downloadUrl` of the item
+        refresh_url (Callable[[], Awaitable[str]], optional): Returns a new download url
+        max_retries (int): Attempts per segment before giving up (default 5)
+    """
+    EXPIRED_STATUS_CODES = (401, 403, 410)
+
+    def __init__(self, http: httpx.AsyncClient, url: str, refresh_url: Optional[UrlRefresher] = None, max_retries: int = 5):
+        self.http = http
+        self.url = url
+        self.refresh_url = refresh_url
+        self.max_retries = max_retries
+        self._refreshing: Optional[asyncio.Future] = None
+
+    async def _refresh(self, stale_url: str) -> None:
+        if not self.refresh_url:
+            raise SharePointError("Download url has expired")
+        if self.url != stale_url:
+            return # another segment already refreshed it
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self.refresh_url())
+        url = await asyncio.shield(self._refreshing)
+        if url == stale_url:
+            raise SharePointError("Download url has expired and refreshing it returned the same url")
+        self.url = url
+
+    async def segment(self, start: int, end: int, sink: Optional[Callable[[int, bytes], Awaitable[None]]] = None) -> bytes:
+        """
+        Downloads bytes `start`-`end` (inclusive).
+
+        With a `sink` every received block is passed on as (offset, block) and nothing is kept,
+        a retry resumes after the last block the sink received. Otherwise the segment is returned.
+        """
+        attempt = 0
+        position = start
+        parts: List[bytes] = []
+        while True:
+            url = self.url
+            if not sink:
+                position, parts = start, []
+            try:
+                async with self.http.stream("GET", url, headers={"Range": f"bytes={position}-{end}"}) as response:
+                    if response.status_code in self.EXPIRED_STATUS_CODES:
+                        await self._refresh(url)
+                        raise httpx.HTTPStatusError("Download url expired", request=response.request, response=response)
+                    if response.status_code == 200 and position != 0:
+                        raise SharePointError("Server ignored the Range header, download the item in one segment")
+                    response.raise_for_status()
+                    async for block in response.aiter_bytes():
+                        block = block[:end + 1 - position] # a 200 returns the whole item
+                        if not block:
+                            break
+                        if sink:
+                            await sink(position, block)
+                        else:
+                            parts.append(block)
+                        position += len(block)
+                if position != end + 1:
+                    raise httpx.TransportError(f"Segment {start}-{end} ended early at byte {position}")
+                return b"".join(parts)
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                attempt += 1
+                if attempt >= self.max_retries:
+                    raise SharePointError(f"Download of bytes {start}-{end} failed: {e}")
+                if self.url != url:
+                    continue # url was refreshed, retry straight away
+                logger.warning(f"Segment {start}-{end} failed ({e}), retrying")
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+
+class PositionalFileWriter:
+    """Writes blocks at absolute offsets of a preallocated file from a worker thread."""
+    def __init__(self, path: Union[str, os.PathLike], size: int):
+        self.path = os.fspath(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        os.ftruncate(self._fd, size)
+        self._lock = threading.Lock()
+        self._writes: Set[asyncio.Future] = set()
+
+    def _pwrite(self, offset: int, block: bytes) -> None:
+        if hasattr(os, "pwrite"):
+            os.pwrite(self._fd, block, offset)
+            return
+        with self._lock: # Windows has no pwrite, seek + write must not interleave
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            os.write(self._fd, block)
+
+    async def write(self, offset: int, block: bytes) -> None:
+        # a cancelled caller doesn't stop the thread, writes are tracked until they finish
+        write = asyncio.ensure_future(asyncio.to_thread(self._pwrite, offset, block))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+        await asyncio.shield(write)
+
+    async def close(self) -> None:
+        """Closes the file once every write already started has finished."""
+        if self._writes:
+            await asyncio.wait(set(self._writes))
+        os.close(self._fd)
+
+
+async def download_to_file(downloader: RangeDownloader, path: Union[str, os.PathLike], size: int,
+                           segment_size: int = DEFAULT_SEGMENT_SIZE, concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+                           on_progress: Optional[ProgressCallback] = None) -> None:
+    """
+    Downloads `size` bytes into `path` with up to `concurrency` segments in flight.
+
+    Blocks are written at their offset as they arrive, so memory use stays at a few network
+    buffers per segment regardless of the file size.
+    """
+    if concurrency < 1:
+        raise ValidationError("Concurrency must be at least 1")
+    writer = PositionalFileWriter(path, size)
+    received = {"bytes": 0}
+
+    async def sink(offset: int, block: bytes) -> None:
+        await writer.write(offset, block)
+        received["bytes"] += len(block)
+        if on_progress:
+            on_progress(received["bytes"], size)
+
+    segments = deque(plan_segments(size, segment_size))
+
+    async def worker() -> None:
+        while segments:
+            start, end = segments.popleft()
+            await downloader.segment(start, end, sink)
+
+    try:
+        # a failed segment cancels its siblings, none is left writing once the file is closed
+        async with asyncio.TaskGroup() as workers:
+            for _ in range(min(concurrency, len(segments)) or 1):
+                workers.create_task(worker())
+    except BaseExceptionGroup as group:
+        raise group.exceptions[0] from None
+    finally:
+        await writer.close()
+
+
+async def stream_segments(downloader: RangeDownloader, size: int, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                          concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY) -> AsyncIterator[bytes]:
+    """
+    Yields the content of a download url in order, one segment at a time.
+
+    Up to `concurrency` segments are downloaded ahead of the caller, so memory is bounded
+    by `segment_size * concurrency`.
+    """
+    if concurrency < 1:
+        raise ValidationError("Concurrency must be at least 1")
+    segments = iter(plan_segments(size, segment_size))
+    in_flight: Deque[asyncio.Future] = deque()
+
+    def schedule() -> None:
+        segment = next(segments, None)
+        if segment is not None:
+            in_flight.append(asyncio.ensure_future(downloader.segment(*segment)))
+
+    for _ in range(concurrency):
+        schedule()
+    try:
+        while in_flight:
+            data = await in_flight.popleft()
+            schedule()
+            yield data
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,113 @@
+"""
+python_msgraph_toolkit.utils.transport
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Connection pools shared by every service of a GraphClient, and by several GraphClients.
+
+The Graph SDK wraps the transport of the httpx client it is given in its middleware, so the
+pool is shared rather than the client: each Auth gets its own AsyncClient (and middleware)
+on top of the same pooled transport. Graph calls and transfers to pre-authenticated upload
+and download urls use separate pools, large transfers don't hold up API calls.
+"""
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import httpx
+from ..services.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Lends a pool to a client, closing the client leaves the pool open for the others."""
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+@dataclass
+class TransportConfig:
+    """
+    Connection pool settings, pass the same instance to every GraphClient that should share its pools.
+
+    #### Args:
+        max_connections (int): Open connections per pool. Each pool talks to one host for Graph calls, so this
+            is effectively a per host limit (default 100)
+        max_keepalive_connections (int): Idle connections kept open for reuse (default 20)
+        keepalive_expiry (float): Seconds an idle connection is kept open (default 30)
+        http2 (bool): Multiplex concurrent requests over HTTP/2 connections, needs the `h2` package (default True)
+        timeout (float): Seconds to wait for a Graph response (default 100)
+        connect_timeout (float): Seconds to wait for a connection, including the TLS handshake (default 30)
+        transfer_timeout (float): Seconds to wait for an upload or download segment (default 300)
+
+    #### Example:
+        >>> transport = TransportConfig(max_connections=50, keepalive_expiry=120)
+        >>> finance = GraphClient(tenant_id, finance_client_id, finance_secret, transport=transport)
+        >>> hr = GraphClient(tenant_id, hr_client_id, hr_secret, transport=transport)
+        >>> ...
+        >>> await transport.aclose()
+    """
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    timeout: float = 100.0
+    connect_timeout: float = 30.0
+    transfer_timeout: float = 300.0
+
+    def __post_init__(self) -> None:
+        if self.max_connections < 1:
+            raise ValidationError("max_connections must be at least 1")
+        if self.max_keepalive_connections < 0 or self.keepalive_expiry < 0:
+            raise ValidationError("Keep-alive settings must not be negative")
+        if min(self.timeout, self.connect_timeout, self.transfer_timeout) <= 0:
+            raise ValidationError("Timeouts must be positive")
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 needs the h2 package (pip install httpx[http2]), falling back to HTTP/1.1")
+            self.http2 = False
+        self._graph_pool: Optional[httpx.AsyncHTTPTransport] = None
+        self._transfer_pool: Optional[httpx.AsyncHTTPTransport] = None
+
+    def _new_pool(self) -> httpx.AsyncHTTPTransport:
+        return httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+
+    def graph_client(self, base_url: str = GRAPH_BASE_URL) -> httpx.AsyncClient:
+        """Returns a new AsyncClient for Graph calls on the shared Graph pool."""
+        if self._graph_pool is None:
+            self._graph_pool = self._new_pool()
+        return httpx.AsyncClient(
+            transport=_SharedTransport(self._graph_pool),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            base_url=base_url,
+        )
+
+    def transfer_client(self) -> httpx.AsyncClient:
+        """Returns a new AsyncClient for pre-authenticated transfer urls on the shared transfer pool."""
+        if self._transfer_pool is None:
+            self._transfer_pool = self._new_pool()
+        return httpx.AsyncClient(
+            transport=_SharedTransport(self._transfer_pool),
+            timeout=httpx.Timeout(self.transfer_timeout, connect=self.connect_timeout),
+        )
+
+    async def aclose(self) -> None:
+        """Closes the pools, clients created afterwards open new ones."""
+        pools, self._graph_pool, self._transfer_pool = (self._graph_pool, self._transfer_pool), None, None
+        for pool in pools:
+            if pool is not None:
+                await pool.aclose()
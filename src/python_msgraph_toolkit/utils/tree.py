@@ -0,0 +1,100 @@
+"""
+python_msgraph_toolkit.utils.tree
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Breadth-first crawling of Graph hierarchies (drive folders, mail folders...) with several
+child listings in flight at once.
+
+Only the ids of folders still waiting to be listed are kept, items are handed to the consumer
+through a bounded queue, so a slow consumer pauses the crawl instead of letting it buffer a
+whole tree in memory.
+"""
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Deque, Optional, Tuple
+from ..services.exceptions import ValidationError
+
+ChildLister = Callable[[Any], AsyncIterable[Any]]
+Predicate = Callable[[Any], bool]
+
+_DONE = object()
+
+
+def walk_tree(root: Any, list_children: ChildLister, is_container: Predicate, key: Callable[[Any], Any],
+              max_depth: Optional[int] = None, concurrency: int = 4,
+              prune: Optional[Predicate] = None, include: Optional[Predicate] = None,
+              buffer: int = 1000) -> AsyncIterator[Any]:
+    """
+    Yields every descendant of `root`, level by level.
+
+    #### Args:
+        root: Key of the container to start from, passed to `list_children`
+        list_children (Callable): Returns an async iterable of the children of a container key
+        is_container (Callable): True for children that have children of their own
+        key (Callable): Returns the key to list a container child with, eg its id
+        max_depth (int, optional): Levels to descend, 1 lists only the children of `root` (default unlimited)
+        concurrency (int): Containers listed at once (default 4)
+        prune (Callable, optional): Containers it returns True for are skipped along with their subtree
+        include (Callable, optional): Only children it returns True for are yielded, the crawl still descends
+        buffer (int): Children fetched ahead of the consumer (default 1000)
+    """
+    if concurrency < 1:
+        raise ValidationError("Concurrency must be at least 1")
+    if max_depth is not None and max_depth < 1:
+        raise ValidationError("Max depth must be at least 1")
+    return _walk_tree(root, list_children, is_container, key, max_depth, concurrency, prune, include, buffer)
+
+
+async def _walk_tree(root, list_children, is_container, key, max_depth, concurrency, prune, include, buffer) -> AsyncIterator[Any]:
+    frontier: Deque[Tuple[Any, int]] = deque([(root, 0)])
+    results: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+    condition = asyncio.Condition()
+    active = 0
+
+    async def worker() -> None:
+        nonlocal active
+        while True:
+            async with condition:
+                await condition.wait_for(lambda: frontier or active == 0)
+                if not frontier:
+                    return # nothing queued and nothing being listed that could queue more
+                container, depth = frontier.popleft()
+                active += 1
+            try:
+                async for child in list_children(container):
+                    if is_container(child):
+                        if prune and prune(child):
+                            continue
+                        if max_depth is None or depth + 1 < max_depth:
+                            async with condition:
+                                frontier.append((key(child), depth + 1))
+                                condition.notify()
+                    if include is None or include(child):
+                        await results.put(child)
+            finally:
+                async with condition:
+                    active -= 1
+                    condition.notify_all()
+
+    async def supervise() -> None:
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+            await results.put(_DONE)
+        except Exception as e:
+            await results.put(e)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    supervisor = asyncio.ensure_future(supervise())
+    try:
+        while True:
+            child = await results.get()
+            if child is _DONE:
+                return
+            if isinstance(child, Exception):
+                raise child
+            yield child
+    finally:
+        supervisor.cancel()
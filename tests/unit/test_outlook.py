@@ -1,9 +1,25 @@
+import asyncio
+import base64
+import tarfile
+import zipfile
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock
+import httpx
 import pytest
+from msgraph.generated.models.date_time_time_zone import DateTimeTimeZone
+from msgraph.generated.models.event import Event
+from msgraph.generated.models.message import Message
+from msgraph.generated.models.mail_folder import MailFolder
 
 from src.python_msgraph_toolkit.services.outlook.calendar import CalendarService
 from src.python_msgraph_toolkit.services.outlook.emails import EmailsService
-from src.python_msgraph_toolkit.services.exceptions import ValidationError, GraphAPIError
+from src.python_msgraph_toolkit.services.outlook.export import DirectoryWriter, ExportWriter
+from src.python_msgraph_toolkit.services.outlook.attachments import ATTACHMENT_CHUNK_SIZE, encode_file
+from src.python_msgraph_toolkit.services.outlook.mail_merge import MailTemplate
+from src.python_msgraph_toolkit.utils.etag import MemoryETagStore
+from src.python_msgraph_toolkit.utils.delta import SqliteDeltaStore
+from src.python_msgraph_toolkit.utils.query import F, QueryOptions
+from src.python_msgraph_toolkit.services.exceptions import ValidationError, GraphAPIError, OutlookError
 
 @pytest.fixture
 def initialise_mock():
@@ -45,6 +61,24 @@ async def test_get_events_with_date_range(initialise_mock):
     mock_client.users.by_user_id.assert_called_once_with("user1")
 
 
+@pytest.mark.asyncio
+async def test_get_events_with_query_and_date_range(initialise_mock):
+    mock_client = initialise_mock
+    service = CalendarService(mock_client)
+    events = mock_client.users.by_user_id.return_value.calendar.events
+    events.get = AsyncMock(return_value=MagicMock(value=[MagicMock()], odata_next_link=None))
+
+    query = QueryOptions(select=[F.subject, F.start], filter=F.is_cancelled == False, top=25)
+    await service.get_events(user="user1", start_date="2026-01-01T00:00:00Z", end_date="2026-12-31T23:59:59Z", query=query)
+
+    parameters = events.get.await_args.kwargs["request_configuration"].query_parameters
+    assert parameters.filter == ("(start/dateTime ge '2026-01-01T00:00:00Z' and end/dateTime le '2026-12-31T23:59:59Z') "
+                                 "and (isCancelled eq false)")
+    assert parameters.select == ["subject", "start"]
+    assert parameters.orderby == ["start/dateTime ASC"]
+    assert parameters.top == 25
+
+
 @pytest.mark.asyncio
 async def test_get_events_empty(initialise_mock):
     mock_client = initialise_mock
@@ -79,6 +113,83 @@ async def test_get_events_api_error(initialise_mock):
         await service.get_events(user="user1")
 
 
+# ─── CalendarService: calendar_view ───
+
+def _event(event_id, start, subject=None):
+    return Event(id=event_id, subject=subject, start=DateTimeTimeZone(date_time=start, time_zone="UTC"))
+
+
+@pytest.mark.asyncio
+async def test_calendar_view_syncs_incrementally(initialise_mock):
+    mock_client = initialise_mock
+    service = CalendarService(mock_client)
+    delta = mock_client.users.by_user_id.return_value.calendar_view.delta
+    delta.get = AsyncMock(return_value=MagicMock(
+        value=[_event("e2", "2025-01-06T10:00:00", "Standup"), _event("e1", "2025-01-06T09:00:00", "Planning")],
+        odata_next_link=None,
+        odata_delta_link="https://graph/calendarView/delta?token=1",
+    ))
+
+    events = await service.calendar_view(user="room1@example.com", start_date="2025-01-06T00:00:00Z", end_date="2025-01-07T00:00:00Z")
+
+    assert [event.subject for event in events] == ["Planning", "Standup"]
+    query = delta.get.call_args.kwargs["request_configuration"].query_parameters
+    assert (query.start_date_time, query.end_date_time) == ("2025-01-06T00:00:00Z", "2025-01-07T00:00:00Z")
+
+    cancelled = Event(id="e1", additional_data={"@removed": {"reason": "deleted"}})
+    delta.with_url.return_value.get = AsyncMock(return_value=MagicMock(
+        value=[cancelled, _event("e2", "2025-01-06T11:00:00")],
+        odata_next_link=None,
+        odata_delta_link="https://graph/calendarView/delta?token=2",
+    ))
+
+    events = await service.calendar_view(user="room1@example.com", start_date="2025-01-06T00:00:00Z", end_date="2025-01-07T00:00:00Z")
+
+    delta.with_url.assert_called_with("https://graph/calendarView/delta?token=1")
+    assert [(event.id, event.subject, event.start.date_time) for event in events] == [("e2", "Standup", "2025-01-06T11:00:00")]
+
+
+@pytest.mark.asyncio
+async def test_calendar_view_full_sync_when_cache_was_lost(initialise_mock, tmp_path):
+    mock_client = initialise_mock
+    store = SqliteDeltaStore(tmp_path / "sync.db")
+    delta = mock_client.users.by_user_id.return_value.calendar_view.delta
+    delta.get = AsyncMock(return_value=MagicMock(
+        value=[_event("e1", "2025-01-06T09:00:00", "Planning")],
+        odata_next_link=None,
+        odata_delta_link="https://graph/calendarView/delta?token=1",
+    ))
+    window = dict(user="room1@example.com", start_date="2025-01-06T00:00:00Z", end_date="2025-01-07T00:00:00Z")
+    await CalendarService(mock_client, delta_store=store).calendar_view(**window)
+
+    delta.get.reset_mock()
+    events = await CalendarService(mock_client, delta_store=store).calendar_view(**window) # restarted, cache lost
+
+    delta.get.assert_awaited_once()
+    delta.with_url.assert_not_called()
+    assert [event.subject for event in events] == ["Planning"]
+
+
+@pytest.mark.asyncio
+async def test_calendar_view_without_refresh(initialise_mock):
+    mock_client = initialise_mock
+    service = CalendarService(mock_client)
+
+    events = await service.calendar_view(user="room1@example.com", start_date="2025-01-06T00:00:00Z",
+                                         end_date="2025-01-07T00:00:00Z", refresh=False)
+
+    assert events == []
+    mock_client.users.by_user_id.return_value.calendar_view.delta.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_calendar_view_missing_window(initialise_mock):
+    service = CalendarService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Start and end date are required"):
+        await service.calendar_view(user="room1@example.com", start_date="2025-01-06T00:00:00Z")
+
+
 # ─── CalendarService: create_event ───
 
 @pytest.mark.asyncio
@@ -146,6 +257,32 @@ async def test_create_event_api_error(initialise_mock):
         await service.create_event(user="user1", subject="Meeting", start="2026-03-22T10:00:00Z", end="2026-03-22T11:00:00Z")
 
 
+# ─── CalendarService: get_event ───
+
+@pytest.mark.asyncio
+async def test_get_event_revalidates_with_etag(initialise_mock):
+    mock_client = initialise_mock
+    service = CalendarService(mock_client, etag_store=MemoryETagStore())
+    event = Event(id="e1", subject="Standup", additional_data={"@odata.etag": "W/\"abc\""})
+    get = AsyncMock(side_effect=[event, None])
+    mock_client.users.by_user_id.return_value.events.by_event_id.return_value.get = get
+
+    await service.get_event(user="u1", event_id="e1")
+    result = await service.get_event(user="u1", event_id="e1")
+
+    assert result is event
+    mock_client.users.by_user_id.return_value.events.by_event_id.assert_called_with("e1")
+    assert get.await_args.kwargs["request_configuration"].headers.get("If-None-Match") == {"W/\"abc\""}
+
+
+@pytest.mark.asyncio
+async def test_get_event_missing_event_id(initialise_mock):
+    service = CalendarService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Event ID is required"):
+        await service.get_event(user="u1")
+
+
 # ─── CalendarService: update_event ───
 
 @pytest.mark.asyncio
@@ -344,15 +481,28 @@ async def test_list_child_folders_missing_folder_id(initialise_mock):
 
 # ─── EmailsService: get_folder_by_name ───
 
+def mail_folder_tree(mock_client, children):
+    """Serves a mailbox's folders, `children` maps a parent id (None for the top level) to its folders."""
+    mail_folders = mock_client.users.by_user_id.return_value.mail_folders
+    mail_folders.get = AsyncMock(return_value=MagicMock(value=children[None], odata_next_link=None))
+
+    def by_mail_folder_id(folder_id):
+        builder = MagicMock()
+        builder.child_folders.get = AsyncMock(return_value=MagicMock(value=children.get(folder_id, []), odata_next_link=None))
+        return builder
+
+    mail_folders.by_mail_folder_id.side_effect = by_mail_folder_id
+    return mail_folders
+
+
 @pytest.mark.asyncio
 async def test_get_folder_by_name_root(initialise_mock):
     mock_client = initialise_mock
     service = EmailsService(mock_client)
 
-    target_folder = MagicMock(display_name="Inbox")
-    other_folder = MagicMock(display_name="Sent")
-    mock_response = MagicMock(value=[target_folder, other_folder])
-    mock_client.users.by_user_id.return_value.mail_folders.get = AsyncMock(return_value=mock_response)
+    target_folder = MailFolder(id="f1", display_name="Inbox", child_folder_count=0)
+    other_folder = MailFolder(id="f2", display_name="Sent", child_folder_count=0)
+    mail_folder_tree(mock_client, {None: [target_folder, other_folder]})
 
     result = await service.get_folder_by_name(user="user1", target_folder_name="Inbox")
 
@@ -364,11 +514,11 @@ async def test_get_folder_by_name_with_parent(initialise_mock):
     mock_client = initialise_mock
     service = EmailsService(mock_client)
 
-    target_folder = MagicMock(display_name="Archive")
-    mock_response = MagicMock(value=[target_folder])
-    mock_client.users.by_user_id.return_value.mail_folders.by_mail_folder_id.return_value.child_folders.get = AsyncMock(
-        return_value=mock_response
-    )
+    target_folder = MailFolder(id="f2", display_name="Archive", parent_folder_id="parent1", child_folder_count=0)
+    mail_folder_tree(mock_client, {
+        None: [MailFolder(id="parent1", display_name="Inbox", child_folder_count=1)],
+        "parent1": [target_folder],
+    })
 
     result = await service.get_folder_by_name(user="user1", target_folder_name="Archive", parent_folder_id="parent1")
 
@@ -380,15 +530,55 @@ async def test_get_folder_by_name_not_found(initialise_mock):
     mock_client = initialise_mock
     service = EmailsService(mock_client)
 
-    other_folder = MagicMock(display_name="Sent")
-    mock_response = MagicMock(value=[other_folder])
-    mock_client.users.by_user_id.return_value.mail_folders.get = AsyncMock(return_value=mock_response)
+    mail_folder_tree(mock_client, {None: [MailFolder(id="f1", display_name="Sent", child_folder_count=0)]})
 
     result = await service.get_folder_by_name(user="user1", target_folder_name="NonExistent")
 
     assert result is None
 
 
+@pytest.mark.asyncio
+async def test_get_folder_by_name_well_known_parent(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+
+    vendors = MailFolder(id="v1", display_name="Vendors", parent_folder_id="inbox-id", child_folder_count=0)
+    mail_folder_tree(mock_client, {None: [], "inbox": [vendors]})
+
+    result = await service.get_folder_by_name(user="user1", target_folder_name="Vendors", parent_folder_id="inbox")
+
+    assert result is vendors
+
+
+@pytest.mark.asyncio
+async def test_get_folder_by_name_is_live_without_folder_tree_ttl(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    mail_folder_tree(mock_client, {None: [MailFolder(id="f1", display_name="Sent", child_folder_count=0)]})
+    assert await service.get_folder_by_name(user="user1", target_folder_name="Vendors") is None
+
+    vendors = MailFolder(id="f2", display_name="Vendors", child_folder_count=0) # created in another client
+    mail_folders = mail_folder_tree(mock_client, {None: [vendors]})
+
+    assert await service.get_folder_by_name(user="user1", target_folder_name="Vendors") is vendors
+    mail_folders.by_mail_folder_id.assert_not_called() # one level listed, not the whole tree
+
+
+@pytest.mark.asyncio
+async def test_get_folder_by_name_uses_cached_tree(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client, folder_tree_ttl=900)
+    archive = MailFolder(id="a1", display_name="Archive", parent_folder_id="i1", child_folder_count=0)
+    mail_folders = mail_folder_tree(mock_client, {
+        None: [MailFolder(id="i1", display_name="Inbox", child_folder_count=1)],
+        "i1": [archive],
+    })
+
+    assert await service.get_folder_by_name(user="user1", target_folder_name="Inbox") is not None
+    assert await service.get_folder_by_name(user="user1", target_folder_name="Archive", parent_folder_id="i1") is archive
+    mail_folders.get.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_get_folder_by_name_missing_user(initialise_mock):
     mock_client = initialise_mock
@@ -407,6 +597,60 @@ async def test_get_folder_by_name_missing_folder_name(initialise_mock):
         await service.get_folder_by_name(user="user1")
 
 
+# ─── EmailsService: get_folder_by_path ───
+
+@pytest.mark.asyncio
+async def test_get_folder_by_path_lists_the_tree_once(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client, folder_tree_ttl=900)
+    acme = MailFolder(id="a1", display_name="Acme", parent_folder_id="v1", child_folder_count=0)
+    mail_folders = mail_folder_tree(mock_client, {
+        None: [
+            MailFolder(id="i1", display_name="Inbox", parent_folder_id="root", child_folder_count=1),
+            MailFolder(id="s1", display_name="Sent Items", parent_folder_id="root", child_folder_count=0),
+        ],
+        "i1": [MailFolder(id="v1", display_name="Vendors", parent_folder_id="i1", child_folder_count=1)],
+        "v1": [acme],
+    })
+
+    results = await asyncio.gather(*[
+        service.get_folder_by_path(user="user1", folder_path="inbox/vendors/ACME") for _ in range(3)
+    ])
+    tree = await service.get_folder_tree(user="user1")
+
+    assert all(result is acme for result in results)
+    assert await service.get_folder_by_path(user="user1", folder_path="/Inbox/Missing/") is None
+    assert tree.path_of("a1") == "Inbox/Vendors/Acme"
+    assert [folder.id for folder in tree.find("vendors")] == ["v1"]
+    mail_folders.get.assert_awaited_once()
+    assert sorted(call.args[0] for call in mail_folders.by_mail_folder_id.call_args_list) == ["i1", "v1"] # leaves aren't listed
+
+
+@pytest.mark.asyncio
+async def test_folder_tree_refresh_and_ttl(initialise_mock, monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.services.outlook.folder_tree.monotonic", lambda: clock["now"])
+    mock_client = initialise_mock
+    service = EmailsService(mock_client, folder_tree_ttl=60)
+    mail_folders = mail_folder_tree(mock_client, {None: [MailFolder(id="i1", display_name="Inbox", child_folder_count=0)]})
+
+    await service.get_folder_tree(user="user1")
+    await service.get_folder_tree(user="user1")
+    await service.get_folder_tree(user="user1", refresh=True)
+    clock["now"] = 61
+    await service.get_folder_tree(user="user1")
+
+    assert mail_folders.get.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_get_folder_by_path_missing_path(initialise_mock):
+    service = EmailsService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Folder path is required"):
+        await service.get_folder_by_path(user="user1")
+
+
 # ─── EmailsService: get_messages_in_folder ───
 
 @pytest.mark.asyncio
@@ -458,6 +702,215 @@ async def test_get_messages_in_folder_missing_folder_id(initialise_mock):
         await service.get_messages_in_folder(user="user1")
 
 
+# ─── EmailsService: export_folder ───
+
+def mailbox_folder(mock_client, contents, failing=()):
+    """Lists one Message per id of `contents` in the folder, and serves their MIME content."""
+    received = datetime(2025, 1, 14, 9, 30, tzinfo=timezone.utc)
+    folder = mock_client.users.by_user_id.return_value.mail_folders.by_mail_folder_id.return_value
+    folder.messages.get = AsyncMock(return_value=MagicMock(
+        value=[Message(id=message_id, received_date_time=received) for message_id in contents],
+        odata_next_link=None,
+    ))
+
+    def by_message_id(message_id):
+        message = MagicMock()
+        if message_id in failing:
+            message.content.get = AsyncMock(side_effect=Exception("server error"))
+        else:
+            message.content.get = AsyncMock(return_value=contents[message_id])
+        return message
+
+    mock_client.users.by_user_id.return_value.messages.by_message_id.side_effect = by_message_id
+    return folder
+
+
+@pytest.mark.asyncio
+async def test_export_folder_to_tar_resumes_from_checkpoint(initialise_mock, tmp_path):
+    contents = {f"AAMk/{index}+=": f"Subject: {index}\r\n\r\nBody {index}".encode() for index in range(4)}
+    folder = mailbox_folder(initialise_mock, contents, failing={"AAMk/2+="})
+    service = EmailsService(initialise_mock)
+    archive = tmp_path / "inbox.tar"
+    progress = []
+
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=str(archive),
+                                         max_concurrency=2, on_progress=lambda report: progress.append(report.exported))
+
+    assert (report.exported, report.failed, report.skipped) == (3, 1, 0)
+    assert list(report.failures) == ["AAMk/2+="] and len(progress) == 4
+    query = folder.messages.get.call_args.kwargs["request_configuration"].query_parameters
+    assert query.select == ["id", "receivedDateTime"] and query.top == 250
+    with open(archive, "ab") as partial: # a member cut short by a crash
+        partial.write(b"\0" * 700)
+
+    mailbox_folder(initialise_mock, contents)
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=str(archive))
+
+    assert (report.exported, report.failed, report.skipped) == (1, 0, 3)
+    with tarfile.open(archive) as tar:
+        names = tar.getnames()
+        assert len(names) == len(set(names)) == 4
+        assert all(name.startswith("20250114T093000Z-") and name.endswith(".eml") for name in names)
+        assert sorted(tar.extractfile(name).read() for name in names) == sorted(contents.values())
+
+
+@pytest.mark.asyncio
+async def test_export_folder_to_eml_files(initialise_mock, tmp_path):
+    contents = {"m1": b"Subject: one\r\n\r\n1", "m2": b"Subject: two\r\n\r\n2"}
+    mailbox_folder(initialise_mock, contents)
+    service = EmailsService(initialise_mock)
+    destination = tmp_path / "backup"
+
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=destination)
+
+    assert report.exported == 2 and report.bytes == sum(len(content) for content in contents.values())
+    assert sorted(path.read_bytes() for path in destination.iterdir()) == sorted(contents.values())
+    assert (tmp_path / "backup.checkpoint").read_text().count("\n") == 2
+
+
+@pytest.mark.asyncio
+async def test_export_folder_to_zip_appends(initialise_mock, tmp_path):
+    service = EmailsService(initialise_mock)
+    archive = tmp_path / "inbox.zip"
+    mailbox_folder(initialise_mock, {"m1": b"one"})
+    await service.export_folder(user="u1", parent_folder_id="inbox", destination=archive)
+
+    mailbox_folder(initialise_mock, {"m1": b"one", "m2": b"two"})
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=archive)
+
+    assert (report.exported, report.skipped) == (1, 1)
+    with zipfile.ZipFile(archive) as zip_file:
+        assert sorted(zip_file.read(name) for name in zip_file.namelist()) == [b"one", b"two"]
+
+
+@pytest.mark.asyncio
+async def test_export_folder_retries_messages_without_content(initialise_mock, tmp_path):
+    service = EmailsService(initialise_mock)
+    destination = tmp_path / "backup"
+    mailbox_folder(initialise_mock, {"m1": None, "m2": b"two"})
+
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=destination)
+
+    assert (report.exported, list(report.failures)) == (1, ["m1"])
+    assert isinstance(report.failures["m1"], OutlookError)
+    mailbox_folder(initialise_mock, {"m1": b"one", "m2": b"two"})
+    report = await service.export_folder(user="u1", parent_folder_id="inbox", destination=destination)
+
+    assert (report.exported, report.skipped) == (1, 1)
+    assert sorted(path.read_bytes() for path in destination.iterdir()) == [b"one", b"two"]
+
+
+@pytest.mark.asyncio
+async def test_export_folder_stops_downloads_when_a_save_fails(initialise_mock, tmp_path, monkeypatch):
+    from src.python_msgraph_toolkit.utils.bulk import BulkExecutor
+    closed = []
+    run = BulkExecutor.run
+
+    async def tracked_run(self, jobs):
+        try:
+            async for result in run(self, jobs):
+                yield result
+        finally:
+            closed.append(asyncio.current_task()) # the loop's finalizer would close it from a task of its own
+
+    def disk_full(self, name, content):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(BulkExecutor, "run", tracked_run)
+    monkeypatch.setattr(DirectoryWriter, "_write", disk_full)
+    mailbox_folder(initialise_mock, {f"m{index}": b"mail" for index in range(10)})
+    service = EmailsService(initialise_mock)
+
+    with pytest.raises(OSError):
+        await service.export_folder(user="u1", parent_folder_id="inbox", destination=tmp_path / "backup")
+
+    assert closed == [asyncio.current_task()]
+
+
+def test_export_writer_requires_write():
+    class Incomplete(ExportWriter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("backup", None)
+
+
+@pytest.mark.asyncio
+async def test_export_folder_invalid_format(initialise_mock, tmp_path):
+    service = EmailsService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Export format"):
+        await service.export_folder(user="u1", parent_folder_id="inbox", destination=tmp_path / "x", format="pst")
+
+
+# ─── EmailsService: iter_message_changes ───
+
+@pytest.mark.asyncio
+async def test_iter_message_changes(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    delta = mock_client.users.by_user_id.return_value.mail_folders.by_mail_folder_id.return_value.messages.delta
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    delta.get = AsyncMock(return_value=MagicMock(
+        value=[Message(id="m1", created_date_time=old)],
+        odata_next_link=None,
+        odata_delta_link="https://graph/messages/delta?token=1",
+    ))
+
+    first = [(change.kind, change.item.id) async for change in service.iter_message_changes(
+        user="support@example.com", parent_folder_id="inbox", select=["id", "subject"], page_size=50,
+    )]
+
+    assert first == [("added", "m1")]
+    configuration = delta.get.call_args.kwargs["request_configuration"]
+    assert configuration.query_parameters.select == ["id", "subject", "createdDateTime"]
+    assert configuration.headers.get("Prefer") == {"odata.maxpagesize=50"}
+
+    delta.with_url.return_value.get = AsyncMock(return_value=MagicMock(
+        value=[
+            Message(id="m1", created_date_time=old),
+            Message(id="m2", additional_data={"@removed": {"reason": "deleted"}}),
+            Message(id="m3", created_date_time=datetime.now(timezone.utc)),
+        ],
+        odata_next_link=None,
+        odata_delta_link="https://graph/messages/delta?token=2",
+    ))
+
+    second = [(change.kind, change.item.id) async for change in service.iter_message_changes(
+        user="support@example.com", parent_folder_id="inbox",
+    )]
+
+    delta.with_url.assert_called_with("https://graph/messages/delta?token=1")
+    assert second == [("changed", "m1"), ("deleted", "m2"), ("added", "m3")]
+
+
+@pytest.mark.asyncio
+async def test_iter_message_changes_replays_when_not_consumed(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    delta = mock_client.users.by_user_id.return_value.mail_folders.by_mail_folder_id.return_value.messages.delta
+    delta.get = AsyncMock(return_value=MagicMock(
+        value=[Message(id="m1"), Message(id="m2")],
+        odata_next_link=None,
+        odata_delta_link="https://graph/messages/delta?token=1",
+    ))
+
+    async for change in service.iter_message_changes(user="u1", parent_folder_id="inbox"):
+        break
+    async for change in service.iter_message_changes(user="u1", parent_folder_id="inbox"):
+        pass
+
+    assert delta.get.await_count == 2
+    delta.with_url.assert_not_called()
+
+
+def test_iter_message_changes_missing_folder(initialise_mock):
+    service = EmailsService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Mail folder ID is required"):
+        service.iter_message_changes(user="u1")
+
+
 # ─── EmailsService: send ───
 
 @pytest.mark.asyncio
@@ -504,6 +957,216 @@ async def test_send_api_error(initialise_mock):
         await service.send(sender="sender@test.com", to_recipients=["recipient@test.com"])
 
 
+@pytest.mark.asyncio
+async def test_send_encodes_binary_attachments_inline(initialise_mock, tmp_path):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    mock_client.users.by_user_id.return_value.send_mail.post = AsyncMock()
+    image = tmp_path / "logo.png"
+    image.write_bytes(bytes(range(256)) * 10) # not valid UTF-8
+
+    result = await service.send(sender="sender@test.com", to_recipients=["recipient@test.com"], attachments=[str(image)])
+
+    assert result is True
+    [attachment] = mock_client.users.by_user_id.return_value.send_mail.post.call_args.args[0].message.attachments
+    assert attachment.name == "logo.png" and attachment.content_type == "image/png"
+    assert base64.b64decode(attachment.additional_data["contentBytes"]) == image.read_bytes()
+
+
+def test_encode_file_in_blocks(tmp_path):
+    content = tmp_path / "data.bin"
+    content.write_bytes(bytes(range(256)) * 40)
+
+    assert encode_file(str(content), block_size=3 * 7) == base64.b64encode(content.read_bytes()).decode()
+
+
+@pytest.mark.asyncio
+async def test_send_streams_large_attachments_through_a_draft(initialise_mock, tmp_path, monkeypatch):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    messages = mock_client.users.by_user_id.return_value.messages
+    messages.post = AsyncMock(return_value=Message(id="draft1"))
+    draft = messages.by_message_id.return_value
+    draft.attachments.post = AsyncMock()
+    draft.attachments.create_upload_session.post = AsyncMock(return_value=MagicMock(upload_url="https://outlook/upload"))
+    draft.send.post = AsyncMock()
+    large = tmp_path / "backup.zip"
+    large.write_bytes(b"z" * (ATTACHMENT_CHUNK_SIZE + 1000))
+    small = tmp_path / "notes.txt"
+    small.write_bytes(b"notes")
+    ranges = []
+
+    def handler(request):
+        assert "Authorization" not in request.headers
+        ranges.append(request.headers["Content-Range"])
+        if len(ranges) == 1: # attachment sessions acknowledge fragments with 200
+            return httpx.Response(200, json={"nextExpectedRanges": [f"{ATTACHMENT_CHUNK_SIZE}-"]})
+        return httpx.Response(201)
+
+    monkeypatch.setattr(
+        "src.python_msgraph_toolkit.services.outlook.emails.transfer_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    result = await service.send(sender="sender@test.com", to_recipients=["recipient@test.com"],
+                                attachments=[str(large), str(small)])
+
+    assert result is True
+    size = large.stat().st_size
+    assert ranges == [f"bytes 0-{ATTACHMENT_CHUNK_SIZE - 1}/{size}", f"bytes {ATTACHMENT_CHUNK_SIZE}-{size - 1}/{size}"]
+    session_item = draft.attachments.create_upload_session.post.call_args.args[0].attachment_item
+    assert (session_item.name, session_item.size) == ("backup.zip", size)
+    assert draft.attachments.post.call_args.args[0].name == "notes.txt"
+    messages.by_message_id.assert_called_with("draft1")
+    draft.send.post.assert_awaited_once()
+    mock_client.users.by_user_id.return_value.send_mail.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_deletes_the_draft_when_an_attachment_fails(initialise_mock, tmp_path):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+    messages = mock_client.users.by_user_id.return_value.messages
+    messages.post = AsyncMock(return_value=Message(id="draft1"))
+    draft = messages.by_message_id.return_value
+    draft.attachments.create_upload_session.post = AsyncMock(side_effect=Exception("server error"))
+    draft.send.post = AsyncMock()
+    draft.delete = AsyncMock()
+    large = tmp_path / "backup.zip"
+    large.write_bytes(b"z" * (4 * 1024 * 1024))
+
+    with pytest.raises(GraphAPIError):
+        await service.send(sender="sender@test.com", to_recipients=["recipient@test.com"], attachments=[str(large)])
+
+    draft.delete.assert_awaited_once()
+    draft.send.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_missing_attachment(initialise_mock):
+    mock_client = initialise_mock
+    service = EmailsService(mock_client)
+
+    with pytest.raises(ValidationError, match="Attachment not found"):
+        await service.send(sender="sender@test.com", to_recipients=["recipient@test.com"], attachments=["/no/such/file.pdf"])
+    mock_client.users.by_user_id.return_value.send_mail.post.assert_not_called()
+
+
+# ─── EmailsService: mail merge ───
+
+def mailboxes(mock_client, send):
+    """Gives every mailbox its own mock, send(mailbox, request_body) handles its sendMail calls."""
+    users = {}
+
+    def by_user_id(mailbox):
+        if mailbox not in users:
+            async def send_mail(body):
+                await send(mailbox, body)
+
+            users[mailbox] = MagicMock()
+            users[mailbox].send_mail.post = AsyncMock(side_effect=send_mail)
+        return users[mailbox]
+
+    mock_client.users.by_user_id.side_effect = by_user_id
+    return users
+
+
+@pytest.mark.asyncio
+async def test_send_merge_personalises_and_shares_attachments(initialise_mock, tmp_path):
+    terms = tmp_path / "terms.pdf"
+    terms.write_bytes(b"%PDF terms")
+    sent = []
+
+    async def send(mailbox, body):
+        if body.message.to_recipients[0].email_address.address == "bounce@example.com":
+            raise Exception("server error")
+        sent.append((mailbox, body.message))
+
+    mailboxes(initialise_mock, send)
+    service = EmailsService(initialise_mock)
+    template = MailTemplate(subject="Invoice $number", body="Dear ${name}, see attached.",
+                            bcc_recipients=["archive@contoso.com"], attachments=[str(terms)])
+    records = [
+        {"email": "ann@example.com", "name": "Ann", "number": 1},
+        {"email": "bob@example.com", "name": "Bob", "number": 2},
+        {"email": "cat@example.com", "name": "Cat"}, # no number
+        {"name": "Dan", "number": 4}, # no address
+        {"email": "bounce@example.com", "name": "Eve", "number": 5},
+        {"email": "fay@example.com", "name": "Fay", "number": 6, "sender": "vip@contoso.com"},
+    ]
+    progress = []
+
+    report = await service.send_merge(template=template, records=records, senders=["n1@contoso.com", "n2@contoso.com"],
+                                      messages_per_minute=60_000, on_progress=lambda report: progress.append(report.processed))
+
+    assert report.sent == 3 and report.failed == 3 and report.processed == 6
+    assert sorted(progress) == [1, 2, 3, 4, 5, 6]
+    assert {failure.index: failure.address for failure in report.failures} == {2: "cat@example.com", 3: None, 4: "bounce@example.com"}
+    assert all(isinstance(failure.error, (ValidationError, GraphAPIError)) for failure in report.failures)
+    messages = {message.subject: (mailbox, message) for mailbox, message in sent}
+    assert messages["Invoice 1"][0] == "n1@contoso.com" and messages["Invoice 2"][0] == "n2@contoso.com"
+    assert messages["Invoice 6"][0] == "vip@contoso.com"
+    assert messages["Invoice 2"][1].body.content == "Dear Bob, see attached."
+    first, second = messages["Invoice 1"][1], messages["Invoice 2"][1]
+    assert first.attachments[0] is second.attachments[0] # encoded once
+    assert first.bcc_recipients is second.bcc_recipients
+    assert report.throughput > 0
+
+
+@pytest.mark.asyncio
+async def test_iter_merge_limits_each_mailbox(initialise_mock):
+    running = {}
+    peak = {}
+
+    async def send(mailbox, body):
+        running[mailbox] = running.get(mailbox, 0) + 1
+        peak[mailbox] = max(peak.get(mailbox, 0), running[mailbox])
+        await asyncio.sleep(0.01)
+        running[mailbox] -= 1
+
+    mailboxes(initialise_mock, send)
+    service = EmailsService(initialise_mock)
+    records = ({"email": f"user{index}@example.com"} for index in range(20))
+
+    results = [result async for result in service.iter_merge(
+        template=MailTemplate(subject="Notice"), records=records, senders=["n1@contoso.com", "n2@contoso.com"],
+        messages_per_minute=60_000, mailbox_concurrency=2, max_recipients=8,
+    )]
+
+    assert peak == {"n1@contoso.com": 2, "n2@contoso.com": 2}
+    assert sum(result.ok for result in results) == 16
+    assert {result.mailbox for result in results if not result.ok} == {"n1@contoso.com", "n2@contoso.com"}
+    assert all("recipient limit" in str(result.error) for result in results if not result.ok)
+
+
+@pytest.mark.asyncio
+async def test_iter_merge_failed_sends_keep_the_recipient_budget(initialise_mock):
+    async def send(mailbox, body):
+        address = body.message.to_recipients[0].email_address.address
+        if address in ("user0@example.com", "user1@example.com"):
+            raise Exception("server error")
+
+    mailboxes(initialise_mock, send)
+    service = EmailsService(initialise_mock)
+    records = [{"email": f"user{index}@example.com"} for index in range(5)]
+
+    results = [result async for result in service.iter_merge(
+        template=MailTemplate(subject="Notice"), records=records, senders=["n1@contoso.com"],
+        messages_per_minute=60_000, max_recipients=3,
+    )]
+
+    assert [result.ok for result in sorted(results, key=lambda result: result.index)] == [False, False, True, True, True]
+    assert not any("recipient limit" in str(result.error) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_send_merge_requires_a_sender(initialise_mock):
+    service = EmailsService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="At least one sender is required"):
+        await service.send_merge(template=MailTemplate(subject="Notice"), records=[])
+
+
 # ─── EmailsService: reply ───
 
 @pytest.mark.asyncio
@@ -1,10 +1,23 @@
+import asyncio
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock
+import httpx
 import pytest
 
 from src.python_msgraph_toolkit.services.sharepoint.files import FileService
 from src.python_msgraph_toolkit.services.sharepoint.drives import DriveService
 from src.python_msgraph_toolkit.services.sharepoint.sites import SitesService
-from src.python_msgraph_toolkit.services.exceptions import ValidationError, GraphAPIError
+from src.python_msgraph_toolkit.services.sharepoint.site_directory import SiteDirectory
+from src.python_msgraph_toolkit.services.sharepoint.path_cache import DrivePathCache
+from msgraph.generated.models.item_reference import ItemReference
+from kiota_abstractions.api_error import APIError
+from msgraph.generated.models.drive_item import DriveItem
+from msgraph.generated.models.site import Site
+from src.python_msgraph_toolkit.utils.cache import ResponseCache
+from src.python_msgraph_toolkit.utils.etag import MemoryETagStore
+from src.python_msgraph_toolkit.utils.transport import TransportConfig
+from src.python_msgraph_toolkit.utils.query import F, QueryOptions
+from src.python_msgraph_toolkit.services.exceptions import ValidationError, GraphAPIError, SharePointError
 
 @pytest.fixture
 def initialise_mock():
@@ -35,6 +48,32 @@ async def test_list_folder_contents(initialise_mock):
     mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.assert_called_once_with(parent_folder_id)
 
 
+@pytest.mark.asyncio
+async def test_iter_folder_contents_pages(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    children = mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.children
+    first_page = MagicMock(value=[MagicMock(), MagicMock()], odata_next_link="https://next/page2")
+    second_page = MagicMock(value=[MagicMock()], odata_next_link=None)
+    children.get = AsyncMock(return_value=first_page)
+    children.with_url.return_value.get = AsyncMock(return_value=second_page)
+
+    pages = [page async for page in service.iter_folder_contents(drive_id="d1", parent_folder_id="f1").pages()]
+
+    assert pages == [first_page.value, second_page.value]
+    children.with_url.assert_called_once_with("https://next/page2")
+
+
+@pytest.mark.asyncio
+async def test_iter_folder_contents_missing_drive_id(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    with pytest.raises(ValidationError, match="Drive ID is required"):
+        service.iter_folder_contents(parent_folder_id="folder1")
+
+
 @pytest.mark.asyncio
 async def test_list_folder_contents_missing_drive_id(initialise_mock):
     mock_client = initialise_mock
@@ -136,6 +175,33 @@ async def test_get_item_by_path(initialise_mock):
     mock_client.drives.by_drive_id.assert_called_once_with("d1")
 
 
+@pytest.mark.asyncio
+async def test_get_item_by_path_puts_query_in_url(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    root = mock_client.drives.by_drive_id.return_value.root
+    root.with_url.return_value.get = AsyncMock(return_value=None)
+
+    await service.get_item_by_path(drive_id="d1", item_path="docs/report.pdf", query=QueryOptions(select=[F.id, F.e_tag]))
+
+    root.with_url.assert_called_once_with("https://graph.microsoft.com/v1.0/drives/d1/root:/docs/report.pdf?$select=id,eTag")
+
+
+@pytest.mark.asyncio
+async def test_get_item_by_name_combines_filters(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    children = mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.children
+    children.get = AsyncMock(return_value=MagicMock(value=[]))
+
+    await service.get_item_by_name(drive_id="d1", parent_folder_id="f1", item_name="report.pdf",
+                                   query=QueryOptions(select=["id"], filter=F.size > 0))
+
+    parameters = children.get.await_args.args[0].query_parameters
+    assert parameters.filter == "(name eq 'report.pdf') and (size gt 0)"
+    assert parameters.select == ["id"]
+
+
 @pytest.mark.asyncio
 async def test_get_item_by_path_missing_drive_id(initialise_mock):
     mock_client = initialise_mock
@@ -154,6 +220,87 @@ async def test_get_item_by_path_missing_item_path(initialise_mock):
         await service.get_item_by_path(drive_id="d1")
 
 
+# ─── FileService: resolve_path ───
+
+def path_lookups(mock_client, items):
+    """Answers `with_url` path lookups from a dict of url suffix -> DriveItem, missing suffixes 404."""
+    urls = []
+
+    def with_url(url):
+        urls.append(url.split("/v1.0/drives/d1/")[1].split("?")[0])
+        item = items.get(urls[-1])
+        get = AsyncMock(return_value=item) if item else AsyncMock(side_effect=APIError("itemNotFound", response_status_code=404))
+        return MagicMock(get=get)
+
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.with_url.side_effect = with_url
+    return urls
+
+
+@pytest.mark.asyncio
+async def test_resolve_paths_looks_up_only_missing_suffixes(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    urls = path_lookups(mock_client, {
+        "root:/Reports": DriveItem(id="r1"),
+        "items/r1:/2024": DriveItem(id="y24", parent_reference=ItemReference(id="r1")),
+        "items/r1:/2025%20Q1": DriveItem(id="y25", parent_reference=ItemReference(id="r1")),
+    })
+
+    assert await service.resolve_path(drive_id="d1", item_path="/Reports") == "r1"
+    result = await service.resolve_paths(drive_id="d1", item_paths=["/Reports/2024", "/reports/2024/", "/Reports/2025 Q1", "/Missing", "/Reports"])
+
+    assert result == {"/Reports/2024": "y24", "/reports/2024/": "y24", "/Reports/2025 Q1": "y25", "/Missing": None, "/Reports": "r1"}
+    assert sorted(urls) == ["items/r1:/2024", "items/r1:/2025%20Q1", "root:/Missing", "root:/Reports"]
+    assert await service.resolve_path(drive_id="d1", item_path="/REPORTS/2024") == "y24"
+    assert len(urls) == 4
+
+
+@pytest.mark.asyncio
+async def test_move_item_invalidates_resolved_subtree(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.patch = AsyncMock()
+    urls = path_lookups(mock_client, {"root:/A/B": DriveItem(id="b1", parent_reference=ItemReference(id="a1"))})
+
+    await service.resolve_path(drive_id="d1", item_path="A/B")
+    assert await service.resolve_path(drive_id="d1", item_path="A") == "a1" # learnt from the parent reference
+    await service.move_item(drive_id="d1", item_id="a1", new_location_id="elsewhere")
+    await service.resolve_path(drive_id="d1", item_path="A/B")
+
+    assert urls == ["root:/A/B", "root:/A/B"]
+
+
+@pytest.mark.asyncio
+async def test_create_folder_caches_path_under_known_parent(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    path_lookups(mock_client, {"root:/Projects": DriveItem(id="p1")})
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.children.post = AsyncMock(
+        return_value=DriveItem(id="new1", name="Alpha")
+    )
+
+    await service.resolve_path(drive_id="d1", item_path="/Projects")
+    await service.create_folder(drive_id="d1", parent_folder_id="p1", new_folder_name="Alpha")
+
+    assert await service.resolve_path(drive_id="d1", item_path="/Projects/alpha") == "new1"
+
+
+def test_drive_path_cache_expires_and_invalidates(monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.services.sharepoint.path_cache.monotonic", lambda: clock["now"])
+    cache = DrivePathCache(ttl=60)
+    cache.put("d1", ("Docs",), "docs")
+    cache.put("d1", ("Docs", "Specs"), "specs")
+
+    assert cache.longest_prefix("d1", ("docs", "specs", "v2.pdf")) == (2, "specs")
+    cache.invalidate_item("d1", "docs")
+    assert cache.get("d1", "/Docs/Specs") is None and len(cache) == 0
+
+    cache.put("d1", ("Docs",), "docs")
+    clock["now"] = 61
+    assert cache.get("d1", "Docs") is None
+
+
 # ─── FileService: get_item_by_id ───
 
 @pytest.mark.asyncio
@@ -191,6 +338,37 @@ async def test_get_item_by_id_missing_item_id(initialise_mock):
         await service.get_item_by_id(drive_id="d1")
 
 
+@pytest.mark.asyncio
+async def test_get_item_by_id_revalidates_with_etag(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client, etag_store=MemoryETagStore())
+    item = DriveItem(id="item123", name="report.pdf", e_tag="\"{1},2\"")
+    get = AsyncMock(side_effect=[item, None]) # None is how the SDK returns a 304
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.get = get
+
+    await service.get_item_by_id(drive_id="d1", item_id="item123")
+    result = await service.get_item_by_id(drive_id="d1", item_id="item123")
+
+    assert result is item
+    assert get.await_args.kwargs["request_configuration"].headers.get("If-None-Match") == {"\"{1},2\""}
+
+
+@pytest.mark.asyncio
+async def test_get_item_by_id_stores_selections_apart(initialise_mock):
+    mock_client = initialise_mock
+    store = MemoryETagStore()
+    service = FileService(mock_client, etag_store=store)
+    get = AsyncMock(side_effect=[DriveItem(id="item123", e_tag="\"{1},2\""), DriveItem(id="item123", e_tag="\"{1},2\"")])
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.get = get
+
+    await service.get_item_by_id(drive_id="d1", item_id="item123")
+    await service.get_item_by_id(drive_id="d1", item_id="item123", query=QueryOptions(select=["id", "eTag"]))
+
+    configuration = get.await_args.kwargs["request_configuration"]
+    assert configuration.query_parameters.select == ["id", "eTag"]
+    assert not configuration.headers.contains("If-None-Match") # a partial copy isn't a revalidation of the full one
+
+
 # ─── FileService: create_folder ───
 
 @pytest.mark.asyncio
@@ -261,6 +439,22 @@ async def test_delete_item_missing_item_id(initialise_mock):
         await service.delete_item(drive_id="d1")
 
 
+@pytest.mark.asyncio
+async def test_delete_item_invalidates_cached_lookups(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client, cache=ResponseCache())
+    item_builder = mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value
+    item_builder.get = AsyncMock(return_value=DriveItem(id="item1"))
+    item_builder.delete = AsyncMock()
+
+    await service.get_item_by_id(drive_id="d1", item_id="item1")
+    await service.get_item_by_id(drive_id="d1", item_id="item1")
+    await service.delete_item(drive_id="d1", item_id="item1")
+    await service.get_item_by_id(drive_id="d1", item_id="item1")
+
+    assert item_builder.get.await_count == 2
+
+
 # ─── FileService: move_item ───
 
 @pytest.mark.asyncio
@@ -294,6 +488,257 @@ async def test_move_item_missing_new_location(initialise_mock):
         await service.move_item(drive_id="d1", item_id="item1")
 
 
+# ─── FileService: upload_file ───
+
+@pytest.mark.asyncio
+async def test_upload_file(initialise_mock, tmp_path, monkeypatch):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    local_file = tmp_path / "report.pdf"
+    local_file.write_bytes(b"%PDF" * 1000)
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.create_upload_session.post = AsyncMock(
+        return_value=MagicMock(upload_url="https://upload/session")
+    )
+
+    def handler(request):
+        assert "Authorization" not in request.headers
+        assert request.headers["Content-Range"] == "bytes 0-3999/4000"
+        return httpx.Response(201, json={"id": "item1", "name": "report.pdf", "size": 4000})
+
+    monkeypatch.setattr(
+        "src.python_msgraph_toolkit.services.sharepoint.files.transfer_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    result = await service.upload_file(drive_id="d1", parent_folder_id="root", source=str(local_file))
+
+    assert result.id == "item1"
+    assert result.size == 4000
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.assert_called_once_with("root:/report.pdf:")
+
+
+@pytest.mark.asyncio
+async def test_upload_file_missing_source(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    with pytest.raises(ValidationError, match="Source is required"):
+        await service.upload_file(drive_id="d1", parent_folder_id="root")
+
+
+@pytest.mark.asyncio
+async def test_upload_file_stream_requires_name(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    async def stream():
+        yield b"data"
+
+    with pytest.raises(ValidationError, match="File name is required"):
+        await service.upload_file(drive_id="d1", parent_folder_id="root", source=stream(), size=4)
+
+
+@pytest.mark.asyncio
+async def test_file_service_transfers_use_transport_pool(initialise_mock):
+    transport = TransportConfig()
+    service = FileService(initialise_mock, transport=transport)
+
+    async with service._transfer_client() as http:
+        assert http._transport._transport is transport._transfer_pool
+    assert transport._transfer_pool is not None
+    await transport.aclose()
+
+
+# ─── FileService: walk_drive ───
+
+def _drive_tree(mock_client, tree):
+    """tree maps folder id -> list of (id, is_folder)"""
+    listed = []
+    def by_drive_item_id(folder_id):
+        listed.append(folder_id)
+        builder = MagicMock()
+        children = [MagicMock(id=item_id, folder=MagicMock() if is_folder else None) for item_id, is_folder in tree.get(folder_id, [])]
+        for child in children:
+            child.name = child.id
+        builder.children.get = AsyncMock(return_value=MagicMock(value=children, odata_next_link=None))
+        return builder
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.side_effect = by_drive_item_id
+    return listed
+
+
+@pytest.mark.asyncio
+async def test_walk_drive(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    listed = _drive_tree(mock_client, {
+        "root": [("a", True), ("b", True), ("f1", False)],
+        "a": [("a1", True), ("f2", False)],
+        "a1": [("f3", False)],
+        "b": [("f4", False)],
+    })
+
+    items = [item.id async for item in service.walk_drive(drive_id="d1", max_concurrency=2)]
+
+    assert sorted(items) == ["a", "a1", "b", "f1", "f2", "f3", "f4"]
+    assert items.index("f1") < items.index("f3") # breadth first
+    assert sorted(listed) == ["a", "a1", "b", "root"]
+
+
+@pytest.mark.asyncio
+async def test_walk_drive_prune_filter_and_depth(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    listed = _drive_tree(mock_client, {
+        "root": [("a", True), ("archive", True), ("f1", False)],
+        "a": [("a1", True), ("f2", False)],
+        "a1": [("f3", False)],
+        "archive": [("old", False)],
+    })
+
+    items = [item.id async for item in service.walk_drive(
+        drive_id="d1",
+        max_depth=2,
+        prune=lambda folder: folder.name == "archive",
+        filter=lambda item: item.folder is None,
+    )]
+
+    assert sorted(items) == ["f1", "f2"]
+    assert sorted(listed) == ["a", "root"]
+
+
+def test_walk_drive_missing_drive_id(initialise_mock):
+    service = FileService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Drive ID is required"):
+        service.walk_drive(folder_id="root")
+
+
+@pytest.mark.asyncio
+async def test_walk_drive_api_error(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.children.get = AsyncMock(
+        side_effect=Exception("API Error")
+    )
+
+    with pytest.raises(GraphAPIError):
+        [item async for item in service.walk_drive(drive_id="d1")]
+
+
+# ─── FileService: download_item / stream_item ───
+
+def _ranged_content_transport(content, requests):
+    def handler(request):
+        requests.append(request)
+        assert "Authorization" not in request.headers
+        start, end = (int(value) for value in request.headers["Range"][len("bytes="):].split("-"))
+        return httpx.Response(206, content=content[start:end + 1])
+    return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _downloadable_item(mock_client, size):
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.get = AsyncMock(
+        return_value=MagicMock(size=size, folder=None, additional_data={"@microsoft.graph.downloadUrl": "https://download/item"})
+    )
+
+
+@pytest.mark.asyncio
+async def test_download_item(initialise_mock, tmp_path, monkeypatch):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    content = bytes(range(256)) * 40
+    _downloadable_item(mock_client, len(content))
+    requests = []
+    monkeypatch.setattr(
+        "src.python_msgraph_toolkit.services.sharepoint.files.transfer_client",
+        _ranged_content_transport(content, requests),
+    )
+
+    destination = tmp_path / "copy.bin"
+    result = await service.download_item(drive_id="d1", item_id="i1", destination=destination, segment_size=4096)
+
+    assert result == str(destination)
+    assert destination.read_bytes() == content
+    assert sorted(request.headers["Range"] for request in requests) == ["bytes=0-4095", "bytes=4096-8191", "bytes=8192-10239"]
+
+
+@pytest.mark.asyncio
+async def test_stream_item_refreshes_url_past_etag_store(initialise_mock, monkeypatch):
+    mock_client = initialise_mock
+    service = FileService(mock_client, etag_store=MemoryETagStore(), cache=ResponseCache())
+    content = b"abcdefghij" * 100
+    current = {"url": "https://download/stale"}
+
+    async def get(request_configuration=None):
+        if request_configuration and request_configuration.headers.contains("If-None-Match"):
+            return None # 304, the eTag doesn't change when the download url expires
+        item = DriveItem(id="i1", name="report.pdf", size=len(content), e_tag="\"v1\"")
+        item.additional_data = {"@microsoft.graph.downloadUrl": current["url"]}
+        return item
+
+    def handler(request):
+        if str(request.url) == "https://download/stale":
+            current["url"] = "https://download/fresh"
+            return httpx.Response(403)
+        start, end = (int(value) for value in request.headers["Range"][len("bytes="):].split("-"))
+        return httpx.Response(206, content=content[start:end + 1])
+
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.get = get
+    monkeypatch.setattr("src.python_msgraph_toolkit.services.sharepoint.files.transfer_client",
+                        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    await service.get_item_by_id(drive_id="d1", item_id="i1") # stores the item and its soon stale url
+
+    chunks = [chunk async for chunk in service.stream_item(drive_id="d1", item_id="i1", segment_size=400)]
+
+    assert b"".join(chunks) == content
+
+
+@pytest.mark.asyncio
+async def test_download_item_missing_destination(initialise_mock):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+
+    with pytest.raises(ValidationError, match="Destination is required"):
+        await service.download_item(drive_id="d1", item_id="i1")
+
+
+@pytest.mark.asyncio
+async def test_download_item_folder(initialise_mock, tmp_path):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.get = AsyncMock(
+        return_value=MagicMock(additional_data={})
+    )
+
+    with pytest.raises(SharePointError, match="no downloadable content"):
+        await service.download_item(drive_id="d1", item_id="i1", destination=tmp_path / "folder")
+
+
+@pytest.mark.asyncio
+async def test_stream_item(initialise_mock, monkeypatch):
+    mock_client = initialise_mock
+    service = FileService(mock_client)
+    content = b"abcdefghij" * 1000
+    _downloadable_item(mock_client, len(content))
+    monkeypatch.setattr(
+        "src.python_msgraph_toolkit.services.sharepoint.files.transfer_client",
+        _ranged_content_transport(content, []),
+    )
+
+    chunks = [chunk async for chunk in service.stream_item(drive_id="d1", item_id="i1", segment_size=3000, max_concurrency=2)]
+
+    assert [len(chunk) for chunk in chunks] == [3000, 3000, 3000, 1000]
+    assert b"".join(chunks) == content
+
+
+def test_stream_item_missing_item_id(initialise_mock):
+    service = FileService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Item ID is required"):
+        service.stream_item(drive_id="d1")
+
+
 # ─── DriveService: get_drive_root_folder ───
 
 @pytest.mark.asyncio
@@ -332,6 +777,53 @@ async def test_get_drive_root_folder_api_error(initialise_mock):
         await service.get_drive_root_folder(drive_id="bad_drive")
 
 
+# ─── DriveService: sync_drive ───
+
+@pytest.mark.asyncio
+async def test_sync_drive(initialise_mock):
+    mock_client = initialise_mock
+    service = DriveService(mock_client)
+    delta = mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.return_value.delta
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    delta.get = AsyncMock(return_value=MagicMock(
+        value=[MagicMock(id="a", deleted=None, created_date_time=old), MagicMock(id="b", deleted=None, created_date_time=old)],
+        odata_next_link=None,
+        odata_delta_link="https://graph/delta?token=1",
+    ))
+
+    first = await service.sync_drive(drive_id="d1")
+
+    assert first.full_sync
+    assert [item.id for item in first.added] == ["a", "b"]
+    mock_client.drives.by_drive_id.return_value.items.by_drive_item_id.assert_called_with("root")
+
+    delta.with_url.return_value.get = AsyncMock(return_value=MagicMock(
+        value=[
+            MagicMock(id="a", deleted=None, created_date_time=old),
+            MagicMock(id="b", deleted=MagicMock()),
+            MagicMock(id="c", deleted=None, created_date_time=datetime.now(timezone.utc)),
+        ],
+        odata_next_link=None,
+        odata_delta_link="https://graph/delta?token=2",
+    ))
+
+    second = await service.sync_drive(drive_id="d1")
+
+    delta.with_url.assert_called_with("https://graph/delta?token=1")
+    assert not second.full_sync
+    assert [item.id for item in second.added] == ["c"]
+    assert [item.id for item in second.changed] == ["a"]
+    assert [item.id for item in second.deleted] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_sync_drive_missing_drive_id(initialise_mock):
+    service = DriveService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="Drive ID is required"):
+        await service.sync_drive()
+
+
 # ─── SitesService: get_all_sites ───
 
 @pytest.mark.asyncio
@@ -396,17 +888,33 @@ async def test_get_site_by_id_missing(initialise_mock):
         await service.get_site_by_id()
 
 
+@pytest.mark.asyncio
+async def test_get_site_by_id_cached(initialise_mock):
+    mock_client = initialise_mock
+    service = SitesService(mock_client, cache=ResponseCache())
+    mock_client.sites.by_site_id.return_value.get = AsyncMock(return_value=Site(id="site123"))
+
+    first = await service.get_site_by_id(site_id="site123")
+    second = await service.get_site_by_id(site_id="site123")
+
+    assert first.id == second.id == "site123"
+    mock_client.sites.by_site_id.return_value.get.assert_awaited_once()
+
+
 # ─── SitesService: get_site_by_displayname ───
 
+def sites_delta_page(sites, delta_link="https://graph/sites/delta?token=1"):
+    return MagicMock(value=sites, odata_next_link=None, odata_delta_link=delta_link)
+
+
 @pytest.mark.asyncio
 async def test_get_site_by_displayname_found(initialise_mock):
     mock_client = initialise_mock
     service = SitesService(mock_client)
 
-    site_a = MagicMock(display_name="Project Alpha")
-    site_b = MagicMock(display_name="Project Beta")
-    mock_response = MagicMock(value=[site_a, site_b])
-    mock_client.sites.get_all_sites.get = AsyncMock(return_value=mock_response)
+    site_a = Site(id="a", display_name="Project Alpha")
+    site_b = Site(id="b", display_name="Project Beta")
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([site_a, site_b]))
 
     result = await service.get_site_by_displayname(site_name="Project Alpha")
     assert result is site_a
@@ -417,9 +925,8 @@ async def test_get_site_by_displayname_case_insensitive(initialise_mock):
     mock_client = initialise_mock
     service = SitesService(mock_client)
 
-    site = MagicMock(display_name="My Site")
-    mock_response = MagicMock(value=[site])
-    mock_client.sites.get_all_sites.get = AsyncMock(return_value=mock_response)
+    site = Site(id="s1", display_name="My Site")
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([site]))
 
     result = await service.get_site_by_displayname(site_name="my site")
     assert result is site
@@ -430,9 +937,8 @@ async def test_get_site_by_displayname_not_found(initialise_mock):
     mock_client = initialise_mock
     service = SitesService(mock_client)
 
-    site = MagicMock(display_name="Other Site")
-    mock_response = MagicMock(value=[site])
-    mock_client.sites.get_all_sites.get = AsyncMock(return_value=mock_response)
+    site = Site(id="s1", display_name="Other Site")
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([site]))
 
     result = await service.get_site_by_displayname(site_name="NonExistent")
     assert result is None
@@ -447,6 +953,64 @@ async def test_get_site_by_displayname_missing_name(initialise_mock):
         await service.get_site_by_displayname()
 
 
+@pytest.mark.asyncio
+async def test_site_lookups_load_the_directory_once(initialise_mock):
+    mock_client = initialise_mock
+    service = SitesService(mock_client)
+    site = Site(id="contoso.sharepoint.com,1,2", display_name="Alpha", web_url="https://contoso.sharepoint.com/sites/Alpha")
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([site]))
+
+    results = await asyncio.gather(*[service.get_site_by_displayname(site_name="alpha") for _ in range(5)])
+    by_url = await service.get_site_by_url(site_url="https://contoso.sharepoint.com/sites/alpha/")
+    by_id = await service.directory.get_by_id("CONTOSO.sharepoint.com,1,2")
+
+    assert all(result is site for result in results)
+    assert by_url is site and by_id is site
+    mock_client.sites.delta.get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_site_directory_refresh_applies_changes(initialise_mock):
+    mock_client = initialise_mock
+    service = SitesService(mock_client)
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([
+        Site(id="a", display_name="Alpha"), Site(id="b", display_name="Beta"),
+    ]))
+    await service.directory.refresh()
+
+    mock_client.sites.delta.with_url.return_value.get = AsyncMock(return_value=sites_delta_page([
+        Site(id="a", display_name="Alpha Renamed"),
+        Site(id="b", additional_data={"deleted": {"state": "deleted"}}),
+    ], "https://graph/sites/delta?token=2"))
+    await service.directory.refresh()
+
+    mock_client.sites.delta.with_url.assert_called_with("https://graph/sites/delta?token=1")
+    assert await service.get_site_by_displayname(site_name="Alpha") is None
+    assert (await service.get_site_by_displayname(site_name="alpha renamed")).id == "a"
+    assert await service.directory.get_by_id("b") is None
+    assert len(service.directory) == 1
+
+
+@pytest.mark.asyncio
+async def test_site_directory_refreshes_stale_index_in_background(initialise_mock, monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.services.sharepoint.site_directory.monotonic", lambda: clock["now"])
+    mock_client = initialise_mock
+    directory = SiteDirectory(mock_client, refresh_interval=60)
+    mock_client.sites.delta.get = AsyncMock(return_value=sites_delta_page([Site(id="a", display_name="Alpha")]))
+    mock_client.sites.delta.with_url.return_value.get = AsyncMock(return_value=sites_delta_page(
+        [Site(id="b", display_name="Beta")], "https://graph/sites/delta?token=2",
+    ))
+    await directory.get_by_name("Alpha")
+
+    clock["now"] = 61
+    assert await directory.get_by_name("Beta") is None # answered from the stale index
+    await directory._refresh_task
+
+    assert (await directory.get_by_name("Beta")).id == "b"
+    mock_client.sites.delta.with_url.return_value.get.assert_awaited_once()
+
+
 # ─── SitesService: get_sub_sites ───
 
 @pytest.mark.asyncio
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock
 import pytest
 
@@ -225,3 +226,63 @@ async def test_send_message_api_error(initialise_mock):
 
     with pytest.raises(GraphAPIError):
         await service.send_message(chat_id="chat1", content="Hello!")
+
+
+# ─── ChatService: iter_new_messages ───
+
+@pytest.mark.asyncio
+async def test_iter_new_messages_advances_watermark(initialise_mock):
+    mock_client = initialise_mock
+    service = ChatService(mock_client)
+    messages = mock_client.chats.by_chat_id.return_value.messages
+    messages.get = AsyncMock(return_value=MagicMock(
+        value=[
+            MagicMock(id="m2", last_modified_date_time=datetime(2025, 1, 2, 9, 30, tzinfo=timezone.utc)),
+            MagicMock(id="m1", last_modified_date_time=datetime(2025, 1, 1, 8, 0, tzinfo=timezone.utc)),
+        ],
+        odata_next_link=None,
+    ))
+
+    first = [message.id async for message in service.iter_new_messages(chat_id="chat1")]
+
+    assert first == ["m2", "m1"]
+    query = messages.get.call_args.kwargs["request_configuration"].query_parameters
+    assert query.filter is None
+    assert query.orderby == ["lastModifiedDateTime desc"]
+    assert query.top == 50
+
+    messages.get = AsyncMock(return_value=MagicMock(value=[], odata_next_link=None))
+
+    second = [message.id async for message in service.iter_new_messages(chat_id="chat1")]
+
+    assert second == []
+    query = messages.get.call_args.kwargs["request_configuration"].query_parameters
+    assert query.filter == "lastModifiedDateTime gt 2025-01-02T09:30:00.000000Z"
+    assert await service._delta_store.load("chat:chat1") is None
+
+
+@pytest.mark.asyncio
+async def test_iter_new_messages_keeps_watermark_when_stopped_early(initialise_mock):
+    mock_client = initialise_mock
+    service = ChatService(mock_client)
+    messages = mock_client.chats.by_chat_id.return_value.messages
+    messages.get = AsyncMock(return_value=MagicMock(
+        value=[MagicMock(id="m1", last_modified_date_time=datetime(2025, 1, 1, tzinfo=timezone.utc))],
+        odata_next_link=None,
+    ))
+    since = datetime(2024, 12, 31, tzinfo=timezone.utc)
+
+    async for message in service.iter_new_messages(chat_id="chat1", since=since):
+        break
+    async for message in service.iter_new_messages(chat_id="chat1", since=since):
+        pass
+
+    filters = [call.kwargs["request_configuration"].query_parameters.filter for call in messages.get.call_args_list]
+    assert filters == ["lastModifiedDateTime gt 2024-12-31T00:00:00.000000Z"] * 2
+
+
+def test_iter_new_messages_invalid_page_size(initialise_mock):
+    service = ChatService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="page_size must be between 1 and 50"):
+        service.iter_new_messages(chat_id="chat1", page_size=100)
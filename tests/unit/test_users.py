@@ -1,8 +1,12 @@
 from unittest.mock import AsyncMock, MagicMock
 import pytest
+from msgraph.generated.models.group import Group
+from msgraph.generated.models.user import User
 
 from src.python_msgraph_toolkit.services.users.users import UserService
+from src.python_msgraph_toolkit.utils.delta import SqliteDeltaStore
 from src.python_msgraph_toolkit.services.exceptions import ValidationError, GraphAPIError
+from src.python_msgraph_toolkit.utils.query import F, QueryOptions
 
 @pytest.fixture
 def initialise_mock():
@@ -77,6 +81,52 @@ async def test_list_users(initialise_mock):
     assert result == mock_users
 
 
+@pytest.mark.asyncio
+async def test_list_users_follows_next_link(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+
+    first_page = MagicMock(value=[MagicMock()], odata_next_link="https://graph.microsoft.com/v1.0/users?$skiptoken=abc")
+    second_page = MagicMock(value=[MagicMock()], odata_next_link=None)
+    mock_client.users.get = AsyncMock(return_value=first_page)
+    mock_client.users.with_url.return_value.get = AsyncMock(return_value=second_page)
+
+    result = await service.list_users()
+
+    assert result == first_page.value + second_page.value
+    mock_client.users.with_url.assert_called_once_with("https://graph.microsoft.com/v1.0/users?$skiptoken=abc")
+
+
+@pytest.mark.asyncio
+async def test_list_users_with_query(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+    mock_client.users.get = AsyncMock(return_value=MagicMock(value=[MagicMock()], odata_next_link=None))
+
+    query = QueryOptions(select=[F.id, F.mail], filter=F.department == "Sales", top=100, count=True)
+    await service.list_users(query=query)
+
+    configuration = mock_client.users.get.await_args.kwargs["request_configuration"]
+    assert configuration.query_parameters.select == ["id", "mail"]
+    assert configuration.query_parameters.filter == "department eq 'Sales'"
+    assert configuration.query_parameters.top == 100
+    assert configuration.headers.get("ConsistencyLevel") == {"eventual"}
+
+
+@pytest.mark.asyncio
+async def test_get_user_rejects_list_options(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+    mock_client.users.by_user_id.return_value.get = AsyncMock(return_value=MagicMock())
+
+    await service.get_user(user_id="user1", query=QueryOptions(select=["id", "displayName"]))
+    configuration = mock_client.users.by_user_id.return_value.get.await_args.kwargs["request_configuration"]
+    assert configuration.query_parameters.select == ["id", "displayName"]
+
+    with pytest.raises(ValidationError):
+        await service.get_user(user_id="user1", query=QueryOptions(top=5))
+
+
 @pytest.mark.asyncio
 async def test_list_users_empty(initialise_mock):
     mock_client = initialise_mock
@@ -158,3 +208,106 @@ async def test_get_user_by_email_api_error(initialise_mock):
 
     with pytest.raises(GraphAPIError):
         await service.get_user_by_email(email="test@example.com")
+
+
+# ─── UserService: sync_users ───
+
+def _delta_page(users, next_link=None, delta_link=None):
+    return MagicMock(value=users, odata_next_link=next_link, odata_delta_link=delta_link)
+
+
+@pytest.mark.asyncio
+async def test_sync_users_mirrors_and_applies_changes(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+    delta = mock_client.users.delta
+    delta.get = AsyncMock(return_value=_delta_page(
+        [User(id="u1", display_name="Ada", mail="ada@example.com"), User(id="u2", display_name="Bob")],
+        delta_link="https://graph/users/delta?token=1",
+    ))
+
+    first = await service.sync_users()
+
+    assert first.full_sync
+    assert first.added == ["u1", "u2"]
+    assert await service.get_mirrored_user(user_id="u1") == {"id": "u1", "displayName": "Ada", "mail": "ada@example.com"}
+    select = delta.get.call_args.kwargs["request_configuration"].query_parameters.select
+    assert "userPrincipalName" in select
+
+    removed = User(id="u2")
+    removed.additional_data = {"@removed": {"reason": "changed"}}
+    delta.with_url.return_value.get = AsyncMock(return_value=_delta_page(
+        [User(id="u1", display_name="Ada Lovelace"), removed, User(id="u3", display_name="Cy")],
+        delta_link="https://graph/users/delta?token=2",
+    ))
+
+    second = await service.sync_users()
+
+    delta.with_url.assert_called_with("https://graph/users/delta?token=1")
+    assert (second.added, second.changed, second.deleted) == (["u3"], ["u1"], ["u2"])
+    assert await service.get_mirrored_user(user_id="u1") == {"id": "u1", "displayName": "Ada Lovelace", "mail": "ada@example.com"}
+    assert sorted([user["id"] async for user in service.mirrored_users()]) == ["u1", "u3"]
+
+
+@pytest.mark.asyncio
+async def test_sync_users_resumes_after_crash(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+    delta = mock_client.users.delta
+    delta.get = AsyncMock(return_value=_delta_page([User(id="u1")], next_link="https://graph/users/delta?skiptoken=2"))
+    delta.with_url.return_value.get = AsyncMock(side_effect=Exception("connection reset"))
+
+    with pytest.raises(GraphAPIError):
+        await service.sync_users()
+
+    delta.get.reset_mock()
+    delta.with_url.return_value.get = AsyncMock(return_value=_delta_page(
+        [User(id="u2")], delta_link="https://graph/users/delta?token=1",
+    ))
+
+    result = await service.sync_users()
+
+    delta.get.assert_not_called()
+    delta.with_url.assert_called_with("https://graph/users/delta?skiptoken=2")
+    assert result.full_sync
+    assert result.added == ["u2"]
+    assert sorted([user["id"] async for user in service.mirrored_users()]) == ["u1", "u2"]
+
+
+@pytest.mark.asyncio
+async def test_sync_users_full_sync_when_mirror_was_lost(initialise_mock, tmp_path):
+    mock_client = initialise_mock
+    store = SqliteDeltaStore(tmp_path / "sync.db")
+    delta = mock_client.users.delta
+    delta.get = AsyncMock(return_value=_delta_page([User(id="u1"), User(id="u2")], delta_link="https://graph/users/delta?token=1"))
+    await UserService(mock_client, delta_store=store).sync_users()
+
+    restarted = UserService(mock_client, delta_store=store) # same cursors, new in-memory mirror
+    delta.get.reset_mock()
+    result = await restarted.sync_users()
+
+    delta.get.assert_awaited_once()
+    assert result.full_sync
+    assert sorted([user["id"] async for user in restarted.mirrored_users()]) == ["u1", "u2"]
+
+
+@pytest.mark.asyncio
+async def test_sync_groups(initialise_mock):
+    mock_client = initialise_mock
+    service = UserService(mock_client)
+    mock_client.groups.delta.get = AsyncMock(return_value=_delta_page(
+        [Group(id="g1", display_name="Finance")], delta_link="https://graph/groups/delta?token=1",
+    ))
+
+    result = await service.sync_groups()
+
+    assert result.added == ["g1"]
+    assert [group["displayName"] async for group in service.mirrored_groups()] == ["Finance"]
+
+
+@pytest.mark.asyncio
+async def test_get_mirrored_user_missing_user_id(initialise_mock):
+    service = UserService(initialise_mock)
+
+    with pytest.raises(ValidationError, match="user_id is required"):
+        await service.get_mirrored_user()
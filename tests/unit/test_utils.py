@@ -0,0 +1,1221 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+import httpx
+import pytest
+from kiota_abstractions.api_error import APIError
+from kiota_http.middleware.middleware import REQUEST_OPTIONS_KEY
+from kiota_http.middleware.options import RetryHandlerOption
+
+from src.python_msgraph_toolkit.utils.pagination import PageIterator
+from src.python_msgraph_toolkit.utils.batching import BatchingHandler
+from src.python_msgraph_toolkit.utils.tree import walk_tree
+from src.python_msgraph_toolkit.utils.cache import (
+    CacheBackend, MemoryCacheBackend, ResponseCache, SqliteCacheBackend, cached, decode_value, encode_value,
+)
+from src.python_msgraph_toolkit.utils.delta import (
+    DeltaCursor, DeltaMirror, DeltaStore, JsonFileDeltaStore, MemoryDeltaStore, SqliteDeltaMirror, SqliteDeltaStore, sync_delta,
+)
+from src.python_msgraph_toolkit.utils.etag import ETagStore, MemoryETagStore, SqliteETagStore, conditional_get
+from src.python_msgraph_toolkit.utils.transport import TransportConfig
+from src.python_msgraph_toolkit.utils.auth import Auth
+from src.python_msgraph_toolkit import GraphClient, GraphClientPool
+from src.python_msgraph_toolkit.utils.query import F, Filter, QueryOptions, query_configuration
+from src.python_msgraph_toolkit.utils.tokens import EncryptedTokenCache, PreRefreshingCredential
+from azure.core.credentials import AccessToken
+from src.python_msgraph_toolkit.utils.bulk import BulkExecutor, BulkOperation
+from src.python_msgraph_toolkit.utils.transfer import (
+    UPLOAD_FRAGMENT_MULTIPLE, BufferUploadSource, RangeDownloader, StreamUploadSource, UploadSource,
+    download_to_file, plan_segments, stream_segments, upload_to_session,
+)
+from src.python_msgraph_toolkit.utils.throttling import (
+    AdaptiveRateLimiter, ThrottlingHandler, TokenBucket, parse_retry_after, resource_key,
+)
+from src.python_msgraph_toolkit.services.exceptions import (
+    GraphAPIError, RateLimitError, ServiceUnavailableError, SharePointError, ValidationError, graph_exception_handler,
+)
+
+@pytest.fixture
+def initialise_mock():
+    return MagicMock()
+
+# to test from root directory: 
+# pytest tests/unit/test_utils.py
+
+# to test all run from root directory: 
+# pytest tests/unit
+
+# ─── PageIterator ───
+
+@pytest.mark.asyncio
+async def test_page_iterator_collects_all_pages(initialise_mock):
+    request_builder = initialise_mock
+    request_builder.get = AsyncMock(return_value=MagicMock(value=[1, 2], odata_next_link="https://next/2"))
+    request_builder.with_url.side_effect = lambda url: MagicMock(get=AsyncMock(return_value={
+        "https://next/2": MagicMock(value=[3], odata_next_link="https://next/3"),
+        "https://next/3": MagicMock(value=[4], odata_next_link=None, odata_delta_link="https://delta"),
+    }[url]))
+
+    iterator = PageIterator(request_builder)
+    result = await iterator.collect()
+
+    assert result == [1, 2, 3, 4]
+    assert iterator.delta_link == "https://delta"
+
+
+@pytest.mark.asyncio
+async def test_page_iterator_prefetches_next_page(initialise_mock):
+    request_builder = initialise_mock
+    fetched = asyncio.Event()
+
+    async def next_page(**kwargs):
+        fetched.set()
+        return MagicMock(value=["b"], odata_next_link=None)
+
+    request_builder.get = AsyncMock(return_value=MagicMock(value=["a"], odata_next_link="https://next"))
+    request_builder.with_url.return_value.get = next_page
+
+    pages = PageIterator(request_builder).pages()
+    assert await pages.__anext__() == ["a"]
+    # the second page is requested while the caller is still holding the first
+    await asyncio.wait_for(fetched.wait(), timeout=1)
+    assert await pages.__anext__() == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_page_iterator_ignores_non_string_next_link(initialise_mock):
+    request_builder = initialise_mock
+    request_builder.get = AsyncMock(return_value=MagicMock(value=["a"]))
+
+    result = [item async for item in PageIterator(request_builder)]
+
+    assert result == ["a"]
+    request_builder.with_url.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_page_iterator_translates_errors(initialise_mock):
+    request_builder = initialise_mock
+    request_builder.get = AsyncMock(side_effect=Exception("server error"))
+
+    with pytest.raises(GraphAPIError):
+        await PageIterator(request_builder, service_name="Users").collect()
+
+
+# ─── BatchingHandler ───
+
+def _graph_get(path):
+    return httpx.Request("GET", f"https://graph.microsoft.com/v1.0{path}",
+                         headers={"Accept": "application/json", "Authorization": "Bearer token"})
+
+
+def _batch_transport():
+    transport = MagicMock()
+
+    async def handle(request):
+        body = json.loads(request.content)
+        responses = [
+            {"id": sub["id"], "status": 200, "headers": {"Content-Type": "application/json"}, "body": {"url": sub["url"]}}
+            for sub in body["requests"]
+        ]
+        return httpx.Response(200, json={"responses": list(reversed(responses))})
+
+    transport.handle_async_request = AsyncMock(side_effect=handle)
+    return transport
+
+
+@pytest.mark.asyncio
+async def test_batching_handler_coalesces_concurrent_requests():
+    handler = BatchingHandler(flush_interval=0.05)
+    transport = _batch_transport()
+
+    responses = await asyncio.gather(*[handler.send(_graph_get(f"/users/{index}"), transport) for index in range(3)])
+
+    transport.handle_async_request.assert_called_once()
+    batch_request = transport.handle_async_request.call_args.args[0]
+    assert batch_request.url == "https://graph.microsoft.com/v1.0/$batch"
+    assert batch_request.headers["Authorization"] == "Bearer token"
+    assert [response.json()["url"] for response in responses] == ["/users/0", "/users/1", "/users/2"]
+
+
+@pytest.mark.asyncio
+async def test_batching_handler_leaves_request_options_in_place():
+    handler = BatchingHandler(flush_interval=0.05)
+    requests = [_graph_get(f"/users/{index}") for index in range(2)]
+    options = {RetryHandlerOption.get_key(): RetryHandlerOption(max_retries=1)}
+    for request in requests:
+        request.extensions[REQUEST_OPTIONS_KEY] = options
+
+    await asyncio.gather(*[handler.send(request, _batch_transport()) for request in requests])
+
+    assert all(request.extensions[REQUEST_OPTIONS_KEY] is options for request in requests)
+
+
+@pytest.mark.asyncio
+async def test_batching_handler_flushes_at_max_size():
+    handler = BatchingHandler(max_batch_size=2, flush_interval=10)
+    transport = _batch_transport()
+
+    responses = await asyncio.wait_for(
+        asyncio.gather(*[handler.send(_graph_get(f"/sites/{index}"), transport) for index in range(4)]), timeout=1
+    )
+
+    assert transport.handle_async_request.call_count == 2
+    assert all(response.status_code == 200 for response in responses)
+
+
+@pytest.mark.asyncio
+async def test_batching_handler_passes_through_writes():
+    handler = BatchingHandler()
+    transport = MagicMock()
+    transport.handle_async_request = AsyncMock(return_value=httpx.Response(201))
+    request = httpx.Request("POST", "https://graph.microsoft.com/v1.0/chats", headers={"Accept": "application/json"})
+
+    response = await handler.send(request, transport)
+
+    assert response.status_code == 201
+    transport.handle_async_request.assert_called_once_with(request)
+
+
+@pytest.mark.asyncio
+async def test_batching_handler_invalid_size():
+    with pytest.raises(ValidationError):
+        BatchingHandler(max_batch_size=21)
+
+
+# ─── Throttling ───
+
+def test_resource_key():
+    assert resource_key(httpx.URL("https://graph.microsoft.com/v1.0/users/Bob@x.com/messages")) == "users/bob@x.com"
+    assert resource_key(httpx.URL("https://graph.microsoft.com/v1.0/drives/d1/items/root/children")) == "drives/d1"
+    assert resource_key(httpx.URL("https://graph.microsoft.com/v1.0/sites/getAllSites")) == "sites/getallsites"
+    assert resource_key(httpx.URL("https://graph.microsoft.com/v1.0/users")) == "tenant"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"Retry-After": "7"}) == 7.0
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert parse_retry_after({}) is None
+
+
+def test_token_bucket_aimd():
+    bucket = TokenBucket(rate=10, max_rate=12, increase_after=2)
+
+    bucket.on_throttled()
+    assert bucket.rate == 5
+
+    for _ in range(4):
+        bucket.on_success()
+    assert bucket.rate == 7
+
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 12
+
+
+def test_rate_limiter_shares_buckets():
+    limiter = AdaptiveRateLimiter(tenant_rate=50, resource_rate=5)
+
+    assert limiter.bucket("t1", "drives/d1") is limiter.bucket("t1", "drives/d1")
+    assert limiter.bucket("t1", "drives/d1") is not limiter.bucket("t2", "drives/d1")
+    assert limiter.bucket("t1").rate == 50
+
+
+def test_rate_limiter_drops_least_recently_used_buckets():
+    limiter = AdaptiveRateLimiter(max_buckets=3)
+    tenant = limiter.bucket("t1")
+    first = limiter.bucket("t1", "users/u1")
+    limiter.bucket("t1", "users/u2")
+    assert limiter.bucket("t1") is tenant
+    limiter.bucket("t1", "users/u3")
+
+    assert len(limiter) == 3
+    assert limiter.bucket("t1") is tenant
+    assert limiter.bucket("t1", "users/u1") is not first
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Replaces sleeping in the throttling module with a clock that jumps forward instead."""
+    clock = {"now": 1000.0}
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock["now"] += delay
+
+    monkeypatch.setattr("src.python_msgraph_toolkit.utils.throttling.asyncio.sleep", fake_sleep)
+    monkeypatch.setattr("src.python_msgraph_toolkit.utils.throttling.monotonic", lambda: clock["now"])
+    return sleeps
+
+
+@pytest.mark.asyncio
+async def test_throttling_handler_retries_with_retry_after(fake_clock):
+    sleeps = fake_clock
+    limiter = AdaptiveRateLimiter()
+    handler = ThrottlingHandler(tenant_id="t1", limiter=limiter)
+    transport = MagicMock()
+    transport.handle_async_request = AsyncMock(side_effect=[
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(200, json={}),
+    ])
+
+    response = await handler.send(_graph_get("/users/u1"), transport)
+
+    assert response.status_code == 200
+    assert transport.handle_async_request.call_count == 2
+    assert 3.0 in sleeps
+    assert limiter.bucket("t1", "users/u1").rate == 8
+
+
+@pytest.mark.asyncio
+async def test_throttling_handler_gives_up_after_max_retries(fake_clock):
+    handler = ThrottlingHandler(max_retries=2)
+    transport = MagicMock()
+    transport.handle_async_request = AsyncMock(side_effect=lambda request: httpx.Response(503))
+
+    response = await handler.send(_graph_get("/sites/s1"), transport)
+
+    assert response.status_code == 503
+    assert transport.handle_async_request.call_count == 3
+
+
+def test_exception_handler_rate_limit_status_code():
+    error = Exception("throttled")
+    error.response_status_code = 429
+    error.response_headers = {"Retry-After": "12"}
+
+    with pytest.raises(RateLimitError) as raised:
+        graph_exception_handler(error, "SharePoint")
+    assert raised.value.retry_after == 12.0
+
+
+def test_exception_handler_service_unavailable():
+    error = Exception("unavailable")
+    error.response_status_code = 503
+    error.response_headers = {"Retry-After": "30"}
+
+    with pytest.raises(ServiceUnavailableError) as raised:
+        graph_exception_handler(error, "Outlook")
+    assert raised.value.retry_after == 30.0
+    assert not isinstance(raised.value, RateLimitError)
+
+
+def test_exception_handler_keeps_status_code_of_matched_messages():
+    error = Exception("The sync state generation is not found.")
+    error.response_status_code = 410
+
+    with pytest.raises(GraphAPIError, match="resource not found") as raised:
+        graph_exception_handler(error, "Users")
+    assert raised.value.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_throttling_handler_honours_retry_option(fake_clock):
+    handler = ThrottlingHandler(max_retries=5)
+    transport = MagicMock()
+    transport.handle_async_request = AsyncMock(side_effect=lambda request: httpx.Response(429))
+
+    request = _graph_get("/users/u1")
+    request.extensions[REQUEST_OPTIONS_KEY] = {RetryHandlerOption.get_key(): RetryHandlerOption(max_retries=1)}
+    await handler.send(request, transport)
+    assert transport.handle_async_request.call_count == 2
+
+    transport.handle_async_request.reset_mock()
+    request = _graph_get("/users/u1")
+    request.extensions[REQUEST_OPTIONS_KEY] = {RetryHandlerOption.get_key(): RetryHandlerOption(should_retry=False)}
+    await handler.send(request, transport)
+    assert transport.handle_async_request.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_throttling_handler_does_not_resend_streams(fake_clock):
+    handler = ThrottlingHandler(max_retries=5)
+    transport = MagicMock()
+    transport.handle_async_request = AsyncMock(side_effect=lambda request: httpx.Response(503))
+
+    async def body():
+        yield b"fragment"
+
+    request = httpx.Request("PUT", "https://graph.microsoft.com/v1.0/drives/d1/items/i1/content", content=body())
+    response = await handler.send(request, transport)
+
+    assert response.status_code == 503
+    assert transport.handle_async_request.call_count == 1
+
+
+# ─── BulkExecutor ───
+
+@pytest.mark.asyncio
+async def test_bulk_collects_failures_per_item():
+    async def operation(index):
+        if index == 2:
+            raise GraphAPIError("boom")
+        return index * 10
+
+    results = await BulkExecutor(concurrency=3).collect(lambda index=index: operation(index) for index in range(5))
+
+    assert [result.value for result in results if result.ok] == [0, 10, 30, 40]
+    assert isinstance(results[2].error, GraphAPIError)
+
+
+@pytest.mark.asyncio
+async def test_bulk_ordered_results():
+    async def operation(index):
+        await asyncio.sleep(0.01 * (5 - index))
+        return index
+
+    results = [result.value async for result in BulkExecutor(concurrency=5, ordered=True).run(
+        [lambda index=index: operation(index) for index in range(5)]
+    )]
+
+    assert results == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_bulk_respects_resource_limits():
+    running = {"drive": 0, "mailbox": 0}
+    peak = {"drive": 0, "mailbox": 0}
+
+    async def operation(resource):
+        running[resource] += 1
+        peak[resource] = max(peak[resource], running[resource])
+        await asyncio.sleep(0.01)
+        running[resource] -= 1
+
+    async def operations():
+        for index in range(12):
+            resource = "drive" if index % 2 else "mailbox"
+            yield BulkOperation(factory=lambda resource=resource: operation(resource), resource=resource)
+
+    results = await BulkExecutor(concurrency=6, limits={"drive": 2, "mailbox": 1}).collect(operations())
+
+    assert all(result.ok for result in results)
+    assert peak == {"drive": 2, "mailbox": 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_limits_resources_discovered_at_run_time():
+    running = {}
+    peak = {}
+
+    async def operation(mailbox):
+        running[mailbox] = running.get(mailbox, 0) + 1
+        peak[mailbox] = max(peak.get(mailbox, 0), running[mailbox])
+        await asyncio.sleep(0.01)
+        running[mailbox] -= 1
+
+    operations = ((f"users/{index % 3}", lambda index=index: operation(index % 3)) for index in range(18))
+    results = await BulkExecutor(concurrency=9, resource_limit=2).collect(operations)
+
+    assert all(result.ok for result in results)
+    assert peak == {0: 2, 1: 2, 2: 2}
+
+
+@pytest.mark.asyncio
+async def test_bulk_invalid_operation():
+    with pytest.raises(ValidationError):
+        await BulkExecutor().collect(["not callable"])
+
+
+# ─── Upload sessions ───
+
+class FakeUploadSession:
+    """Records fragments like a Graph upload session, optionally failing one attempt."""
+    def __init__(self, total, fail_at=None):
+        self.total = total
+        self.received = bytearray()
+        self.fail_at = fail_at
+        self.ranges = []
+
+    def handler(self, request):
+        if request.method == "GET":
+            return httpx.Response(200, json={"nextExpectedRanges": [f"{len(self.received)}-"]})
+        start = int(request.headers["Content-Range"].split(" ")[1].split("-")[0])
+        self.ranges.append(start)
+        if start == self.fail_at:
+            self.fail_at = None
+            return httpx.Response(500)
+        assert start == len(self.received)
+        self.received.extend(request.content)
+        if len(self.received) == self.total:
+            return httpx.Response(201, json={"id": "item1", "name": "big.bin", "size": self.total})
+        return httpx.Response(202, json={"nextExpectedRanges": [f"{len(self.received)}-"]})
+
+
+@pytest.mark.asyncio
+async def test_upload_to_session_sends_fragments_in_order():
+    content = bytes(range(256)) * 3000 # ~750 KiB, three fragments
+    session = FakeUploadSession(len(content))
+    progress = []
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(session.handler)) as http:
+        response = await upload_to_session(http, "https://upload/session", BufferUploadSource(content),
+                                           chunk_size=UPLOAD_FRAGMENT_MULTIPLE,
+                                           on_progress=lambda sent, total: progress.append(sent))
+
+    assert response.status_code == 201
+    assert bytes(session.received) == content
+    assert session.ranges == [0, UPLOAD_FRAGMENT_MULTIPLE, 2 * UPLOAD_FRAGMENT_MULTIPLE]
+    assert progress[-1] == len(content)
+
+
+@pytest.mark.asyncio
+async def test_upload_to_session_resumes_from_next_expected_range(monkeypatch):
+    monkeypatch.setattr("src.python_msgraph_toolkit.utils.transfer.asyncio.sleep", AsyncMock())
+    content = b"x" * (2 * UPLOAD_FRAGMENT_MULTIPLE + 10)
+
+    async def stream():
+        for start in range(0, len(content), 100_000):
+            yield content[start:start + 100_000]
+
+    session = FakeUploadSession(len(content), fail_at=UPLOAD_FRAGMENT_MULTIPLE)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(session.handler)) as http:
+        await upload_to_session(http, "https://upload/session", StreamUploadSource(stream(), size=len(content)),
+                                chunk_size=UPLOAD_FRAGMENT_MULTIPLE)
+
+    assert bytes(session.received) == content
+    assert session.ranges.count(UPLOAD_FRAGMENT_MULTIPLE) == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_to_session_resends_first_fragment_when_session_expects_zero():
+    content = b"y" * (UPLOAD_FRAGMENT_MULTIPLE + 10)
+    ranges = []
+
+    def handler(request):
+        start = int(request.headers["Content-Range"].split(" ")[1].split("-")[0])
+        ranges.append(start)
+        if len(ranges) == 1:
+            return httpx.Response(202, json={"nextExpectedRanges": ["0-"]}) # fragment not accepted
+        if start + len(request.content) == len(content):
+            return httpx.Response(201, json={"id": "item1"})
+        return httpx.Response(202, json={"nextExpectedRanges": [f"{start + len(request.content)}-"]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        await upload_to_session(http, "https://upload/session", BufferUploadSource(content), chunk_size=UPLOAD_FRAGMENT_MULTIPLE)
+
+    assert ranges == [0, 0, UPLOAD_FRAGMENT_MULTIPLE]
+
+
+def test_upload_source_requires_read():
+    class Incomplete(UploadSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_upload_to_session_invalid_chunk_size():
+    with pytest.raises(ValidationError, match="320 KiB"):
+        await upload_to_session(MagicMock(), "https://upload/session", BufferUploadSource(b"abc"), chunk_size=1000)
+
+
+# ─── Ranged downloads ───
+
+def _range_handler(content, fail_first=None, expire_url=None):
+    failures = set()
+    def handler(request):
+        if expire_url and str(request.url) == expire_url:
+            return httpx.Response(403)
+        start, end = (int(value) for value in request.headers["Range"][len("bytes="):].split("-"))
+        if fail_first is not None and start == fail_first and start not in failures:
+            failures.add(start)
+            return httpx.Response(500)
+        return httpx.Response(206, content=content[start:end + 1])
+    return handler
+
+
+def test_plan_segments():
+    assert plan_segments(10, 4) == [(0, 3), (4, 7), (8, 9)]
+    assert plan_segments(0, 4) == []
+    with pytest.raises(ValidationError):
+        plan_segments(10, 0)
+
+
+@pytest.mark.asyncio
+async def test_download_to_file_retries_failed_segment(tmp_path, fake_clock):
+    content = os.urandom(10_000)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_range_handler(content, fail_first=4000))) as http:
+        progress = []
+        await download_to_file(RangeDownloader(http, "https://download/item"), tmp_path / "out", len(content),
+                               segment_size=2000, concurrency=3, on_progress=lambda done, total: progress.append(done))
+
+    assert (tmp_path / "out").read_bytes() == content
+    assert progress[-1] == len(content)
+
+
+@pytest.mark.asyncio
+async def test_range_downloader_resumes_sink_after_received_bytes(fake_clock):
+    content = bytes(range(100))
+    requested = []
+
+    def handler(request):
+        requested.append(request.headers["Range"])
+        start, end = (int(value) for value in request.headers["Range"][len("bytes="):].split("-"))
+        if len(requested) == 1:
+            return httpx.Response(206, content=content[start:start + 30]) # connection dropped part way
+        return httpx.Response(206, content=content[start:end + 1])
+
+    received = bytearray()
+    async def sink(offset, block):
+        assert offset == len(received)
+        received.extend(block)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        await RangeDownloader(http, "https://download/item").segment(0, 99, sink)
+
+    assert requested == ["bytes=0-99", "bytes=30-99"]
+    assert bytes(received) == content
+
+
+@pytest.mark.asyncio
+async def test_download_to_file_stops_every_segment_on_failure(tmp_path, fake_clock):
+    content = os.urandom(10_000)
+    def handler(request):
+        if request.headers["Range"].startswith("bytes=4000-"):
+            return httpx.Response(404)
+        return _range_handler(content)(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        with pytest.raises(SharePointError):
+            await download_to_file(RangeDownloader(http, "https://download/item"), tmp_path / "out", len(content),
+                                   segment_size=2000, concurrency=3)
+
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_range_downloader_refreshes_expired_url(fake_clock):
+    content = b"0123456789"
+    async def refresh():
+        return "https://download/fresh"
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_range_handler(content, expire_url="https://download/stale"))) as http:
+        downloader = RangeDownloader(http, "https://download/stale", refresh_url=refresh)
+        chunks = [chunk async for chunk in stream_segments(downloader, len(content), segment_size=4, concurrency=2)]
+
+    assert chunks == [b"0123", b"4567", b"89"]
+    assert downloader.url == "https://download/fresh"
+
+
+@pytest.mark.asyncio
+async def test_range_downloader_stops_when_refresh_returns_the_stale_url(fake_clock):
+    requests = []
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(403)
+    async def refresh():
+        return "https://download/stale"
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        with pytest.raises(SharePointError, match="same url"):
+            await RangeDownloader(http, "https://download/stale", refresh_url=refresh).segment(0, 9)
+
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_range_downloader_expired_without_refresh(fake_clock):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(403))) as http:
+        with pytest.raises(SharePointError, match="expired"):
+            await RangeDownloader(http, "https://download/item").segment(0, 9)
+
+
+# ─── walk_tree ───
+
+@pytest.mark.asyncio
+async def test_walk_tree_buffer_applies_backpressure():
+    listed = []
+    async def list_children(node):
+        listed.append(node)
+        for index in range(10):
+            yield f"{node}/{index}"
+
+    walker = walk_tree("root", list_children, is_container=lambda child: True, key=lambda child: child,
+                       concurrency=2, buffer=5)
+    first = [await walker.__anext__() for _ in range(3)]
+    await asyncio.sleep(0.01)
+    await walker.aclose()
+
+    assert first == ["root/0", "root/1", "root/2"]
+    assert len(listed) <= 3 # the crawl stalls on the full buffer instead of listing the whole tree
+
+
+def test_walk_tree_invalid_depth():
+    with pytest.raises(ValidationError):
+        walk_tree("root", None, is_container=None, key=None, max_depth=0)
+
+
+# ─── Delta sync ───
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_type", ["json", "sqlite"])
+async def test_delta_store_round_trip(tmp_path, store_type):
+    path = tmp_path / "cursors"
+    store = JsonFileDeltaStore(path) if store_type == "json" else SqliteDeltaStore(path)
+    cursor = DeltaCursor(link="https://graph/delta?token=1", synced_at=datetime(2024, 5, 1, tzinfo=timezone.utc))
+
+    assert await store.load("drive:d1") is None
+    await store.save("drive:d1", cursor)
+    await store.save("drive:d1", cursor)
+    reopened = JsonFileDeltaStore(path) if store_type == "json" else SqliteDeltaStore(path)
+    assert await reopened.load("drive:d1") == cursor
+    await reopened.clear("drive:d1")
+    assert await store.load("drive:d1") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_type", ["memory", "json", "sqlite"])
+async def test_delta_store_watermarks(tmp_path, store_type):
+    path = tmp_path / "cursors"
+    stores = {"memory": MemoryDeltaStore, "json": JsonFileDeltaStore, "sqlite": SqliteDeltaStore}
+    store = stores[store_type]() if store_type == "memory" else stores[store_type](path)
+    cursor = DeltaCursor(link="https://graph/delta?token=1", synced_at=datetime(2024, 5, 1, tzinfo=timezone.utc))
+    watermark = datetime(2025, 1, 2, 9, 30, tzinfo=timezone.utc)
+
+    assert await store.load_watermark("chat:c1") is None
+    await store.save("chat:c1", cursor)
+    await store.save_watermark("chat:c1", watermark)
+    await store.save_watermark("chat:c1", watermark)
+
+    assert await store.load_watermark("chat:c1") == watermark
+    assert await store.load("chat:c1") == cursor
+    await store.clear("chat:c1")
+    assert await store.load_watermark("chat:c1") == watermark
+
+
+def test_delta_store_requires_every_method():
+    class Incomplete(DeltaStore):
+        async def load(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_delta_mirror_requires_every_method():
+    class Incomplete(DeltaMirror):
+        async def get(self, scope, object_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("message", ["resyncRequired", "The sync state generation is not found."])
+async def test_sync_delta_resyncs_when_link_expired(message):
+    store = MemoryDeltaStore()
+    await store.save("k", DeltaCursor(link="https://graph/delta?token=old", synced_at=datetime.now(timezone.utc)))
+    builder = MagicMock()
+    builder.with_url.return_value.get = AsyncMock(side_effect=APIError(message, response_status_code=410))
+    builder.get = AsyncMock(return_value=MagicMock(
+        value=[MagicMock(id="a", deleted=None, additional_data={})],
+        odata_next_link=None,
+        odata_delta_link="https://graph/delta?token=new",
+    ))
+
+    result = await sync_delta(builder, store, "k")
+
+    assert result.full_sync
+    assert [item.id for item in result.added] == ["a"]
+    assert (await store.load("k")).link == "https://graph/delta?token=new"
+
+
+@pytest.mark.asyncio
+async def test_sync_delta_keeps_last_state_of_repeated_items():
+    store = MemoryDeltaStore()
+    await store.save("k", DeltaCursor(link="https://graph/delta?token=1", synced_at=datetime.now(timezone.utc)))
+    builder = MagicMock()
+    builder.with_url.return_value.get = AsyncMock(return_value=MagicMock(
+        value=[MagicMock(id="a", deleted=None, created_date_time=None), MagicMock(id="a", deleted=None, additional_data={"@removed": {"reason": "deleted"}})],
+        odata_next_link=None,
+        odata_delta_link="https://graph/delta?token=2",
+    ))
+
+    result = await sync_delta(builder, store, "k")
+
+    assert [item.id for item in result.deleted] == ["a"]
+    assert result.changed == [] and result.added == []
+
+
+@pytest.mark.asyncio
+async def test_sqlite_delta_mirror(tmp_path):
+    mirror = SqliteDeltaMirror(tmp_path / "mirror.db", page_size=2)
+    await mirror.apply("users", {f"u{index}": {"id": f"u{index}", "displayName": str(index)} for index in range(5)}, [])
+    await mirror.apply("users", {"u1": {"id": "u1", "mail": "u1@example.com"}}, ["u4"])
+
+    assert await mirror.get("users", "u1") == {"id": "u1", "displayName": "1", "mail": "u1@example.com"}
+    assert await mirror.existing("users", ["u0", "u4", "x"]) == {"u0"}
+    assert [record["id"] async for record in mirror.records("users")] == ["u0", "u1", "u2", "u3"]
+    await mirror.clear("users")
+    assert await mirror.get("users", "u0") is None
+
+
+# ─── ResponseCache ───
+
+class CachedLookups:
+    def __init__(self, cache):
+        self._cache = cache
+        self.calls = 0
+
+    @cached(ttl=60)
+    async def get(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {"id": kwargs.get("item_id"), "call": self.calls}
+
+
+@pytest.mark.asyncio
+async def test_cached_method_reuses_results():
+    service = CachedLookups(ResponseCache())
+
+    first = await service.get(item_id="a")
+    second = await service.get(item_id="a")
+    other = await service.get(item_id="b")
+    bypass = await service.get(item_id="a", use_cache=False)
+
+    assert first == second == {"id": "a", "call": 1}
+    assert other["call"] == 2
+    assert bypass["call"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_concurrent_misses_share_one_call():
+    cache = ResponseCache()
+    service = CachedLookups(cache)
+
+    results = await asyncio.gather(*[service.get(item_id="a") for _ in range(10)])
+
+    assert service.calls == 1
+    assert all(result == results[0] for result in results)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_cached_without_cache_calls_through():
+    service = CachedLookups(None)
+
+    await service.get(item_id="a")
+    await service.get(item_id="a")
+
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl_and_lru(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.utils.cache.monotonic", lambda: clock["now"])
+    backend = MemoryCacheBackend(max_entries=2)
+
+    await backend.set("a", 1, ttl=10)
+    await backend.set("b", 2, ttl=10)
+    await backend.get("a")
+    await backend.set("c", 3, ttl=10)
+
+    assert await backend.get("b") == (False, None) # least recently used
+    assert await backend.get("a") == (True, 1)
+    clock["now"] += 11
+    assert await backend.get("a") == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_byte_limit():
+    backend = MemoryCacheBackend(max_bytes=100)
+
+    await backend.set("a", "x" * 40, ttl=10)
+    await backend.set("b", "y" * 40, ttl=10)
+
+    assert len(backend) == 1
+    assert await backend.get("b") == (True, "y" * 40)
+    assert backend.size <= 100
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_round_trips_models(tmp_path):
+    from msgraph.generated.models.site import Site
+    backend = SqliteCacheBackend(tmp_path / "cache.db", max_entries=2)
+
+    await backend.set("SitesService.get_site_by_id:1", Site(id="s1", display_name="Finance"), ttl=60)
+    await backend.set("SitesService.get_sub_sites:1", [Site(id="s2"), Site(id="s3")], ttl=60)
+    await backend.set("UserService.get_user:1", {"id": "u1"}, ttl=60)
+
+    found, site = await SqliteCacheBackend(tmp_path / "cache.db").get("SitesService.get_site_by_id:1")
+    assert not found # evicted as the least recently used of three entries
+    found, sites = await backend.get("SitesService.get_sub_sites:1")
+    assert found and [site.id for site in sites] == ["s2", "s3"]
+    await backend.invalidate("SitesService.")
+    assert await backend.get("SitesService.get_sub_sites:1") == (False, None)
+    assert await backend.get("UserService.get_user:1") == (True, {"id": "u1"})
+
+
+def test_encode_value_round_trip():
+    from msgraph.generated.models.drive_item import DriveItem
+    item = decode_value(encode_value(DriveItem(id="i1", name="report.pdf", size=10)))
+
+    assert isinstance(item, DriveItem)
+    assert (item.id, item.name, item.size) == ("i1", "report.pdf", 10)
+
+
+def test_cache_backend_requires_every_method():
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return False, None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+# ─── ETag revalidation ───
+
+def test_etag_store_requires_every_method():
+    class Incomplete(ETagStore):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_serves_304_from_store():
+    from msgraph.generated.models.drive_item import DriveItem
+    store = MemoryETagStore()
+    builder = MagicMock()
+    builder.get = AsyncMock(side_effect=[DriveItem(id="i1", e_tag="\"v1\""), None])
+
+    first = await conditional_get(builder, store, "drive:d1:item:i1")
+    second = await conditional_get(builder, store, "drive:d1:item:i1")
+
+    assert second is first
+    assert not builder.get.await_args_list[0].kwargs["request_configuration"].headers.contains("If-None-Match")
+    headers = builder.get.await_args_list[1].kwargs["request_configuration"].headers
+    assert headers.get("If-None-Match") == {"\"v1\""}
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_replaces_changed_resource():
+    from msgraph.generated.models.event import Event
+    store = MemoryETagStore(max_entries=1)
+    changed = Event(id="e1", additional_data={"@odata.etag": "W/\"2\""})
+    builder = MagicMock()
+    builder.get = AsyncMock(side_effect=[Event(id="e1", additional_data={"@odata.etag": "W/\"1\""}), changed])
+
+    await conditional_get(builder, store, "event:u1:e1")
+    assert await conditional_get(builder, store, "event:u1:e1") is changed
+    assert (await store.get("event:u1:e1")).etag == "W/\"2\""
+
+
+@pytest.mark.asyncio
+async def test_sqlite_etag_store_round_trips_and_evicts(tmp_path):
+    from msgraph.generated.models.drive_item import DriveItem
+    store = SqliteETagStore(tmp_path / "etags.db", max_entries=1)
+
+    await store.set("a", "\"1\"", DriveItem(id="a", name="a.txt"))
+    await store.set("b", "\"2\"", DriveItem(id="b", name="b.txt"))
+
+    assert await store.get("a") is None
+    entry = await SqliteETagStore(tmp_path / "etags.db").get("b")
+    assert entry.etag == "\"2\"" and entry.value.name == "b.txt"
+
+
+# ─── TransportConfig ───
+
+@pytest.mark.asyncio
+async def test_transport_pool_is_shared_and_survives_client_close():
+    transport = TransportConfig(max_connections=8, max_keepalive_connections=4, keepalive_expiry=60)
+    first, second = transport.graph_client(), transport.graph_client()
+
+    await first.aclose()
+
+    pool = transport._graph_pool._pool
+    assert first._transport._transport is second._transport._transport is transport._graph_pool
+    assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry, pool._http2) == (8, 4, 60, True)
+    assert second.timeout.read == 100 and str(second.base_url) == "https://graph.microsoft.com/v1.0/"
+    assert transport.transfer_client()._transport._transport is transport._transfer_pool is not transport._graph_pool
+    await transport.aclose()
+    assert transport._graph_pool is None
+
+
+def test_auth_clients_share_the_transport_pool():
+    transport = TransportConfig(http2=False)
+
+    first = Auth("tenant", "client-a", "secret", transport=transport)
+    second = Auth("tenant", "client-b", "secret", transport=transport, throttling=False)
+
+    pools = [auth._msgraph_client.request_adapter._http_client._transport.transport._transport for auth in (first, second)]
+    assert pools[0] is pools[1] is transport._graph_pool
+    assert not transport._graph_pool._pool._http2
+
+
+def test_transport_config_rejects_bad_limits():
+    with pytest.raises(ValidationError):
+        TransportConfig(max_connections=0)
+    with pytest.raises(ValidationError):
+        TransportConfig(timeout=0)
+
+
+# ─── GraphClientPool ───
+
+@pytest.fixture
+def closed_clients(monkeypatch):
+    closed = []
+
+    async def aclose(client):
+        closed.append(client._auth.tenant_id)
+
+    monkeypatch.setattr(GraphClient, "aclose", aclose)
+    return closed
+
+
+@pytest.mark.asyncio
+async def test_client_pool_reuses_and_evicts_least_recently_used(closed_clients):
+    pool = GraphClientPool("app", "secret", max_clients=2, idle_timeout=None, max_connections=16)
+
+    first = await pool.get("t1")
+    await pool.get("t2")
+    assert await pool.get("t1") is first
+    await pool.get("t3")
+
+    assert closed_clients == ["t2"]
+    assert "t1" in pool and "t3" in pool and len(pool) == 2
+    graph_pool = first._auth._http_client._transport.transport._transport
+    assert graph_pool is pool.transport._graph_pool and pool.transport.max_connections == 16
+    await pool.aclose()
+    assert sorted(closed_clients) == ["t1", "t2", "t3"]
+
+
+@pytest.mark.asyncio
+async def test_client_pool_keeps_lent_clients_until_returned(closed_clients):
+    pool = GraphClientPool("app", "secret", max_clients=1, idle_timeout=None)
+
+    async with pool.client("t1") as lent:
+        await pool.get("t2")
+        assert "t1" in pool and closed_clients == [] # over the limit while t1 is lent out
+        await pool.evict("t1")
+        assert lent.authorised and closed_clients == []
+    assert closed_clients == ["t1"]
+
+
+@pytest.mark.asyncio
+async def test_client_pool_evicts_idle_and_rotated_clients(closed_clients, monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.pool.monotonic", lambda: clock["now"])
+    pool = GraphClientPool("app", "secret", idle_timeout=60)
+
+    old = await pool.get("t1")
+    assert await pool.get("t1", secret="rotated") is not old
+    await pool.get("t2")
+    clock["now"] = 61
+    await pool.get("t3")
+
+    assert closed_clients == ["t1", "t1", "t2"]
+    assert len(pool) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_pool_requires_credentials():
+    pool = GraphClientPool()
+
+    with pytest.raises(ValidationError, match="Client ID and secret"):
+        await pool.get("t1")
+
+
+@pytest.mark.asyncio
+async def test_client_pool_builds_tenant_stores_per_client(closed_clients):
+    with pytest.raises(ValidationError, match="delta_store must be a factory"):
+        GraphClientPool("app", "secret", delta_store=MemoryDeltaStore())
+
+    pool = GraphClientPool("app", "secret", delta_store=lambda tenant_id: MemoryDeltaStore(), throttling=False)
+    first, second = await pool.get("t1"), await pool.get("t2")
+
+    assert first._options["delta_store"] is not second._options["delta_store"]
+    assert first._options["throttling"] is False
+    await pool.aclose()
+
+
+# ─── Token refresh ───
+
+@pytest.fixture
+def token_clock(monkeypatch):
+    clock = {"now": 10_000.0}
+    monkeypatch.setattr("src.python_msgraph_toolkit.utils.tokens.time", lambda: clock["now"])
+    return clock
+
+
+def fake_credential(*expiries):
+    credential = MagicMock()
+    credential.get_token = AsyncMock(side_effect=[AccessToken(f"token-{index}", expires_on) for index, expires_on in enumerate(expiries)])
+    credential.close = AsyncMock()
+    return credential
+
+
+@pytest.mark.asyncio
+async def test_credential_renews_ahead_of_expiry_without_blocking(token_clock):
+    inner = fake_credential(13_600, 17_200)
+    credential = PreRefreshingCredential(inner, refresh_margin=300)
+
+    tokens = await asyncio.gather(*[credential.get_token("https://graph.microsoft.com/.default") for _ in range(5)])
+    assert {token.token for token in tokens} == {"token-0"} and inner.get_token.await_count == 1
+
+    token_clock["now"] = 13_400 # inside the refresh margin, the current token is still handed out
+    assert (await credential.get_token("https://graph.microsoft.com/.default")).token == "token-0"
+    await asyncio.sleep(0)
+    assert (await credential.get_token("https://graph.microsoft.com/.default")).token == "token-1"
+    assert inner.get_token.await_count == 2
+
+    await credential.close()
+    inner.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_credential_passes_claims_challenges_through(token_clock):
+    inner = fake_credential(13_600, 13_600)
+    credential = PreRefreshingCredential(inner)
+
+    await credential.get_token("scope")
+    await credential.get_token("scope", claims="{\"access_token\": {}}")
+
+    assert inner.get_token.await_count == 2
+    assert inner.get_token.await_args.kwargs["claims"] == "{\"access_token\": {}}"
+    await credential.close()
+
+
+@pytest.mark.asyncio
+async def test_encrypted_token_cache_serves_the_next_process(tmp_path, token_clock):
+    key = EncryptedTokenCache.generate_key()
+    cache = EncryptedTokenCache(tmp_path / "tokens.bin", key)
+    first = PreRefreshingCredential(fake_credential(13_600), token_cache=cache, cache_key="tenant:app")
+    await first.get_token("scope")
+    await first.close()
+
+    inner = fake_credential()
+    second = PreRefreshingCredential(inner, token_cache=EncryptedTokenCache(tmp_path / "tokens.bin", key), cache_key="tenant:app")
+    other_app = PreRefreshingCredential(fake_credential(13_600), token_cache=cache, cache_key="tenant:other")
+
+    assert (await second.get_token("scope")).token == "token-0"
+    inner.get_token.assert_not_awaited()
+    await other_app.get_token("scope")
+    other_app._credential.get_token.assert_awaited_once() # another app's entry isn't reused
+    assert b"token-0" not in (tmp_path / "tokens.bin").read_bytes()
+    assert oct(os.stat(tmp_path / "tokens.bin").st_mode & 0o777) == "0o600"
+    for credential in (second, other_app):
+        await credential.close()
+
+
+def test_auth_wraps_credential_for_pre_refresh():
+    assert isinstance(Auth("tenant", "client", "secret")._credential, PreRefreshingCredential)
+    assert not isinstance(Auth("tenant", "client", "secret", token_refresh=False)._credential, PreRefreshingCredential)
+
+
+# ─── Lazy imports ───
+
+def loaded_after(script):
+    """Runs a script in a fresh interpreter, returns the toolkit / SDK modules it loaded."""
+    code = (
+        "import json, sys\n"
+        f"{script}\n"
+        "modules = [m for m in sys.modules if m.startswith(('src.python_msgraph_toolkit', 'msgraph', 'azure'))]\n"
+        "print(json.dumps({'modules': modules}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_importing_the_client_defers_the_sdk():
+    result = loaded_after("from src.python_msgraph_toolkit import GraphClient")
+
+    assert not [m for m in result["modules"] if m.startswith(("msgraph", "azure", "src.python_msgraph_toolkit.services."))
+                and m != "src.python_msgraph_toolkit.services.exceptions"]
+
+
+def test_services_are_loaded_on_first_use():
+    result = loaded_after(
+        "from src.python_msgraph_toolkit import GraphClient\n"
+        "client = GraphClient('tenant', 'client', 'secret')\n"
+        "client.users"
+    )
+
+    services = {m.split(".")[3] for m in result["modules"] if m.startswith("src.python_msgraph_toolkit.services.")}
+    assert services == {"exceptions", "users"}
+
+
+def test_client_services_are_created_once():
+    client = GraphClient("tenant", "client", "secret", cache=ResponseCache())
+
+    assert client.sharepoint is client.sharepoint
+    assert client.users.users._cache is client._options["cache"]
+
+
+# ─── QueryOptions ───
+
+from kiota_abstractions.base_request_configuration import RequestConfiguration
+from msgraph.generated.users.users_request_builder import UsersRequestBuilder
+from msgraph.generated.users.item.user_item_request_builder import UserItemRequestBuilder
+from src.python_msgraph_toolkit.services.exceptions import ValidationError
+
+
+def test_fields_map_to_graph_paths():
+    assert str(F.display_name) == "displayName"
+    assert str(F.from_.email_address.address) == "from/emailAddress/address"
+
+
+def test_field_comparisons_build_filters():
+    assert str(F.department == "O'Neil") == "department eq 'O''Neil'"
+    assert str(F.account_enabled != True) == "accountEnabled ne true"
+    assert str(F.manager == None) == "manager eq null"
+    assert str(F.created_date_time >= datetime(2025, 1, 14, 9, 30, tzinfo=timezone.utc)) == "createdDateTime ge 2025-01-14T09:30:00Z"
+    assert str(F.mail.startswith("ann")) == "startswith(mail, 'ann')"
+    assert str(F.department.in_(["Sales", "HR"])) == "department in ('Sales', 'HR')"
+    combined = (F.department == "Sales") & ~F.mail.endswith("@contoso.com") | "jobTitle eq 'CEO'"
+    assert str(combined) == "((department eq 'Sales') and (not (endswith(mail, '@contoso.com')))) or (jobTitle eq 'CEO')"
+
+
+def test_query_options_apply_to_request_configuration():
+    query = QueryOptions(select=[F.id, F.display_name], filter=F.department == "Sales",
+                         orderby=[F.display_name.desc()], top=50, count=True)
+    configuration = query.apply(UsersRequestBuilder.UsersRequestBuilderGetQueryParameters)
+
+    parameters = configuration.query_parameters
+    assert parameters.select == ["id", "displayName"]
+    assert parameters.filter == "department eq 'Sales'"
+    assert parameters.orderby == ["displayName desc"]
+    assert parameters.top == 50
+    assert parameters.count is True
+    assert configuration.headers.get("ConsistencyLevel") == {"eventual"}
+
+
+def test_query_options_keep_existing_parameters():
+    configuration = RequestConfiguration(
+        query_parameters=UsersRequestBuilder.UsersRequestBuilderGetQueryParameters(top=999, orderby=["mail"]),
+    )
+    query_configuration(QueryOptions(select=["id"]), UsersRequestBuilder.UsersRequestBuilderGetQueryParameters, configuration)
+
+    assert configuration.query_parameters.select == ["id"]
+    assert configuration.query_parameters.top == 999
+    assert configuration.query_parameters.orderby == ["mail"]
+    assert not configuration.headers.contains("ConsistencyLevel")
+
+
+def test_query_options_reject_unsupported_options():
+    with pytest.raises(ValidationError, match=r"\$filter, \$top"):
+        QueryOptions(select=["id"], filter="mail eq 'a'", top=5).apply(UserItemRequestBuilder.UserItemRequestBuilderGetQueryParameters)
+    with pytest.raises(ValidationError):
+        QueryOptions(top=0)
+    with pytest.raises(ValidationError):
+        query_configuration({"select": ["id"]}, UsersRequestBuilder.UsersRequestBuilderGetQueryParameters)
+    assert query_configuration(None, UsersRequestBuilder.UsersRequestBuilderGetQueryParameters) is None
+
+
+def test_query_options_query_string():
+    query = QueryOptions(select=[F.id, F.mail], filter=F.mail.endswith("@contoso.com"), top=10)
+
+    assert str(query) == "$select=id,mail&$filter=endswith(mail, '@contoso.com')&$top=10"
+    assert query.url_query() == "$select=id,mail&$filter=endswith(mail,%20'%40contoso.com')&$top=10"